@@ -20,9 +20,155 @@
 # FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS 
 # IN THE SOFTWARE.
 
+import contextlib
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection, connections
+from django.http import JsonResponse
 from django.utils.deprecation import MiddlewareMixin
 
+from todo import profiling, replica, sharding, slow_queries
+
 class CrossOriginOpenerPolicyMiddleware(MiddlewareMixin):
     def process_response(self, request, response):
         response['Cross-Origin-Opener-Policy'] = 'same-origin-allow-popups'
-        return response
\ No newline at end of file
+        return response
+
+
+def count_request(cache, key, limit, period, now=None):
+    """
+    Count one request against a fixed-window limit held in `cache`.
+
+    Time is cut into windows of `period` seconds and each window has its own counter,
+    created with `add` and bumped with `incr`. Both are atomic in the shared caches
+    (memcached, redis, locmem), so concurrent requests can never read the same count
+    and all slip through; requests that are refused count too.
+
+    Args:
+        cache: The Django cache holding the counters.
+        key (str): The cache key prefix of the client and url name.
+        limit (int): Number of requests allowed per window.
+        period (float): Length of a window in seconds.
+        now (float): The current time, for tests.
+
+    Returns:
+        float: 0 if the request is allowed, otherwise the seconds until the window ends.
+    """
+    now = time.time() if now is None else now
+    window = int(now // period)
+    window_key = '%s:%d' % (key, window)
+    # a counter is of no use once its window is over
+    timeout = math.ceil(period) + 1
+    cache.add(window_key, 0, timeout=timeout)
+    try:
+        count = cache.incr(window_key)
+    except ValueError:
+        # evicted between add and incr
+        cache.add(window_key, 0, timeout=timeout)
+        count = cache.incr(window_key)
+    if count <= limit:
+        return 0
+    return (window + 1) * period - now
+
+
+class ThrottleMiddleware(MiddlewareMixin):
+    """
+    Fixed-window rate limiting per user (or client address) and url name.
+
+    `THROTTLE_RATES` maps url names to (requests, seconds); the 'default' entry covers
+    every other csrf-exempt JSON endpoint. Views without a rate are not throttled.
+    Requests over the limit get a 429 with Retry-After.
+    """
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        rates = getattr(settings, 'THROTTLE_RATES', {})
+        url_name = request.resolver_match.url_name if request.resolver_match else None
+        rate = rates.get(url_name)
+        if rate is None and getattr(view_func, 'csrf_exempt', False):
+            rate = rates.get('default')
+        if rate is None:
+            return None
+        if request.user.is_authenticated:
+            client = 'user:%s' % request.user.id
+        else:
+            client = 'addr:%s' % request.META.get('REMOTE_ADDR', '')
+        wait = count_request(caches[getattr(settings, 'THROTTLE_CACHE', 'default')],
+                             'throttle:%s:%s' % (url_name, client), *rate)
+        if not wait:
+            return None
+        response = JsonResponse({'error': 'rate limit exceeded'}, status=429)
+        response['Retry-After'] = str(math.ceil(wait))
+        return response
+
+
+class ProfilingMiddleware:
+    """Profile sampled requests and requests with a profiling token, see todo.profiling."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if profiling.wanted(request):
+            return profiling.profile(self.get_response, request)
+        return self.get_response(request)
+
+
+class SlowQueryMiddleware:
+    """Log the statements slower than SLOW_QUERY_MS on every database, see todo.slow_queries."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        threshold = settings.SLOW_QUERY_MS
+        if not threshold:
+            return self.get_response(request)
+        wrapper = slow_queries.watch(threshold, request)
+        with contextlib.ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(wrapper))
+            return self.get_response(request)
+
+
+class ShardMiddleware:
+    """Route the sharded todo models to the shard of the requesting user, see todo.sharding."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with sharding.for_user(request.user.id if request.user.is_authenticated else None):
+            return self.get_response(request)
+
+
+class ReplicaStickinessMiddleware:
+    """
+    Send a user who just wrote to the primary for a while, see todo.replica.
+
+    Writes are noticed on the primary connection itself, so views that read with a
+    POST body do not count as writes.
+    """
+
+    WRITE_STATEMENTS = ('INSERT', 'UPDATE', 'DELETE', 'REPLAC')
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not replica.replica_configured():
+            return self.get_response(request)
+        wrote = []
+
+        def watch(execute, sql, params, many, context):
+            if not wrote and sql.lstrip()[:6].upper() in self.WRITE_STATEMENTS:
+                wrote.append(True)
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(watch):
+            response = self.get_response(request)
+        if wrote:
+            replica.mark_sticky(response)
+        return response
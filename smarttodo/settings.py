@@ -32,6 +32,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/3.2/ref/settings/
 """
 
+import os
+import tempfile
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -72,11 +74,16 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'smarttodo.middleware.ProfilingMiddleware',
+    'smarttodo.middleware.SlowQueryMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'smarttodo.middleware.ThrottleMiddleware',
+    'smarttodo.middleware.ShardMiddleware',
+    'smarttodo.middleware.ReplicaStickinessMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'smarttodo.middleware.CrossOriginOpenerPolicyMiddleware'
@@ -113,6 +120,96 @@ DATABASES = {
     }
 }
 
+# Spread the users' lists, items, templates and tags, and their change log and
+# daily stats, over this many SQLite files, see todo.sharding. Create them with
+# `manage.py migrate_shards`.
+TODO_SHARDS = int(os.environ.get('TODO_SHARDS', 0))
+for shard in range(TODO_SHARDS):
+    DATABASES['shard%d' % shard] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / ('todo_shard%d.sqlite3' % shard),
+    }
+
+# Optional read replica of the default database for the read-only views, see
+# todo.replica. Point it at a snapshot of todo.sqlite3, or replace the entry with
+# the settings of e.g. a PostgreSQL standby.
+TODO_REPLICA = os.environ.get('TODO_REPLICA')
+if TODO_REPLICA:
+    DATABASES['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': TODO_REPLICA,
+        'TEST': {'MIRROR': 'default'},
+    }
+# the primary serves everybody while the replica is further behind than this
+REPLICA_MAX_LAG = 30
+REPLICA_LAG_CHECK_SECONDS = 5
+# seconds a user reads from the primary after writing; never less than
+# REPLICA_MAX_LAG + REPLICA_LAG_CHECK_SECONDS, see todo.replica.sticky_seconds
+REPLICA_STICKY_SECONDS = REPLICA_MAX_LAG + REPLICA_LAG_CHECK_SECONDS
+
+DATABASE_ROUTERS = (['todo.replica.ReplicaRouter'] if TODO_REPLICA else []) + \
+    (['todo.sharding.ShardRouter'] if TODO_SHARDS else [])
+
+
+# Caches
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+# The rate limit buckets live here; with several server processes use a shared
+# backend such as memcached or redis so they all see the same buckets.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# Rate limits per user and url name as (requests, seconds). 'default' applies to
+# every other csrf-exempt JSON endpoint.
+THROTTLE_CACHE = 'default'
+THROTTLE_RATES = {
+    'default': (120, 60),
+    'addNewListItem': (60, 60),
+    'markListItem': (120, 60),
+    'createNewTodoList': (30, 60),
+}
+
+
+# Request profiling, see todo.profiling. A fraction of the requests (0 to turn sampling
+# off) is profiled with cProfile; requests with a token from the /profiles page always are.
+PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+PROFILE_DIR = os.environ.get('PROFILE_DIR', os.path.join(tempfile.gettempdir(), 'smarttodo-profiles'))
+PROFILE_KEEP = 200
+
+
+# Statements taking at least this many milliseconds are logged to SLOW_QUERY_LOG with the
+# view that ran them, see todo.slow_queries; 0 turns the log off.
+SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', 200))
+SLOW_QUERY_LOG = os.environ.get('SLOW_QUERY_LOG', os.path.join(tempfile.gettempdir(), 'smarttodo-slow-queries.log'))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'message': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'slow_queries': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': SLOW_QUERY_LOG,
+            'maxBytes': 10 * 1024 * 1024,
+            'backupCount': 5,
+            'delay': True,
+            'formatter': 'message',
+        },
+    },
+    'loggers': {
+        'todo.slow_queries': {
+            'handlers': ['slow_queries'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -156,3 +253,7 @@ STATIC_URL = '/static/'
 # https://docs.djangoproject.com/en/3.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Queue csv imports and exports, list deletion and template instantiation as jobs for
+# `manage.py run_workers` instead of running them in the request
+BACKGROUND_JOBS = False
@@ -20,6 +20,185 @@
 # FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
 # IN THE SOFTWARE.
 
-from django.contrib import admin
+"""
+Admin registrations for the to-do models.
 
-# Register your models here.
+The item tables can hold tens of millions of rows, so every change list avoids
+full scans: foreign keys are raw id inputs instead of select boxes, search is an
+exact match on an indexed column, result counts are capped, and the bulk actions
+write with single UPDATE or DELETE statements instead of saving row by row.
+"""
+
+from django.contrib import admin, messages
+from django.core.paginator import Paginator
+from django.db.models import Count, F, Q
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+from todo import archive, purge, sharding, stats, sync
+from todo.models import (ChangeLog, List, ListItem, ListTags, SharedList, SharedUsers, Template,
+                         TemplateItem)
+
+# change lists stop counting here; narrow the list down with search or filters instead
+ADMIN_COUNT_LIMIT = 10000
+
+
+class CappedCountPaginator(Paginator):
+    """A paginator that counts at most ADMIN_COUNT_LIMIT rows instead of the whole table."""
+
+    @cached_property
+    def count(self):
+        return self.object_list.order_by()[:ADMIN_COUNT_LIMIT].count()
+
+
+class ScalableAdmin(admin.ModelAdmin):
+    paginator = CappedCountPaginator
+    show_full_result_count = False
+
+    def get_search_results(self, request, queryset, search_term):
+        # the search fields are exact matches, so compare the whole input rather than word by word
+        search_term = search_term.strip().replace('"', '')
+        return super().get_search_results(request, queryset, '"%s"' % search_term if search_term else '')
+
+    def get_list_select_related(self, request):
+        related = super().get_list_select_related(request)
+        if not sharding.shard_count() or not sharding.is_sharded(self.model) or isinstance(related, bool):
+            return related
+        # a shard cannot join the users, which live on the default database
+        return tuple(name for name in related if sharding.is_sharded(self.model._meta.get_field(name).related_model))
+
+
+def _item_counts(queryset):
+    """Return {(list id, user id): (items, done)} for an item queryset in one grouped query."""
+    return {
+        (row['list_id'], row['list__user_id']): (row['items'], row['done'])
+        for row in queryset.values('list_id', 'list__user_id').order_by().annotate(
+            items=Count('id'),
+            done=Count('id', filter=Q(is_done=True)),
+        )
+    }
+
+
+def _item_ids_by_list(queryset):
+    item_ids = {}
+    for list_id, user_id, item_id in queryset.values_list('list_id', 'list__user_id', 'id'):
+        item_ids.setdefault((list_id, user_id), []).append(item_id)
+    return item_ids
+
+
+@admin.action(description='Mark selected items done')
+def mark_done(modeladmin, request, queryset):
+    open_items = queryset.filter(is_done=False)
+    counts = _item_counts(open_items)
+    item_ids = _item_ids_by_list(open_items)
+    # the rollups get the items' open contributions taken out and added back as completed
+    stats.items_removed(open_items)
+    now = timezone.now()
+    updated = open_items.update(is_done=True, finished_on=now, version=F('version') + 1)
+    stats.items_added(queryset.filter(is_done=True, finished_on=now))
+    for (list_id, user_id), (items, done) in counts.items():
+        List.objects.adjust_counters(list_id, done=items)
+        sync.log_item_changes(user_id, list_id, item_ids[(list_id, user_id)])
+    modeladmin.message_user(request, 'Marked %d item(s) done.' % updated, messages.SUCCESS)
+
+
+@admin.action(description='Archive selected done items')
+def archive_selected(modeladmin, request, queryset):
+    moved = archive.archive_items(queryset)
+    modeladmin.message_user(request, 'Archived %d item(s).' % moved, messages.SUCCESS)
+
+
+@admin.action(description='Purge selected items')
+def purge_items(modeladmin, request, queryset):
+    counts = _item_counts(queryset)
+    item_ids = _item_ids_by_list(queryset)
+    stats.items_removed(queryset)
+    deleted = purge.purge_rows(ListItem, 'id', queryset.values('id'))
+    for (list_id, user_id), (items, done) in counts.items():
+        List.objects.adjust_counters(list_id, items=-items, done=-done)
+        sync.log_item_changes(user_id, list_id, item_ids[(list_id, user_id)], ChangeLog.DELETE)
+    modeladmin.message_user(request, 'Purged %d item(s).' % deleted, messages.SUCCESS)
+
+
+@admin.action(description='Delete selected lists (purged later by purge_deleted)')
+def soft_delete_lists(modeladmin, request, queryset):
+    deleted = list(queryset.filter(is_deleted=False).values_list('user_id', 'id'))
+    queryset.filter(is_deleted=False).update(is_deleted=True, version=F('version') + 1)
+    for user_id, list_id in deleted:
+        sync.log_change(user_id, ChangeLog.LIST, list_id, ChangeLog.DELETE)
+    modeladmin.message_user(request, 'Deleted %d list(s).' % len(deleted), messages.SUCCESS)
+
+
+@admin.action(description='Purge selected deleted lists now')
+def purge_lists(modeladmin, request, queryset):
+    purged = 0
+    for list_id in list(queryset.filter(is_deleted=True).values_list('id', flat=True)):
+        purged += purge.purge_list(list_id)
+    modeladmin.message_user(request, 'Purged %d deleted list(s).' % purged, messages.SUCCESS)
+
+
+@admin.register(List)
+class ListAdmin(ScalableAdmin):
+    list_display = ('id', 'title_text', 'user_id', 'tag', 'item_count', 'done_count', 'is_shared', 'is_deleted',
+                    'created_on')
+    list_select_related = ('user_id', 'tag')
+    list_filter = ('is_deleted',)
+    raw_id_fields = ('user_id', 'tag')
+    search_fields = ('=title_text',)
+    date_hierarchy = 'created_on'
+    readonly_fields = ('item_count', 'done_count', 'version')
+    actions = [soft_delete_lists, purge_lists]
+
+
+@admin.register(ListItem)
+class ListItemAdmin(ScalableAdmin):
+    list_display = ('id', 'item_name', 'list', 'is_done', 'due_date', 'created_on')
+    list_select_related = ('list',)
+    raw_id_fields = ('list',)
+    search_fields = ('=item_name',)
+    date_hierarchy = 'created_on'
+    readonly_fields = ('version', 'content_hash')
+    actions = [mark_done, archive_selected, purge_items]
+
+
+@admin.register(Template)
+class TemplateAdmin(ScalableAdmin):
+    list_display = ('id', 'title_text', 'user_id', 'created_on')
+    list_select_related = ('user_id',)
+    raw_id_fields = ('user_id',)
+    search_fields = ('=title_text',)
+    date_hierarchy = 'created_on'
+
+
+@admin.register(TemplateItem)
+class TemplateItemAdmin(ScalableAdmin):
+    list_display = ('id', 'item_text', 'template', 'due_date')
+    list_select_related = ('template',)
+    raw_id_fields = ('template',)
+    search_fields = ('=item_text',)
+    date_hierarchy = 'created_on'
+
+
+@admin.register(ListTags)
+class ListTagsAdmin(ScalableAdmin):
+    list_display = ('id', 'tag_name', 'user_id', 'created_on')
+    list_select_related = ('user_id',)
+    raw_id_fields = ('user_id',)
+    search_fields = ('=tag_name',)
+
+
+@admin.register(SharedUsers)
+class SharedUsersAdmin(ScalableAdmin):
+    list_display = ('id', 'list_id', 'shared_user')
+    list_select_related = ('list_id',)
+    raw_id_fields = ('list_id',)
+    search_fields = ('=shared_user',)
+
+
+@admin.register(SharedList)
+class SharedListAdmin(ScalableAdmin):
+    list_display = ('id', 'user', 'shared_list_id')
+    list_select_related = ('user',)
+    raw_id_fields = ('user',)
+    # auth_user.username is unique, so this is an index lookup
+    search_fields = ('=user__username',)
@@ -26,3 +26,7 @@ from django.apps import AppConfig
 class TodoConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'todo'
+
+    def ready(self):
+        # connects the replica's signal receivers
+        from todo import replica  # noqa: F401
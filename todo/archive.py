@@ -0,0 +1,71 @@
+# MIT License
+
+# Copyright © 2024 Akarsh Reddy Eathamukkala
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the “Software”), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to
+# do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+
+"""
+Moves completed items from the hot ListItem table to ListItemArchive.
+
+List counters and daily rollups keep counting archived items, so archiving
+changes neither; only the size of the table every list scan pays for.
+"""
+
+import datetime
+
+from django.utils import timezone
+
+from todo.models import ListItem, ListItemArchive
+from todo import purge, sharding
+
+ARCHIVE_BATCH_SIZE = 1000
+
+ARCHIVED_FIELDS = ['id', 'item_name', 'item_text', 'is_done', 'created_on', 'list_id',
+                   'finished_on', 'due_date', 'tag_color', 'version', 'content_hash']
+
+
+def archive_items(items, batch_size=ARCHIVE_BATCH_SIZE):
+    """
+    Move the done items of a ListItem queryset to the archive, batch by batch.
+
+    Every batch is copied and deleted in one transaction. Returns the number of
+    items moved.
+    """
+    items = items.filter(is_done=True, list__is_deleted=False).order_by('id')
+    moved = 0
+    while True:
+        with sharding.atomic():
+            rows = list(items.values(*ARCHIVED_FIELDS)[:batch_size])
+            if not rows:
+                return moved
+            now = timezone.now()
+            ListItemArchive.objects.bulk_create(
+                [ListItemArchive(archived_on=now, **row) for row in rows])
+            purge.purge_rows(ListItem, 'id', [row['id'] for row in rows], batch_size)
+        moved += len(rows)
+
+
+def archive_done(older_than_days, batch_size=ARCHIVE_BATCH_SIZE):
+    """
+    Archive every item that was finished more than `older_than_days` days ago.
+
+    Repeating items whose series is still running stay put for the scheduler.
+    """
+    cutoff = timezone.now() - datetime.timedelta(days=older_than_days)
+    return archive_items(ListItem.objects.filter(finished_on__lt=cutoff, next_occurrence__isnull=True), batch_size)
@@ -0,0 +1,275 @@
+# MIT License
+
+# Copyright © 2024 Akarsh Reddy Eathamukkala
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the “Software”), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to
+# do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+
+
+"""
+Full-fidelity account backups as gzip-compressed newline-delimited JSON.
+
+A backup starts with a header record followed by one record per row, parents
+before children: tags, lists, items, archived items, templates, template items,
+sharing, daily stats and reminder preferences. Rows keep their ids so that
+`restore` can remap foreign keys to the ids the rows get on the target instance.
+Both directions work on chunks, so memory stays flat however big the account is.
+"""
+
+import datetime
+import gzip
+import itertools
+import json
+import zlib
+from collections import Counter, defaultdict
+
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError
+from django.db.models import Q
+from django.utils import timezone
+
+from todo import sharding, stats, sync
+from todo.models import (ChangeLog, DailyStats, List, ListItem, ListItemArchive, ListTags, ReminderPreference,
+                         SharedList, SharedUsers, Template, TemplateItem)
+
+BACKUP_FORMAT = 'to-done-backup'
+BACKUP_VERSION = 1
+BACKUP_CHUNK_SIZE = 1000
+
+# record type, model, rows of a user, foreign keys remapped on restore (attname -> record type)
+SECTIONS = (
+    ('tag', ListTags, lambda user_id: Q(user_id=user_id), {}),
+    ('list', List, lambda user_id: Q(user_id=user_id, is_deleted=False), {'tag_id': 'tag'}),
+    ('item', ListItem, lambda user_id: Q(list__user_id=user_id, list__is_deleted=False), {'list_id': 'list'}),
+    ('archived_item', ListItemArchive, lambda user_id: Q(list__user_id=user_id, list__is_deleted=False),
+     {'list_id': 'list'}),
+    ('template', Template, lambda user_id: Q(user_id=user_id), {}),
+    ('template_item', TemplateItem, lambda user_id: Q(template__user_id=user_id), {'template_id': 'template'}),
+    ('shared_users', SharedUsers, lambda user_id: Q(list_id__user_id=user_id, list_id__is_deleted=False),
+     {'list_id_id': 'list'}),
+    ('daily_stats', DailyStats, lambda user_id: Q(user_id=user_id), {}),
+    ('reminder_preference', ReminderPreference, lambda user_id: Q(user_id=user_id), {}),
+)
+REMAPS = {kind: remap for kind, _, _, remap in SECTIONS}
+# archived items come back as regular done items; archive_done moves them again
+RESTORE_MODELS = dict({kind: model for kind, model, _, _ in SECTIONS}, archived_item=ListItem)
+# only these ids are kept in memory while restoring
+REFERENCED = {'tag', 'list', 'template'}
+
+
+def _is_owner(field):
+    return field.is_relation and field.related_model is User
+
+
+def _fields(model):
+    return [field.attname for field in model._meta.concrete_fields if not _is_owner(field)]
+
+
+def _json_default(value):
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    raise TypeError("%r is not JSON serializable" % value)
+
+
+def records(user_id, chunk_size=BACKUP_CHUNK_SIZE):
+    """Yield the backup records of a user, header first."""
+    yield {'type': 'header', 'format': BACKUP_FORMAT, 'version': BACKUP_VERSION, 'exported_on': timezone.now()}
+    # streamed after the view returned, so the shard is chosen here rather than by the middleware
+    with sharding.for_user(user_id):
+        for kind, model, rows_of, _ in SECTIONS:
+            rows = model.objects.filter(rows_of(user_id)).order_by('pk').values(*_fields(model))
+            for row in rows.iterator(chunk_size=chunk_size):
+                row['type'] = kind
+                yield row
+
+
+def dump(user_id, chunk_size=BACKUP_CHUNK_SIZE):
+    """
+    Yield the gzip-compressed backup of a user in pieces, for a streaming response.
+
+    Args:
+        user_id (int): The user to back up.
+        chunk_size (int): Number of rows read and compressed at a time.
+    """
+    compressor = zlib.compressobj(level=6, wbits=31)  # wbits=31 writes a gzip container
+    lines = []
+    for record in records(user_id, chunk_size):
+        lines.append(json.dumps(record, default=_json_default, separators=(',', ':')))
+        if len(lines) >= chunk_size:
+            data = compressor.compress(('\n'.join(lines) + '\n').encode('utf-8'))
+            lines = []
+            if data:
+                yield data
+    yield compressor.compress(('\n'.join(lines) + '\n').encode('utf-8')) + compressor.flush()
+
+
+def load(stream):
+    """
+    Yield the (line number, record) pairs of a gzip-compressed backup read from a binary file object.
+
+    Raises:
+        ValueError: If a line is not a JSON object.
+    """
+    with gzip.GzipFile(fileobj=stream, mode='rb') as lines:
+        for number, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                raise ValueError("line %d: not a JSON record" % number)
+            if not isinstance(record, dict):
+                raise ValueError("line %d: not a JSON record" % number)
+            yield number, record
+
+
+class _Restore:
+    def __init__(self, user):
+        self.user = user
+        self.ids = defaultdict(dict)
+        self.counts = Counter()
+        self.share_with = defaultdict(list)
+
+    def build(self, kind, record):
+        model = RESTORE_MODELS[kind]
+        remap = REMAPS[kind]
+        values = {}
+        for field in model._meta.concrete_fields:
+            if field.primary_key:
+                continue
+            if _is_owner(field):
+                values[field.attname] = self.user.id
+                continue
+            required = not field.null and not field.has_default() and not field.empty_strings_allowed
+            if field.attname not in record:
+                if required:
+                    raise ValueError("%s record without %s" % (kind, field.attname))
+                # written by an older version; the field keeps its default
+                continue
+            value = record[field.attname]
+            if value is None:
+                if required:
+                    raise ValueError("%s record without %s" % (kind, field.attname))
+                values[field.attname] = None
+                continue
+            if field.attname in remap:
+                try:
+                    value = self.ids[remap[field.attname]][value]
+                except (KeyError, TypeError):
+                    raise ValueError("%s %s refers to a missing %s" % (kind, record.get('id'), remap[field.attname]))
+            try:
+                values[field.attname] = field.to_python(value)
+            except ValidationError as e:
+                raise ValueError("invalid %s: %s" % (field.attname, ' '.join(e.messages)))
+        if kind in REFERENCED and record.get('id') is None:
+            raise ValueError("%s record without id" % kind)
+        return model(**values)
+
+    def build_all(self, kind, chunk):
+        """Build the rows of a chunk of (line number, record) pairs, naming the line of a bad record."""
+        objs = []
+        for number, record in chunk:
+            try:
+                objs.append(self.build(kind, record))
+            except ValueError as e:
+                raise ValueError("line %d: %s" % (number, e))
+        return objs
+
+    def restore_chunk(self, kind, chunk):
+        if kind == 'daily_stats':
+            for row in self.build_all(kind, chunk):
+                stats.record(self.user.id, row.day, row.created_count, row.completed_count,
+                             row.overdue_count, row.completion_seconds)
+            self.counts[kind] += len(chunk)
+            return
+        if kind == 'reminder_preference':
+            for preference in self.build_all(kind, chunk):
+                ReminderPreference.objects.update_or_create(
+                    user=self.user, defaults={'enabled': preference.enabled, 'days_before': preference.days_before})
+            self.counts[kind] += len(chunk)
+            return
+        if kind == 'tag':
+            # tag names are unique per user, so tags the user already has are reused
+            existing = dict(ListTags.objects.filter(
+                user_id=self.user, tag_name__in=[record.get('tag_name') for _, record in chunk]).values_list('tag_name', 'id'))
+            for _, record in chunk:
+                if record.get('tag_name') in existing:
+                    self.ids[kind][record.get('id')] = existing[record.get('tag_name')]
+            chunk = [(number, record) for number, record in chunk if record.get('tag_name') not in existing]
+        objs = RESTORE_MODELS[kind].objects.bulk_create(self.build_all(kind, chunk))
+        if kind in REFERENCED:
+            for obj, (_, record) in zip(objs, chunk):
+                self.ids[kind][record['id']] = obj.id
+        if kind == 'list':
+            sync.log_changes(self.user.id, ChangeLog.LIST, [obj.id for obj in objs])
+        elif kind in ('item', 'archived_item'):
+            sync.log_changes(self.user.id, ChangeLog.ITEM, [obj.id for obj in objs])
+        elif kind == 'shared_users':
+            for obj in objs:
+                for username in obj.shared_user.split():
+                    self.share_with[username].append(obj.list_id_id)
+        self.counts[kind] += len(objs)
+
+    def share_lists(self):
+        for shared_list in SharedList.objects.filter(user__username__in=list(self.share_with)).select_related('user'):
+            shared_list.shared_list_id += ''.join('%d ' % list_id for list_id in self.share_with[shared_list.user.username])
+            shared_list.save(update_fields=['shared_list_id'])
+
+
+def restore(user, stream, chunk_size=BACKUP_CHUNK_SIZE):
+    """
+    Add the contents of a backup to an account.
+
+    Records are inserted with one bulk_create per chunk and their foreign keys are
+    remapped to the ids of the restored rows. The restore runs in one transaction,
+    so a broken backup leaves the account untouched.
+
+    Args:
+        user (User): The account to restore into.
+        stream: A binary file object with the gzip-compressed backup.
+        chunk_size (int): Number of records inserted at a time.
+
+    Returns:
+        Counter: The number of restored records per record type.
+
+    Raises:
+        ValueError: If the stream is not a backup this version can read. The message
+                    names the line of the first invalid record.
+    """
+    backup = load(stream)
+    _, header = next(backup, (None, None))
+    if not header or header.get('type') != 'header' or header.get('format') != BACKUP_FORMAT:
+        raise ValueError("not a To-Done backup")
+    if header.get('version', 0) > BACKUP_VERSION:
+        raise ValueError("backup version %s is newer than this instance supports" % header.get('version'))
+    restoring = _Restore(user)
+    try:
+        with sharding.for_user(user.id), sharding.atomic():
+            for kind, group in itertools.groupby(backup, key=lambda pair: pair[1].get('type')):
+                if kind not in RESTORE_MODELS:
+                    raise ValueError("line %d: unknown record type %r" % (next(group)[0], kind))
+                while True:
+                    chunk = list(itertools.islice(group, chunk_size))
+                    if not chunk:
+                        break
+                    restoring.restore_chunk(kind, chunk)
+            restoring.share_lists()
+    except IntegrityError as e:
+        raise ValueError("incomplete record in backup: %s" % e) from e
+    return restoring.counts
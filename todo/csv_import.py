@@ -0,0 +1,305 @@
+# MIT License
+
+# Copyright © 2024 Akarsh Reddy Eathamukkala
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the “Software”), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to
+# do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+
+
+"""
+Parsing, validation and writing of csv imports, see `import_todo_csv`.
+
+Every row is checked before anything is written, and all problems are reported
+as (row, column, reason). Large files are split into chunks that are validated
+in parallel worker processes.
+
+Rows are matched to existing items by content hash, so importing a file again
+only writes the rows that are new or changed.
+"""
+
+import csv
+import datetime
+import functools
+from collections import Counter
+
+from django.db.models import F
+from django.utils import timezone
+
+from todo import positions, sharding, stats, sync
+from todo.models import List, ListItem, ListItemArchive, item_content_hash
+
+COLUMNS = ['List Title', 'Item Name', 'Item Text', 'Is Done', 'Created On', 'Due Date']
+# files with fewer data rows are validated in-process; process start-up costs more than it saves
+PARALLEL_THRESHOLD = 50000
+CHUNK_ROWS = 20000
+# number of rows looked up and written per transaction
+IMPORT_CHUNK_SIZE = 1000
+
+TITLE_MAX_LENGTH = List._meta.get_field('title_text').max_length
+NAME_MAX_LENGTH = ListItem._meta.get_field('item_name').max_length
+TEXT_MAX_LENGTH = ListItem._meta.get_field('item_text').max_length
+
+
+@functools.lru_cache(maxsize=4096)
+def parse_timestamp(value):
+    """
+    Parse an ISO 8601 date or date-time into a naive local datetime.
+
+    Exports repeat the same few dates over and over, so results are memoized, and
+    plain YYYY-MM-DD dates skip the general parsers.
+
+    Raises:
+        ValueError: If the value is not an ISO 8601 date.
+    """
+    if len(value) == 10 and value[4] == '-' and value[7] == '-':
+        return datetime.datetime(int(value[:4]), int(value[5:7]), int(value[8:]))
+    try:
+        parsed = datetime.datetime.fromisoformat(value)
+    except ValueError:
+        from dateutil import parser  # only for the ISO forms fromisoformat rejects
+        parsed = parser.isoparse(value)
+    if timezone.is_aware(parsed):
+        parsed = timezone.make_naive(parsed)
+    return parsed
+
+
+def _timestamp(row_number, column, value, errors):
+    if not value:
+        errors.append((row_number, column, "%s is required" % column))
+        return None
+    try:
+        return parse_timestamp(value)
+    except ValueError:
+        errors.append((row_number, column, "%r is not an ISO 8601 date" % value))
+        return None
+
+
+def validate_chunk(first_row_number, rows):
+    """
+    Validate consecutive csv rows.
+
+    Args:
+        first_row_number (int): The line number of the first row in the file.
+        rows (list): The raw csv rows.
+
+    Returns:
+        tuple: The parsed rows (title, name, text, is_done, created_on, due_date), their line
+               numbers and the (row, column, reason) errors. Rows with errors are left out.
+    """
+    parsed = []
+    row_numbers = []
+    errors = []
+    for row_number, row in enumerate(rows, first_row_number):
+        if len(row) < len(COLUMNS):
+            errors.append((row_number, None, "expected %d columns, got %d" % (len(COLUMNS), len(row))))
+            continue
+        title, name, text, is_done, created_on, due_date = row[:len(COLUMNS)]
+        row_errors = []
+        if not title:
+            row_errors.append((row_number, 'List Title', "List Title is required"))
+        for column, value, limit in (('List Title', title, TITLE_MAX_LENGTH), ('Item Name', name, NAME_MAX_LENGTH),
+                                     ('Item Text', text, TEXT_MAX_LENGTH)):
+            if len(value) > limit:
+                row_errors.append((row_number, column, "longer than %d characters" % limit))
+        created_on = _timestamp(row_number, 'Created On', created_on, row_errors)
+        due_date = _timestamp(row_number, 'Due Date', due_date, row_errors)
+        if row_errors:
+            errors.extend(row_errors)
+            continue
+        parsed.append((title, name, text, is_done.lower() in ['true', '1'], created_on, due_date.date()))
+        row_numbers.append(row_number)
+    return parsed, row_numbers, errors
+
+
+def _validate_chunk_args(args):
+    return validate_chunk(*args)
+
+
+class ImportReport:
+    def __init__(self):
+        self.rows = []
+        self.errors = []
+        self.row_count = 0
+
+    @property
+    def is_valid(self):
+        return not self.errors
+
+    def as_dict(self):
+        return {
+            'rows': self.row_count,
+            'valid': self.is_valid,
+            'errors': [{'row': row, 'column': column, 'reason': reason} for row, column, reason in self.errors],
+        }
+
+
+def validate(lines, parallel_threshold=PARALLEL_THRESHOLD, chunk_rows=CHUNK_ROWS, max_workers=None):
+    """
+    Parse and validate a csv import.
+
+    Args:
+        lines (iterable): The lines of the file, header first.
+        parallel_threshold (int): Files with at least this many data rows are validated
+                                  across a process pool.
+        chunk_rows (int): Number of rows validated per chunk.
+        max_workers (int): Size of the process pool; defaults to the number of CPUs.
+
+    Returns:
+        ImportReport: The parsed rows in file order and every error found.
+    """
+    reader = csv.reader(lines)
+    next(reader, None)  # Skip the header row
+    chunks = []
+    first_row_number = 2
+    while True:
+        rows = [row for _, row in zip(range(chunk_rows), reader)]
+        if not rows:
+            break
+        chunks.append((first_row_number, rows))
+        first_row_number += len(rows)
+    report = ImportReport()
+    report.row_count = first_row_number - 2
+    first_rows = {}
+    if len(chunks) > 1 and report.row_count >= parallel_threshold:
+        # multiprocessing is slow to import and only large files need it
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            results = list(pool.map(_validate_chunk_args, chunks))
+    else:
+        results = [validate_chunk(*chunk) for chunk in chunks]
+    for parsed, row_numbers, errors in results:
+        report.rows.extend(parsed)
+        report.errors.extend(errors)
+        _find_conflicts(report, parsed, row_numbers, first_rows)
+    return report
+
+
+def _find_conflicts(report, parsed, row_numbers, first_rows):
+    # rows with the same content hash are the same item; repeating one is harmless,
+    # but giving it another text or status leaves no way to tell which row is meant
+    for row, row_number in zip(parsed, row_numbers):
+        title, item_name, item_text, is_done, created_on, due_date = row
+        key = (title, item_name, created_on, due_date)
+        first = first_rows.setdefault(key, (row_number, item_text, is_done))
+        if first[1:] != (item_text, is_done):
+            report.errors.append((row_number, None, "same item as row %d with another Item Text or Is Done" % first[0]))
+
+
+def _upsert_chunk(todo_list, rows_by_hash, counts):
+    hashes = list(rows_by_hash)
+    # archived items are finished history; a row matching one is never written again
+    archived = set(ListItemArchive.objects.filter(list=todo_list, content_hash__in=hashes)
+                   .values_list('content_hash', flat=True))
+    existing = {content_hash: item_id for content_hash, item_id in ListItem.objects.filter(
+        list=todo_list, content_hash__in=hashes).values_list('content_hash', 'id')}
+    counts['unchanged'] += len(archived)
+    user_id = todo_list.user_id_id
+    now = timezone.now()
+
+    new_items = []
+    for content_hash, (_, item_name, item_text, is_done, created_on, due_date) in rows_by_hash.items():
+        if content_hash not in existing and content_hash not in archived:
+            new_items.append(ListItem(list=todo_list, item_name=item_name, item_text=item_text, is_done=is_done,
+                                      created_on=created_on, finished_on=now, due_date=due_date,
+                                      content_hash=content_hash))
+    if new_items:
+        for item, position in zip(new_items, positions.next_positions(todo_list.id, len(new_items))):
+            item.position = position
+        ListItem.objects.bulk_create(new_items)
+        new_ids = [item.id for item in new_items]
+        List.objects.adjust_counters(
+            todo_list.id, items=len(new_items), done=sum(item.is_done for item in new_items))
+        stats.items_added(ListItem.objects.filter(id__in=new_ids))
+        sync.log_item_changes(user_id, todo_list.id, new_ids)
+        counts['created'] += len(new_items)
+
+    changed_ids = []
+    done_delta = 0
+    current = ListItem.objects.in_bulk(list(existing.values()))
+    for content_hash, item_id in existing.items():
+        item = current[item_id]
+        item_text, is_done = rows_by_hash[content_hash][2:4]
+        if (item.item_text, item.is_done) == (item_text, is_done):
+            counts['unchanged'] += 1
+            continue
+        if item.is_done != is_done:
+            if item.is_done:
+                stats.item_completed(user_id, item, sign=-1)
+            else:
+                item.finished_on = now
+            done_delta += int(is_done) - int(item.is_done)
+        ListItem.objects.filter(id=item_id).update(
+            item_text=item_text, is_done=is_done, finished_on=item.finished_on, version=F('version') + 1)
+        if is_done and not item.is_done:
+            item.is_done = True
+            stats.item_completed(user_id, item)
+        changed_ids.append(item_id)
+    if changed_ids:
+        List.objects.adjust_counters(todo_list.id, done=done_delta)
+        sync.log_item_changes(user_id, todo_list.id, changed_ids)
+        counts['updated'] += len(changed_ids)
+
+
+def import_rows(rows, user_id, chunk_size=IMPORT_CHUNK_SIZE, progress=None):
+    """
+    Write validated rows into a user's lists as a set-difference upsert keyed by content hash.
+
+    Rows whose item already exists with the same text and status are skipped, rows whose
+    item exists with another text or status update it, and all other rows are inserted
+    with one bulk_create per chunk. Repeated rows within the file count once; `validate`
+    rejects repeats that differ in text or status.
+
+    Args:
+        rows (list): Parsed rows as returned in `ImportReport.rows`.
+        user_id (int): The importing user; rows only go to, and only match items in, their lists.
+        chunk_size (int): Number of rows looked up and written per transaction.
+        progress (callable): Called with the number of distinct rows handled after every chunk.
+
+    Returns:
+        Counter: How many rows were `created`, `updated` and `unchanged`.
+    """
+    by_list = {}
+    for row in rows:
+        title, item_name, _, _, created_on, due_date = row
+        by_list.setdefault(title, {})[item_content_hash(title, item_name, created_on, due_date)] = row
+    counts = Counter()
+    for title, rows_by_hash in by_list.items():
+        # Get or create the user's List by title
+        todo_list, _ = List.objects.get_or_create(
+            title_text=title, user_id_id=user_id, is_deleted=False,
+            defaults={'created_on': timezone.now(), 'updated_on': timezone.now()})
+        hashes = list(rows_by_hash)
+        for start in range(0, len(hashes), chunk_size):
+            with sharding.atomic():
+                _upsert_chunk(todo_list, {h: rows_by_hash[h] for h in hashes[start:start + chunk_size]}, counts)
+            if progress is not None:
+                progress(sum(counts.values()))
+    return counts
+
+
+def export_rows(user_id):
+    """Yield the csv rows of a user's hot and archived items, one table at a time."""
+    yield COLUMNS
+    # streamed after the view returned, so the shard is chosen here rather than by the middleware
+    with sharding.for_user(user_id):
+        for model in (ListItem, ListItemArchive):
+            items = model.objects.filter(list__user_id=user_id, list__is_deleted=False) \
+                .select_related('list').order_by('list_id', 'id')
+            for item in items.iterator():
+                yield [item.list.title_text, item.item_name, item.item_text,
+                       item.is_done, item.created_on, item.due_date]
@@ -24,6 +24,8 @@ from django import forms
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.models import User
 
+from todo.models import ReminderPreference
+
 
 class UpdateItemTextForm(forms.Form):
     item_text = forms.Textarea()
@@ -43,3 +45,9 @@ class NewUserForm(UserCreationForm):
         if commit:
             user.save()
         return user
+
+
+class ReminderPreferenceForm(forms.ModelForm):
+    class Meta:
+        model = ReminderPreference
+        fields = ("enabled", "days_before")
@@ -0,0 +1,105 @@
+# MIT License
+
+# Copyright © 2024 Akarsh Reddy Eathamukkala
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the “Software”), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to
+# do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+
+
+"""
+iCalendar (RFC 5545) rendering of a user's open items, one all-day event per due date.
+"""
+
+import datetime
+
+from django.utils import timezone
+
+from todo import sharding
+from todo.models import ListItem
+
+PRODUCT_ID = '-//To-Done//Due items//EN'
+# lines are folded after this many octets, as RFC 5545 requires
+LINE_LIMIT = 75
+
+
+def escape_text(value):
+    """Escape a TEXT property value."""
+    return (value or '').replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,') \
+        .replace('\r\n', '\\n').replace('\n', '\\n')
+
+
+def fold(line):
+    """Fold a content line into CRLF-terminated chunks of at most LINE_LIMIT octets."""
+    data = line.encode('utf-8')
+    chunks = []
+    limit = LINE_LIMIT
+    while len(data) > limit:
+        cut = limit
+        # never split a multi-byte character
+        while data[cut] & 0xC0 == 0x80:
+            cut -= 1
+        chunks.append(data[:cut])
+        data = data[cut:]
+        # continuation lines start with a space that counts towards the limit
+        limit = LINE_LIMIT - 1
+    chunks.append(data)
+    return b'\r\n '.join(chunks).decode('utf-8') + '\r\n'
+
+
+def _utc(value):
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value, timezone.get_default_timezone())
+    return value.astimezone(datetime.timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def item_event(item):
+    """Return the content lines of the VEVENT of an item."""
+    description = item.item_text
+    if item.list.title_text:
+        description = "%s\n%s" % (item.list.title_text, description) if description else item.list.title_text
+    return [
+        'BEGIN:VEVENT',
+        'UID:item-%d@to-done' % item.id,
+        'DTSTAMP:%s' % _utc(item.created_on),
+        'DTSTART;VALUE=DATE:%s' % item.due_date.strftime('%Y%m%d'),
+        'DTEND;VALUE=DATE:%s' % (item.due_date + datetime.timedelta(days=1)).strftime('%Y%m%d'),
+        'SUMMARY:%s' % escape_text(item.item_name),
+        'DESCRIPTION:%s' % escape_text(description),
+        'END:VEVENT',
+    ]
+
+
+def feed(user_id):
+    """
+    Yield the folded lines of a user's calendar.
+
+    Open items are read in due date order through the open-items due_date index
+    and streamed, so the feed never holds all of them in memory.
+    """
+    yield fold('BEGIN:VCALENDAR')
+    yield fold('VERSION:2.0')
+    yield fold('PRODID:%s' % PRODUCT_ID)
+    yield fold('X-WR-CALNAME:To-Done')
+    # streamed after the view returned, so the shard is chosen here rather than by the middleware
+    with sharding.for_user(user_id):
+        items = ListItem.objects.filter(is_done=False, list__user_id=user_id, list__is_deleted=False) \
+            .select_related('list').order_by('due_date', 'id')
+        for item in items.iterator():
+            for line in item_event(item):
+                yield fold(line)
+    yield fold('END:VCALENDAR')
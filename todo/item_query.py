@@ -0,0 +1,147 @@
+# MIT License
+
+# Copyright © 2024 Akarsh Reddy Eathamukkala
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the “Software”), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to
+# do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+
+
+"""
+Compiles the filter and sort parameters of the item query API into one ORM query.
+
+Pages are cut with a keyset cursor on (sort value, id), so every page is a range
+read continuing where the previous one stopped instead of an OFFSET that rereads
+everything before it.
+"""
+
+import base64
+import json
+
+from django.db.models import Q, Value
+from django.db.models.functions import Coalesce
+from django.utils.dateparse import parse_date
+
+from todo.models import ListItem
+
+# sort name -> item field; prefix with '-' to sort descending
+SORT_FIELDS = {
+    'due': 'due_date',
+    'created': 'created_on',
+    'name': 'sort_name',
+}
+
+
+def _parse_bool(value):
+    if value not in ('true', 'false'):
+        raise ValueError("done must be true or false")
+    return value == 'true'
+
+
+def _parse_date(value, name):
+    try:
+        parsed = parse_date(value)
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise ValueError("%s must be a date (YYYY-MM-DD)" % name)
+    return parsed
+
+
+def compile_filters(params):
+    """
+    Translate query parameters into a Q object over ListItem.
+
+    Supported parameters are `done`, `due_after`, `due_before` (inclusive dates),
+    `tag`, `color`, `list` and `prefix` (case-insensitive start of the item name).
+
+    Raises:
+        ValueError: If a parameter has an invalid value.
+    """
+    condition = Q()
+    if params.get('done'):
+        condition &= Q(is_done=_parse_bool(params['done']))
+    if params.get('due_after'):
+        condition &= Q(due_date__gte=_parse_date(params['due_after'], 'due_after'))
+    if params.get('due_before'):
+        condition &= Q(due_date__lte=_parse_date(params['due_before'], 'due_before'))
+    if params.get('tag'):
+        condition &= Q(list__tag__tag_name=params['tag'])
+    if params.get('color'):
+        condition &= Q(tag_color=params['color'])
+    if params.get('list'):
+        try:
+            condition &= Q(list_id=int(params['list']))
+        except ValueError:
+            raise ValueError("list must be an integer")
+    if params.get('prefix'):
+        condition &= Q(item_name__istartswith=params['prefix'])
+    return condition
+
+
+def encode_cursor(value, item_id):
+    raw = json.dumps([value if isinstance(value, str) else value.isoformat(), item_id])
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor):
+    try:
+        value, item_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return str(value), int(item_id)
+    except (ValueError, TypeError):
+        raise ValueError("invalid cursor")
+
+
+def query_items(user_id, params, limit):
+    """
+    Run a filtered, sorted and paginated item query for one user.
+
+    Args:
+        user_id (int): Only items of this user's lists are returned.
+        params (QueryDict): Filters as in `compile_filters`, plus `sort`
+                            (`due`, `created` or `name`, optionally prefixed with '-')
+                            and the `cursor` returned with the previous page.
+        limit (int): The page size.
+
+    Returns:
+        tuple: The page of items and the cursor of the next page, or None on the last page.
+
+    Raises:
+        ValueError: If a parameter has an invalid value.
+    """
+    sort = params.get('sort') or 'due'
+    descending = sort.startswith('-')
+    field = SORT_FIELDS.get(sort.lstrip('-'))
+    if field is None:
+        raise ValueError("sort must be one of %s" % ', '.join(SORT_FIELDS))
+    items = ListItem.objects.filter(list__user_id_id=user_id, list__is_deleted=False) \
+        .filter(compile_filters(params))
+    if field == 'sort_name':
+        # item names are nullable; sort missing names as empty ones
+        items = items.annotate(sort_name=Coalesce('item_name', Value('')))
+    if params.get('cursor'):
+        value, last_id = decode_cursor(params['cursor'])
+        after = 'lt' if descending else 'gt'
+        items = items.filter(Q(**{field + '__' + after: value})
+                             | Q(**{field: value, 'id__' + after: last_id}))
+    order = ('-' if descending else '') + field
+    page = list(items.order_by(order, ('-' if descending else '') + 'id')[:limit + 1])
+    if len(page) <= limit:
+        return page, None
+    page = page[:limit]
+    last = page[-1]
+    return page, encode_cursor(getattr(last, field), last.id)
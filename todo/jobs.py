@@ -0,0 +1,241 @@
+# MIT License
+
+# Copyright © 2024 Akarsh Reddy Eathamukkala
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the “Software”), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to
+# do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+
+
+"""
+Database-backed background jobs, run by `manage.py run_workers`.
+
+The web tier only stores a `Job` row. Workers poll for the oldest queued job and
+claim it with a single conditional UPDATE, so two workers never run the same job
+without needing row locks, which SQLite does not have. Handlers report progress on
+the row as they go and store a downloadable result when they finish.
+"""
+
+import csv
+import io
+import json
+import secrets
+import time
+
+from django.db import close_old_connections
+from django.utils import timezone
+
+from todo import csv_import, positions, purge, recurrence, sharding, stats, sync
+from todo.models import ChangeLog, Job, List, ListItem, Template
+
+# seconds a worker sleeps when the queue is empty
+POLL_INTERVAL = 1.0
+# seconds between a worker's checks for jobs whose worker died, see `requeue_stale`
+REQUEUE_CHECK_INTERVAL = 60.0
+
+HANDLERS = {}
+
+
+def handler(kind):
+    """Register the decorated function as the handler of `kind` jobs."""
+    def register(func):
+        HANDLERS[kind] = func
+        return func
+    return register
+
+
+def enqueue(kind, user_id, params=None, data=None):
+    """
+    Queue a job for the workers.
+
+    Args:
+        kind (str): A key of `HANDLERS`.
+        user_id (int): The owner of the job, or None for anonymous requests.
+        params (dict): JSON parameters handed to the handler.
+        data (bytes): Uploaded input handed to the handler.
+
+    Returns:
+        Job: The queued job.
+    """
+    if kind not in HANDLERS:
+        raise ValueError('unknown job kind %r' % kind)
+    return Job.objects.create(key=secrets.token_urlsafe(24), user_id=user_id, kind=kind,
+                              params=params or {}, data=data)
+
+
+def claim(worker):
+    """Claim the oldest queued job for `worker`, or return None when the queue is empty."""
+    while True:
+        job_id = Job.objects.filter(status=Job.QUEUED).order_by('id').values_list('id', flat=True).first()
+        if job_id is None:
+            return None
+        now = timezone.now()
+        # only one worker's UPDATE still sees the job queued; the others look again
+        if Job.objects.filter(id=job_id, status=Job.QUEUED).update(
+                status=Job.RUNNING, worker=worker, started_on=now, updated_on=now):
+            return Job.objects.get(id=job_id)
+
+
+def set_progress(job, progress, total=None):
+    """Record how far a running job got, which also serves as the worker's heartbeat."""
+    job.progress = progress
+    if total is not None:
+        job.total = total
+    Job.objects.filter(id=job.id).update(progress=job.progress, total=job.total, updated_on=timezone.now())
+
+
+def run(job):
+    """Run a claimed job and store its result or error. Returns the final status."""
+    try:
+        with sharding.for_user(job.user_id):
+            result = HANDLERS[job.kind](job)
+    except Exception as e:
+        Job.objects.filter(id=job.id).update(
+            status=Job.FAILED, error='%s: %s' % (type(e).__name__, e), finished_on=timezone.now())
+        return Job.FAILED
+    content, name, content_type = result or (None, '', '')
+    Job.objects.filter(id=job.id).update(
+        status=Job.DONE, result=content, result_name=name, result_type=content_type,
+        progress=max(job.progress, job.total), finished_on=timezone.now())
+    return Job.DONE
+
+
+def requeue_stale(timeout):
+    """Put back running jobs whose worker has not reported for `timeout` seconds."""
+    cutoff = timezone.now() - timezone.timedelta(seconds=timeout)
+    return Job.objects.filter(status=Job.RUNNING, updated_on__lt=cutoff).update(
+        status=Job.QUEUED, worker='', started_on=None, updated_on=None)
+
+
+def work(worker, once=False, poll=POLL_INTERVAL, requeue_after=None):
+    """
+    Claim and run jobs until stopped.
+
+    Args:
+        worker (str): Name recorded on the claimed jobs.
+        once (bool): Return as soon as the queue is empty instead of polling.
+        poll (float): Seconds to sleep while the queue is empty.
+        requeue_after (float): Also requeue running jobs whose worker has been silent
+                               for this many seconds, checked every REQUEUE_CHECK_INTERVAL.
+
+    Returns:
+        int: The number of jobs run.
+    """
+    ran = 0
+    next_check = time.monotonic()
+    while True:
+        close_old_connections()
+        if requeue_after is not None and time.monotonic() >= next_check:
+            # a worker that died while the others keep running never reclaims its job itself
+            requeue_stale(requeue_after)
+            next_check = time.monotonic() + REQUEUE_CHECK_INTERVAL
+        job = claim(worker)
+        if job is None:
+            if once:
+                return ran
+            time.sleep(poll)
+            continue
+        run(job)
+        ran += 1
+
+
+def _json_result(value, name):
+    return json.dumps(value).encode('utf-8'), name, 'application/json'
+
+
+@handler('import_csv')
+def import_csv(job):
+    report = csv_import.validate(bytes(job.data).decode('utf-8').splitlines())
+    if not report.is_valid:
+        row, column, reason = report.errors[0]
+        raise ValueError('row %d%s: %s' % (row, ', ' + column if column else '', reason))
+    set_progress(job, 0, len(report.rows))
+    counts = csv_import.import_rows(report.rows, job.user_id, progress=lambda done: set_progress(job, done))
+    return _json_result(dict(counts, rows=len(report.rows)), 'import.json')
+
+
+@handler('export_csv')
+def export_csv(job):
+    file = io.StringIO()
+    writer = csv.writer(file)
+    for count, row in enumerate(csv_import.export_rows(job.user_id)):
+        writer.writerow(row)
+        if count and count % 10000 == 0:
+            set_progress(job, count)
+    return file.getvalue().encode('utf-8'), 'todo_lists.csv', 'text/csv'
+
+
+@handler('purge_list')
+def purge_list(job):
+    # the view already soft-deleted the list, this removes its rows now instead of
+    # waiting for the next `manage.py purge_deleted`
+    list_id = job.params['list_id']
+    if List.objects.filter(id=list_id, user_id=job.user_id, is_deleted=True).exists():
+        purge.purge_list(list_id)
+
+
+@handler('list_from_template')
+def list_from_template(job):
+    todo = instantiate_template(job.params['template_id'], job.user_id)
+    return _json_result({'list_id': todo.id}, 'list.json')
+
+
+def instantiate_template(template_id, user_id):
+    """
+    Create a new to-do list with the title and items of a template.
+
+    Args:
+        template_id (int): The template to copy.
+        user_id (int): The owner of the new list.
+
+    Returns:
+        List: The new list.
+    """
+    # all or nothing, so a job retried after a crash does not leave a partial copy behind
+    with sharding.atomic():
+        fetched_template = Template.objects.get(pk=template_id)
+        todo = List.objects.create(
+            title_text=fetched_template.title_text,
+            created_on=timezone.now(),
+            updated_on=timezone.now(),
+            user_id_id=user_id
+        )
+        template_items = list(fetched_template.templateitem_set.all())
+        new_items = []
+        for template_item, position in zip(template_items, positions.next_positions(todo.id, len(template_items))):
+            new_items.append(ListItem(
+                position=position,
+                item_name=template_item.item_text,
+                item_text="",
+                created_on=timezone.now(),
+                finished_on=timezone.now(),
+                due_date=timezone.now(),
+                tag_color=template_item.tag_color,
+                list=todo,
+                is_done=False,
+                recurrence=template_item.recurrence,
+                next_occurrence=recurrence.next_occurrence(template_item.recurrence, timezone.now().date()),
+            ))
+        for item in new_items:
+            item.content_hash = item.compute_content_hash()
+        ListItem.objects.bulk_create(new_items)
+        item_ids = [item.id for item in new_items]
+        List.objects.adjust_counters(todo.id, items=len(item_ids))
+        stats.record(user_id, todo.created_on.date(), created=len(item_ids))
+        sync.log_change(user_id, ChangeLog.LIST, todo.id)
+        sync.log_item_changes(user_id, todo.id, item_ids)
+    return todo
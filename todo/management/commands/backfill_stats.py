@@ -0,0 +1,65 @@
+# MIT License
+
+# Copyright © 2024 Akarsh Reddy Eathamukkala
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the “Software”), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to
+# do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+
+from django.core.management.base import BaseCommand
+
+from todo import sharding, stats
+from todo.models import DailyStats, ListItem, ListItemArchive
+
+
+class Command(BaseCommand):
+    help = "Rebuild the DailyStats rollups from the existing to-do items"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, help='only rebuild the rollups of this user id')
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='number of rollup rows written per INSERT batch')
+
+    def handle(self, *args, **options):
+        rebuilt = 0
+        for alias in sharding.shard_aliases():
+            with sharding.pinned(alias):
+                rebuilt += self.rebuild(options['user'], options['batch_size'])
+        self.stdout.write("Rebuilt %d daily rollup row(s)" % rebuilt)
+
+    def rebuild(self, user_id, batch_size):
+        """Rebuild the rollups stored on the current shard, returns the number of rows written."""
+        items = ListItem.objects.all()
+        archived = ListItemArchive.objects.all()
+        rollups = DailyStats.objects.all()
+        if user_id is not None:
+            items = items.filter(list__user_id=user_id)
+            archived = archived.filter(list__user_id=user_id)
+            rollups = rollups.filter(user_id=user_id)
+
+        rows = stats.aggregate(items)
+        for key, archived_row in stats.aggregate(archived).items():
+            stats_row = rows.setdefault(key, archived_row)
+            if stats_row is not archived_row:
+                stats_row.created_count += archived_row.created_count
+                stats_row.completed_count += archived_row.completed_count
+                stats_row.overdue_count += archived_row.overdue_count
+                stats_row.completion_seconds += archived_row.completion_seconds
+        with sharding.atomic():
+            rollups.delete()
+            DailyStats.objects.bulk_create(rows.values(), batch_size=batch_size)
+        return len(rows)
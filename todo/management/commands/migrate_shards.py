@@ -0,0 +1,40 @@
+# MIT License
+
+# Copyright © 2024 Akarsh Reddy Eathamukkala
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the “Software”), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to
+# do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from todo import sharding
+
+
+class Command(BaseCommand):
+    help = "Create or upgrade the todo tables on every shard database"
+
+    def handle(self, *args, **options):
+        if not sharding.shard_count():
+            raise CommandError("Sharding is off, set TODO_SHARDS to the number of shards")
+        for index, alias in enumerate(sharding.shard_aliases()):
+            call_command('migrate', 'todo', database=alias, interactive=False,
+                         verbosity=options['verbosity'], stdout=self.stdout)
+            sharding.reserve_id_range(alias, index)
+            self.stdout.write("Migrated %s" % alias)
@@ -0,0 +1,42 @@
+# MIT License
+
+# Copyright © 2024 Akarsh Reddy Eathamukkala
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the “Software”), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to
+# do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+
+from django.core.management.base import BaseCommand
+
+from todo import purge, sharding
+
+
+class Command(BaseCommand):
+    help = "Remove soft-deleted lists and deleted accounts in bounded chunks"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=purge.PURGE_CHUNK_SIZE,
+                            help='maximum number of rows removed per DELETE statement')
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        lists = 0
+        for alias in sharding.shard_aliases():
+            with sharding.pinned(alias):
+                lists += purge.purge_deleted_lists(chunk_size)
+        accounts = purge.purge_deleted_accounts(chunk_size)
+        self.stdout.write("Purged %d list(s) and %d account(s)" % (lists, accounts))
@@ -0,0 +1,52 @@
+# MIT License
+
+# Copyright © 2024 Akarsh Reddy Eathamukkala
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the “Software”), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to
+# do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.db.models.functions import Length
+
+from todo import positions, sharding
+from todo.models import ListItem
+
+
+class Command(BaseCommand):
+    help = "Rewrite the rank keys of lists whose keys grew too long or were never ranked"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--max-length', type=int, default=24,
+                            help='rebalance lists holding a key longer than this')
+        parser.add_argument('--list', type=int, action='append', dest='lists',
+                            help='rebalance this list id regardless of its keys (repeatable)')
+
+    def handle(self, *args, **options):
+        rebalanced = 0
+        for alias in sharding.shard_aliases():
+            with sharding.pinned(alias):
+                list_ids = options['lists']
+                if not list_ids:
+                    list_ids = ListItem.objects.annotate(key_length=Length('position')).filter(
+                        Q(key_length__gt=options['max_length']) | Q(position='')
+                    ).order_by().values_list('list_id', flat=True).distinct()
+                for list_id in list(list_ids):
+                    positions.rebalance(list_id)
+                    rebalanced += 1
+        self.stdout.write("Rebalanced %d list(s)" % rebalanced)
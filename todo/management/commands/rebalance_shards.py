@@ -0,0 +1,52 @@
+# MIT License
+
+# Copyright © 2024 Akarsh Reddy Eathamukkala
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the “Software”), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to
+# do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+
+
+from django.core.management.base import BaseCommand, CommandError
+
+from todo import sharding
+
+
+class Command(BaseCommand):
+    help = "Move users whose data is not on the shard their user id hashes to, e.g. after TODO_SHARDS changed"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=sharding.MOVE_BATCH_SIZE,
+                            help='number of rows copied per INSERT')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='only report the users that would move')
+
+    def handle(self, *args, **options):
+        if not sharding.shard_count():
+            raise CommandError("Sharding is off, set TODO_SHARDS to the number of shards")
+        moved = 0
+        for source in sharding.shard_aliases():
+            for user_id in sorted(user_id for user_id in sharding.users_on(source) if user_id is not None):
+                target = sharding.shard_for_user(user_id)
+                if target == source:
+                    continue
+                if options['dry_run']:
+                    self.stdout.write("User %d: %s -> %s" % (user_id, source, target))
+                else:
+                    sharding.move_user(user_id, source, target, options['batch_size'])
+                moved += 1
+        self.stdout.write("%s %d user(s)" % ("Would move" if options['dry_run'] else "Moved", moved))
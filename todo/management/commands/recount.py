@@ -0,0 +1,67 @@
+# MIT License
+
+# Copyright © 2024 Akarsh Reddy Eathamukkala
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the “Software”), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to
+# do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Q
+
+from todo import sharding
+from todo.models import List, ListItem, ListItemArchive
+
+
+class Command(BaseCommand):
+    help = "Recompute the denormalized item counters of every to-do list"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='number of lists written per UPDATE batch')
+
+    def handle(self, *args, **options):
+        repaired = 0
+        for alias in sharding.shard_aliases():
+            with sharding.pinned(alias):
+                repaired += self.recount(options['batch_size'])
+        self.stdout.write("Repaired counters on %d list(s)" % repaired)
+
+    def recount(self, batch_size):
+        # one grouped aggregate over the item table instead of a query per list
+        counts = {
+            row['list_id']: (row['items'], row['done'])
+            for row in ListItem.objects.values('list_id').order_by().annotate(
+                items=Count('id'),
+                done=Count('id', filter=Q(is_done=True)),
+            )
+        }
+        # archived items are all done and keep counting towards their list
+        for row in ListItemArchive.objects.values('list_id').order_by().annotate(items=Count('id')):
+            items, done = counts.get(row['list_id'], (0, 0))
+            counts[row['list_id']] = (items + row['items'], done + row['items'])
+
+        repaired = []
+        for todo_list in List.objects.only('id', 'item_count', 'done_count').iterator():
+            expected = counts.get(todo_list.id, (0, 0))
+            current = (todo_list.item_count, todo_list.done_count)
+            if current != expected:
+                todo_list.item_count, todo_list.done_count = expected
+                repaired.append(todo_list)
+
+        List.objects.bulk_update(repaired, ['item_count', 'done_count'], batch_size=batch_size)
+        return len(repaired)
@@ -0,0 +1,49 @@
+# MIT License
+
+# Copyright © 2024 Akarsh Reddy Eathamukkala
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the “Software”), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to
+# do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from todo import backup
+
+
+class Command(BaseCommand):
+    help = "Restore a gzip-compressed NDJSON backup into an account"
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument('input', help='path of the .ndjson.gz backup')
+        parser.add_argument('--chunk-size', type=int, default=backup.BACKUP_CHUNK_SIZE,
+                            help='number of records inserted at a time')
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError("No user named %s" % options['username'])
+        try:
+            with open(options['input'], 'rb') as stream:
+                counts = backup.restore(user, stream, options['chunk_size'])
+        except (ValueError, OSError, EOFError) as e:
+            raise CommandError("Could not restore %s: %s" % (options['input'], e))
+        for kind, count in sorted(counts.items()):
+            self.stdout.write("%s: %d" % (kind, count))
@@ -0,0 +1,56 @@
+# MIT License
+
+# Copyright © 2024 Akarsh Reddy Eathamukkala
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the “Software”), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to
+# do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from todo import sharding
+from todo.scheduler import Scheduler
+
+
+class Command(BaseCommand):
+    help = "Create the occurrences of repeating list items as they come due"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=60,
+                            help='seconds to wait between ticks')
+        parser.add_argument('--once', action='store_true',
+                            help='run a single tick and exit')
+
+    def handle(self, *args, **options):
+        # one scheduler per shard, each following the repeating items stored there
+        schedulers = {}
+        for alias in sharding.shard_aliases():
+            with sharding.pinned(alias):
+                schedulers[alias] = Scheduler()
+                schedulers[alias].load()
+        while True:
+            fired = 0
+            for alias, scheduler in schedulers.items():
+                with sharding.pinned(alias):
+                    fired += scheduler.tick()
+            if fired or options['once']:
+                self.stdout.write("Fired %d repeating item(s)" % fired)
+            if options['once']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,69 @@
+# MIT License
+
+# Copyright © 2024 Akarsh Reddy Eathamukkala
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the “Software”), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to
+# do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+
+
+import multiprocessing
+import os
+import socket
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from todo import jobs
+
+
+def _work(name, once, poll, requeue_after):
+    jobs.work(name, once=once, poll=poll, requeue_after=requeue_after)
+
+
+class Command(BaseCommand):
+    help = "Run background jobs queued by the web tier"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=1,
+                            help='number of worker processes')
+        parser.add_argument('--poll', type=float, default=jobs.POLL_INTERVAL,
+                            help='seconds to wait while the queue is empty')
+        parser.add_argument('--once', action='store_true',
+                            help='exit once the queue is empty')
+        parser.add_argument('--requeue-after', type=float, default=600,
+                            help='requeue running jobs whose worker has been silent for this many seconds')
+
+    def handle(self, *args, **options):
+        requeued = jobs.requeue_stale(options['requeue_after'])
+        if requeued:
+            self.stdout.write("Requeued %d stale job(s)" % requeued)
+        prefix = '%s-%d' % (socket.gethostname(), os.getpid())
+        if options['workers'] == 1:
+            ran = jobs.work(prefix, once=options['once'], poll=options['poll'],
+                            requeue_after=options['requeue_after'])
+            self.stdout.write("Ran %d job(s)" % ran)
+            return
+        # forked children must not share the parent's database connection
+        connections.close_all()
+        processes = [multiprocessing.Process(target=_work, args=(
+            '%s-%d' % (prefix, number), options['once'], options['poll'], options['requeue_after']))
+            for number in range(options['workers'])]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
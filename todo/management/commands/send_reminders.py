@@ -0,0 +1,47 @@
+# MIT License
+
+# Copyright © 2024 Akarsh Reddy Eathamukkala
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the “Software”), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to
+# do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from todo import reminders, sharding
+
+
+class Command(BaseCommand):
+    help = "Email reminders about open items that are due soon"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='first day of the reminder window (YYYY-MM-DD), defaults to today')
+        parser.add_argument('--batch-size', type=int, default=reminders.REMINDER_BATCH_SIZE,
+                            help='number of due items read, and of users emailed, per batch')
+
+    def handle(self, *args, **options):
+        today = None
+        if options['date']:
+            today = parse_date(options['date'])
+            if today is None:
+                raise CommandError("--date must be YYYY-MM-DD")
+        sent = 0
+        for alias in sharding.shard_aliases():
+            with sharding.pinned(alias):
+                sent += reminders.send_reminders(today, options['batch_size'])
+        self.stdout.write("Sent reminders for %d item(s)" % sent)
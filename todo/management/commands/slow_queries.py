@@ -0,0 +1,50 @@
+# MIT License
+
+# Copyright © 2024 Akarsh Reddy Eathamukkala
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the “Software”), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to
+# do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from todo import slow_queries
+
+
+class Command(BaseCommand):
+    help = "Report the slowest statements of the slow query log, grouped by normalized statement"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=20,
+                            help='number of statements to report')
+        parser.add_argument('--log', default=settings.SLOW_QUERY_LOG,
+                            help='the slow query log, rotated backups are read too')
+
+    def handle(self, *args, **options):
+        groups = slow_queries.report(slow_queries.read_entries(options['log']), options['top'])
+        if not groups:
+            self.stdout.write("No slow queries logged in %s" % options['log'])
+            return
+        for group in groups:
+            self.stdout.write("%10.1fms total %8.1fms max %6d x  %s" % (
+                group['total_ms'], group['max_ms'], group['count'], group['sql']))
+            for caller, count in group['callers'].most_common(3):
+                self.stdout.write("    %6d x  %s" % (count, caller or 'outside the todo app'))
+            url_names = ', '.join('%s (%d)' % (url_name, count)
+                                  for url_name, count in group['url_names'].most_common(3))
+            self.stdout.write("    urls: %s" % url_names)
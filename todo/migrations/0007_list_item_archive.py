@@ -0,0 +1,58 @@
+# MIT License
+
+# Copyright © 2024 Akarsh Reddy Eathamukkala
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the “Software”), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to
+# do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+
+
+# Generated by Django 4.1.1 on 2026-10-19 12:39
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todo', '0006_soft_delete'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ListItemArchive',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('item_name', models.CharField(blank=True, max_length=50, null=True)),
+                ('item_text', models.CharField(max_length=100)),
+                ('is_done', models.BooleanField(default=True)),
+                ('created_on', models.DateTimeField()),
+                ('finished_on', models.DateTimeField()),
+                ('due_date', models.DateField()),
+                ('tag_color', models.CharField(max_length=10)),
+                ('version', models.IntegerField(default=0)),
+                ('archived_on', models.DateTimeField(default=django.utils.timezone.now)),
+                ('list', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='todo.list')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='listitemarchive',
+            index=models.Index(fields=['list', 'finished_on'], name='archive_list_finished'),
+        ),
+    ]
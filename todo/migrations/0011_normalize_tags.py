@@ -0,0 +1,76 @@
+# MIT License
+
+# Copyright © 2024 Akarsh Reddy Eathamukkala
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the “Software”), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to
+# do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+
+
+# Generated by Django 4.1.1 on 2026-10-19 12:50
+
+from django.db import migrations, models
+from django.db.models import Min
+import django.db.models.deletion
+
+
+def link_tags(apps, schema_editor):
+    List = apps.get_model('todo', 'List')
+    ListTags = apps.get_model('todo', 'ListTags')
+    db_alias = schema_editor.connection.alias
+    # createNewTodoList used to add a ListTags row for every list with a new tag
+    keep = ListTags.objects.using(db_alias).values('user_id', 'tag_name').order_by().annotate(keep_id=Min('id'))
+    ListTags.objects.using(db_alias).exclude(id__in=[row['keep_id'] for row in keep]).delete()
+    pairs = List.objects.using(db_alias).exclude(list_tag='none').values_list('user_id', 'list_tag').order_by().distinct()
+    for user_id, tag_name in pairs:
+        lists = List.objects.using(db_alias).filter(user_id=user_id, list_tag=tag_name)
+        tag = ListTags.objects.using(db_alias).filter(user_id=user_id, tag_name=tag_name).first()
+        if tag is None:
+            tag = ListTags.objects.using(db_alias).create(user_id_id=user_id, tag_name=tag_name,
+                                                          created_on=lists.aggregate(first=Min('created_on'))['first'])
+        lists.update(tag=tag)
+
+
+def unlink_tags(apps, schema_editor):
+    List = apps.get_model('todo', 'List')
+    db_alias = schema_editor.connection.alias
+    for todo_list in List.objects.using(db_alias).exclude(tag=None).select_related('tag'):
+        List.objects.using(db_alias).filter(id=todo_list.id).update(list_tag=todo_list.tag.tag_name)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todo', '0010_reminders'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='list',
+            name='tag',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='todo.listtags'),
+        ),
+        migrations.RunPython(link_tags, unlink_tags, hints={'model_name': 'list'}),
+        migrations.RemoveField(
+            model_name='list',
+            name='list_tag',
+        ),
+        migrations.AddConstraint(
+            model_name='listtags',
+            constraint=models.UniqueConstraint(fields=('user_id', 'tag_name'), name='unique_list_tag'),
+        ),
+    ]
@@ -0,0 +1,71 @@
+# MIT License
+
+# Copyright © 2024 Akarsh Reddy Eathamukkala
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the “Software”), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to
+# do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+
+
+# Generated by Django 4.1.1 on 2026-10-19 13:01
+
+from django.db import migrations, models
+
+from todo.models import item_content_hash
+
+
+def populate_hashes(apps, schema_editor):
+    db_alias = schema_editor.connection.alias
+    for model_name in ('ListItem', 'ListItemArchive'):
+        model = apps.get_model('todo', model_name)
+        batch = []
+        for item in model.objects.using(db_alias).select_related('list').order_by('id').iterator(chunk_size=1000):
+            item.content_hash = item_content_hash(item.list.title_text, item.item_name, item.created_on, item.due_date)
+            batch.append(item)
+            if len(batch) == 1000:
+                model.objects.using(db_alias).bulk_update(batch, ['content_hash'])
+                batch = []
+        model.objects.using(db_alias).bulk_update(batch, ['content_hash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todo', '0012_calendar_feed'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='listitem',
+            name='content_hash',
+            field=models.CharField(blank=True, default='', max_length=32),
+        ),
+        migrations.AddField(
+            model_name='listitemarchive',
+            name='content_hash',
+            field=models.CharField(blank=True, default='', max_length=32),
+        ),
+        migrations.AddIndex(
+            model_name='listitem',
+            index=models.Index(fields=['list', 'content_hash'], name='listitem_list_hash'),
+        ),
+        migrations.AddIndex(
+            model_name='listitemarchive',
+            index=models.Index(fields=['list', 'content_hash'], name='archive_list_hash'),
+        ),
+        migrations.RunPython(populate_hashes, migrations.RunPython.noop, hints={'model_name': 'listitem'}),
+    ]
@@ -0,0 +1,76 @@
+# MIT License
+
+# Copyright © 2024 Akarsh Reddy Eathamukkala
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the “Software”), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to
+# do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+
+
+# Generated by Django 4.1.1 on 2026-10-19 13:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todo', '0014_job'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='list',
+            index=models.Index(fields=['title_text'], name='list_title'),
+        ),
+        migrations.AddIndex(
+            model_name='list',
+            index=models.Index(fields=['created_on'], name='list_created'),
+        ),
+        migrations.AddIndex(
+            model_name='listitem',
+            index=models.Index(fields=['item_name'], name='listitem_name'),
+        ),
+        migrations.AddIndex(
+            model_name='listitem',
+            index=models.Index(fields=['created_on'], name='listitem_created'),
+        ),
+        migrations.AddIndex(
+            model_name='listtags',
+            index=models.Index(fields=['tag_name'], name='listtags_name'),
+        ),
+        migrations.AddIndex(
+            model_name='sharedusers',
+            index=models.Index(fields=['shared_user'], name='sharedusers_user'),
+        ),
+        migrations.AddIndex(
+            model_name='template',
+            index=models.Index(fields=['title_text'], name='template_title'),
+        ),
+        migrations.AddIndex(
+            model_name='template',
+            index=models.Index(fields=['created_on'], name='template_created'),
+        ),
+        migrations.AddIndex(
+            model_name='templateitem',
+            index=models.Index(fields=['item_text'], name='templateitem_text'),
+        ),
+        migrations.AddIndex(
+            model_name='templateitem',
+            index=models.Index(fields=['created_on'], name='templateitem_created'),
+        ),
+    ]
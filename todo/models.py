@@ -20,20 +20,89 @@
 # FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
 # IN THE SOFTWARE.
 
+import datetime
+import hashlib
+
 from django.db import models
+from django.db.models import F
 from django.contrib.auth.models import User
+from django.utils import timezone
+
+
+def item_content_hash(list_title, item_name, created_on, due_date):
+    """
+    Return the hex digest identifying an item across csv exports and re-imports.
+
+    Only the fields an export round-trips unchanged take part, so a re-imported
+    item hashes to the same value as the item it was exported from.
+    """
+    key = '\x1f'.join([list_title or '', item_name or '', created_on.isoformat(), due_date.isoformat()])
+    return hashlib.blake2b(key.encode('utf-8'), digest_size=16).hexdigest()
+
+
+class ListManager(models.Manager):
+    def adjust_counters(self, list_id, items=0, done=0):
+        """
+        Apply item counter deltas to a list and bump its updated_on.
+
+        The deltas are applied with F-expressions in a single UPDATE so that
+        concurrent requests touching the same list never lose an increment.
+        """
+        return self.filter(id=list_id).update(
+            item_count=F('item_count') + items,
+            done_count=F('done_count') + done,
+            updated_on=timezone.now(),
+        )
+
+    def with_overdue_counts(self, lists, today=None):
+        """
+        Set `overdue_count` on each of the given lists with one grouped query.
+
+        Whether an item is overdue changes with the date and not with a write, so it
+        cannot be kept as an incremental counter; it is counted when lists are shown,
+        through the index of the open items' due dates. Lists shared from other shards
+        are counted with one query per shard.
+        """
+        lists = list(lists)
+        by_db = {}
+        for todo_list in lists:
+            by_db.setdefault(todo_list._state.db, []).append(todo_list.id)
+        counts = {}
+        for db, list_ids in by_db.items():
+            counts.update(ListItem.objects.db_manager(db).filter(
+                list_id__in=list_ids, is_done=False, due_date__lt=today or datetime.date.today(),
+            ).values('list_id').order_by().annotate(overdue=models.Count('id')).values_list('list_id', 'overdue'))
+        for todo_list in lists:
+            todo_list.overdue_count = counts.get(todo_list.id, 0)
+        return lists
 
 
 class List(models.Model):
     title_text = models.CharField(max_length=100)
     created_on = models.DateTimeField()
     updated_on = models.DateTimeField()
-    list_tag = models.CharField(max_length=50, default='none')
+    tag = models.ForeignKey('ListTags', on_delete=models.SET_NULL, null=True, blank=True)
+    # no database constraint: with sharding the user lives in another database, see todo.sharding
     user_id = models.ForeignKey(
-        User, on_delete=models.CASCADE, null=True, blank=True)
+        User, on_delete=models.CASCADE, null=True, blank=True, db_constraint=False)
     is_shared = models.BooleanField(default=False)
-
-    objects = models.Manager()
+    # denormalized counters, maintained by every item-mutating view and
+    # repaired by `manage.py recount`
+    item_count = models.IntegerField(default=0)
+    done_count = models.IntegerField(default=0)
+    # bumped by every conditional update, see optimistic locking in views
+    version = models.IntegerField(default=0)
+    # soft-deleted lists are hidden at once and removed by `manage.py purge_deleted`
+    is_deleted = models.BooleanField(default=False, db_index=True)
+
+    objects = ListManager()
+
+    class Meta:
+        indexes = [
+            # exact-match search and date drill-down in the admin
+            models.Index(fields=['title_text'], name='list_title'),
+            models.Index(fields=['created_on'], name='list_created'),
+        ]
 
     def __str__(self):
         return "%s" % self.title_text
@@ -41,12 +110,20 @@ class List(models.Model):
 
 class ListTags(models.Model):
     user_id = models.ForeignKey(
-        User, on_delete=models.CASCADE, null=True, blank=True)
+        User, on_delete=models.CASCADE, null=True, blank=True, db_constraint=False)
     tag_name = models.CharField(max_length=50, null=True, blank=True)
     created_on = models.DateTimeField()
 
     objects = models.Manager()
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user_id', 'tag_name'], name='unique_list_tag'),
+        ]
+        indexes = [
+            models.Index(fields=['tag_name'], name='listtags_name'),
+        ]
+
     def __str__(self):
         return "%s" % self.tag_name
 
@@ -62,9 +139,102 @@ class ListItem(models.Model):
     finished_on = models.DateTimeField()
     due_date = models.DateField()
     tag_color = models.CharField(max_length=10)
+    # bumped by every conditional update, see optimistic locking in views
+    version = models.IntegerField(default=0)
+    # fractional rank key (see todo.ranking); empty for items never ranked
+    position = models.CharField(max_length=64, default='', blank=True)
+    # recurrence rule of a repeating item (see todo.recurrence); empty for one-off items
+    recurrence = models.CharField(max_length=100, default='', blank=True)
+    # due date of the next occurrence `manage.py run_scheduler` will create
+    next_occurrence = models.DateField(null=True, blank=True, db_index=True)
+    # see item_content_hash; filled in by save(), used to skip known rows on csv re-import
+    content_hash = models.CharField(max_length=32, default='', blank=True)
 
     objects = models.Manager()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['list', 'position'], name='listitem_list_position'),
+            # range scans of open items by due date, see todo.reminders; partial so
+            # that it only holds open items and serves the (due_date, id) order too
+            models.Index(fields=['due_date'], condition=models.Q(is_done=False), name='listitem_open_due'),
+            models.Index(fields=['list', 'content_hash'], name='listitem_list_hash'),
+            models.Index(fields=['item_name'], name='listitem_name'),
+            models.Index(fields=['created_on'], name='listitem_created'),
+        ]
+
+    # the fields item_content_hash is computed from, besides the list title
+    HASHED_FIELDS = ('list_id', 'item_name', 'created_on', 'due_date')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        item = super().from_db(db, field_names, values)
+        # remember what the stored hash was computed from, so that save() can skip it
+        item._hashed_values = item._hash_inputs()
+        return item
+
+    def _hash_inputs(self):
+        return tuple(self.__dict__.get(name) for name in self.HASHED_FIELDS)
+
+    def compute_content_hash(self, list_title=None):
+        """
+        Hash this item as `item_content_hash` does.
+
+        Args:
+            list_title (str): The title of the item's list; read from `self.list` if not given,
+                              which costs a query unless the list is already loaded.
+
+        Returns:
+            str: The content hash.
+        """
+        if list_title is None:
+            list_title = self.list.title_text
+        created_on = self._meta.get_field('created_on').to_python(self.created_on)
+        due_date = self._meta.get_field('due_date').to_python(self.due_date)
+        return item_content_hash(list_title, self.item_name, created_on, due_date)
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            stale = not {'list', *self.HASHED_FIELDS}.isdisjoint(update_fields)
+        else:
+            # items loaded from the database only need a new hash if a hashed field changed
+            stale = getattr(self, '_hashed_values', None) != self._hash_inputs() or not self.content_hash
+        if stale:
+            self.content_hash = self.compute_content_hash()
+            if update_fields is not None and 'content_hash' not in update_fields:
+                kwargs['update_fields'] = list(update_fields) + ['content_hash']
+        super().save(*args, **kwargs)
+        self._hashed_values = self._hash_inputs()
+
+    def __str__(self):
+        return "%s: %s" % (str(self.item_text), self.is_done)
+
+
+class ListItemArchive(models.Model):
+    # completed items moved out of the ListItem table by `manage.py archive_done`;
+    # the primary key is the id the item had in ListItem
+    id = models.BigIntegerField(primary_key=True)
+    item_name = models.CharField(max_length=50, null=True, blank=True)
+    item_text = models.CharField(max_length=100)
+    is_done = models.BooleanField(default=True)
+    created_on = models.DateTimeField()
+    list = models.ForeignKey(List, on_delete=models.CASCADE)
+    finished_on = models.DateTimeField()
+    due_date = models.DateField()
+    tag_color = models.CharField(max_length=10)
+    version = models.IntegerField(default=0)
+    content_hash = models.CharField(max_length=32, default='', blank=True)
+    archived_on = models.DateTimeField(default=timezone.now)
+
+    objects = models.Manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['list', 'finished_on'], name='archive_list_finished'),
+            models.Index(fields=['list', 'content_hash'], name='archive_list_hash'),
+        ]
+
     def __str__(self):
         return "%s: %s" % (str(self.item_text), self.is_done)
 
@@ -74,10 +244,16 @@ class Template(models.Model):
     created_on = models.DateTimeField()
     updated_on = models.DateTimeField()
     user_id = models.ForeignKey(
-        User, on_delete=models.CASCADE, null=True, blank=True)
+        User, on_delete=models.CASCADE, null=True, blank=True, db_constraint=False)
 
     objects = models.Manager()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['title_text'], name='template_title'),
+            models.Index(fields=['created_on'], name='template_created'),
+        ]
+
     def __str__(self):
         return "%s" % self.title_text
 
@@ -89,9 +265,17 @@ class TemplateItem(models.Model):
     finished_on = models.DateTimeField()
     due_date = models.DateField()
     tag_color = models.CharField(max_length=10)
+    # copied onto the list items created from this template
+    recurrence = models.CharField(max_length=100, default='', blank=True)
 
     objects = models.Manager()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['item_text'], name='templateitem_text'),
+            models.Index(fields=['created_on'], name='templateitem_created'),
+        ]
+
     def __str__(self):
         return "%s" % self.item_text
 
@@ -102,6 +286,11 @@ class SharedUsers(models.Model):
 
     objects = models.Manager()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['shared_user'], name='sharedusers_user'),
+        ]
+
     def __str__(self):
         return "%s" % str(self.list_id)
 
@@ -115,3 +304,212 @@ class SharedList(models.Model):
 
     def __str__(self):
         return "%s" % str(self.user)
+
+
+class Team(models.Model):
+    # a group of users lists can be shared with in one go, see ListTeamShare
+    name = models.CharField(max_length=100)
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='owned_teams')
+    created_on = models.DateTimeField(default=timezone.now)
+
+    objects = models.Manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['owner', 'name'], name='unique_team_name'),
+        ]
+
+    def __str__(self):
+        return "%s" % self.name
+
+
+class TeamMembership(models.Model):
+    # joining or leaving a team is one row, however many lists the team shares
+    team = models.ForeignKey(Team, on_delete=models.CASCADE)
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    joined_on = models.DateTimeField(default=timezone.now)
+
+    objects = models.Manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['team', 'user'], name='unique_team_member'),
+        ]
+        indexes = [
+            # the teams of a user, read by every index page
+            models.Index(fields=['user', 'team'], name='teammember_user'),
+        ]
+
+    def __str__(self):
+        return "%s in %s" % (self.user_id, self.team_id)
+
+
+class ListTeamShare(models.Model):
+    # one row shares a list with every member of a team; members are resolved at read time
+    list = models.ForeignKey(List, on_delete=models.CASCADE)
+    # no database constraint: with sharding the team lives in another database, see todo.sharding
+    team = models.ForeignKey(Team, on_delete=models.CASCADE, db_constraint=False)
+    shared_on = models.DateTimeField(default=timezone.now)
+
+    objects = models.Manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['list', 'team'], name='unique_list_team'),
+        ]
+        indexes = [
+            models.Index(fields=['team', 'list'], name='listteamshare_team'),
+        ]
+
+    def __str__(self):
+        return "%s with %s" % (self.list_id, self.team_id)
+
+
+class DailyStats(models.Model):
+    # per-user, per-day productivity rollup maintained by todo.stats
+    # no database constraint: with sharding the user lives in another database, see todo.sharding
+    user = models.ForeignKey(User, on_delete=models.CASCADE, db_constraint=False)
+    day = models.DateField()
+    created_count = models.IntegerField(default=0)
+    completed_count = models.IntegerField(default=0)
+    # items completed after their due date
+    overdue_count = models.IntegerField(default=0)
+    # sum of time-to-complete of the items completed on this day
+    completion_seconds = models.BigIntegerField(default=0)
+
+    objects = models.Manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'day'], name='unique_daily_stats'),
+        ]
+
+    @property
+    def average_completion_seconds(self):
+        if not self.completed_count:
+            return None
+        return self.completion_seconds / self.completed_count
+
+    def __str__(self):
+        return "%s: %s" % (str(self.user), self.day)
+
+
+class ChangeLog(models.Model):
+    # append-only log of list and item mutations; the auto-incremented id is
+    # the monotonic sequence number handed to sync clients as their cursor
+    LIST = 'list'
+    ITEM = 'item'
+    UPSERT = 'upsert'
+    DELETE = 'delete'
+
+    # no database constraint: with sharding the user lives in another database, see todo.sharding
+    user = models.ForeignKey(User, on_delete=models.CASCADE, db_constraint=False)
+    kind = models.CharField(max_length=10)
+    object_id = models.BigIntegerField()
+    op = models.CharField(max_length=10)
+    created_on = models.DateTimeField(default=timezone.now)
+
+    objects = models.Manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'id'], name='changelog_user_seq'),
+        ]
+
+    def __str__(self):
+        return "%s %s %s #%s" % (self.id, self.op, self.kind, self.object_id)
+
+
+class AccountDeletion(models.Model):
+    # accounts waiting for `manage.py purge_deleted` to remove their data
+    user = models.OneToOneField(User, on_delete=models.CASCADE)
+    requested_on = models.DateTimeField(default=timezone.now)
+
+    objects = models.Manager()
+
+    def __str__(self):
+        return "%s" % str(self.user)
+
+
+class ReminderPreference(models.Model):
+    # users without a row get the defaults below
+    user = models.OneToOneField(User, on_delete=models.CASCADE)
+    enabled = models.BooleanField(default=True)
+    # remind about items due within this many days
+    days_before = models.PositiveSmallIntegerField(default=1)
+
+    objects = models.Manager()
+
+    def __str__(self):
+        return "%s: %s" % (str(self.user), self.days_before if self.enabled else "off")
+
+
+class SentReminder(models.Model):
+    # one row per reminded item and due date so nobody is reminded twice
+    item = models.ForeignKey(ListItem, on_delete=models.CASCADE)
+    due_date = models.DateField()
+    sent_on = models.DateTimeField(default=timezone.now)
+    # the `manage.py send_reminders` run that claimed the reminder
+    dispatch = models.CharField(max_length=32, db_index=True)
+
+    objects = models.Manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['item', 'due_date'], name='unique_sent_reminder'),
+        ]
+
+    def __str__(self):
+        return "%s: %s" % (self.item_id, self.due_date)
+
+
+class CalendarFeed(models.Model):
+    # the secret token in the user's iCalendar feed url, see todo.ical
+    user = models.OneToOneField(User, on_delete=models.CASCADE)
+    token = models.CharField(max_length=64, unique=True)
+    created_on = models.DateTimeField(default=timezone.now)
+
+    objects = models.Manager()
+
+    def __str__(self):
+        return "%s" % str(self.user)
+
+
+class Job(models.Model):
+    # a long operation queued by the web tier and run by `manage.py run_workers`, see todo.jobs
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+
+    # the secret in the status and result urls, anonymous imports have no user to check
+    key = models.CharField(max_length=64, unique=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
+    kind = models.CharField(max_length=30)
+    status = models.CharField(max_length=10, default=QUEUED)
+    params = models.JSONField(default=dict, blank=True)
+    # uploaded input, e.g. the csv file of an import
+    data = models.BinaryField(null=True, blank=True)
+    progress = models.IntegerField(default=0)
+    total = models.IntegerField(default=0)
+    result = models.BinaryField(null=True, blank=True)
+    result_name = models.CharField(max_length=100, blank=True)
+    result_type = models.CharField(max_length=100, blank=True)
+    error = models.TextField(blank=True)
+    worker = models.CharField(max_length=64, blank=True)
+    created_on = models.DateTimeField(default=timezone.now)
+    started_on = models.DateTimeField(null=True, blank=True)
+    # heartbeat of the running worker, bumped with every progress update
+    updated_on = models.DateTimeField(null=True, blank=True)
+    finished_on = models.DateTimeField(null=True, blank=True)
+
+    objects = models.Manager()
+
+    class Meta:
+        indexes = [
+            # workers claim the oldest queued job
+            models.Index(fields=['status', 'id'], name='job_status_id'),
+        ]
+
+    def __str__(self):
+        return "%s %s: %s" % (self.kind, self.id, self.status)
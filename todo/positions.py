@@ -0,0 +1,56 @@
+# MIT License
+
+# Copyright © 2024 Akarsh Reddy Eathamukkala
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the “Software”), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to
+# do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+
+"""
+Maintenance of the rank keys stored in ListItem.position.
+"""
+
+from todo.models import ListItem
+from todo.ranking import keys_after
+
+# reorders that would produce a longer key rebalance the list first
+POSITION_MAX_LENGTH = ListItem._meta.get_field('position').max_length
+
+
+def last_position(list_id):
+    """Return the greatest rank key of a list, read from the (list, position) index."""
+    return ListItem.objects.filter(list_id=list_id).order_by('-position') \
+        .values_list('position', flat=True).first()
+
+
+def next_positions(list_id, count=1):
+    """Return `count` rank keys for items appended to the end of a list."""
+    return keys_after(last_position(list_id), count)
+
+
+def rebalance(list_id, batch_size=1000):
+    """
+    Give every item of a list a fresh, short rank key keeping the current order.
+
+    Unranked items keep their place in front, ordered by id. Returns the number
+    of items updated.
+    """
+    items = list(ListItem.objects.filter(list_id=list_id).order_by('position', 'id').only('id', 'position'))
+    for item, key in zip(items, keys_after(None, len(items))):
+        item.position = key
+    ListItem.objects.bulk_update(items, ['position'], batch_size=batch_size)
+    return len(items)
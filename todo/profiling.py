@@ -0,0 +1,186 @@
+# MIT License
+
+# Copyright © 2024 Akarsh Reddy Eathamukkala
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the “Software”), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to
+# do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+
+
+"""
+Sampled request profiling with cProfile.
+
+ProfilingMiddleware (smarttodo.middleware) profiles a PROFILE_SAMPLE_RATE fraction of
+the requests, plus every request whose PROFILE_HEADER carries a token from
+make_token(). Each profile is written to PROFILE_DIR as a .prof file named after the
+time and the url. Only the newest PROFILE_KEEP files are kept. Staff can read the
+slowest functions of a profile on the /profiles page, or load the file into pstats or
+snakeviz.
+"""
+
+import cProfile
+import datetime
+import os
+import pstats
+import random
+import re
+
+from django.conf import settings
+from django.core import signing
+
+# the header carrying a profiling token, as found in request.META
+PROFILE_HEADER = 'HTTP_X_PROFILE_TOKEN'
+TOKEN_SALT = 'smarttodo.profiling'
+# seconds a profiling token stays valid
+TOKEN_SECONDS = 3600
+# the names save() gives to profiles, listing only these keeps other files out of reach
+PROFILE_NAME = re.compile(r'^\d{8}T\d{12}-[A-Za-z0-9_]+\.prof$')
+# number of functions shown per profile
+TOP_FUNCTIONS = 40
+
+
+def make_token():
+    """
+    Returns a token that makes requests carrying it in the X-Profile-Token header profiled.
+
+    Returns:
+        str: A signed token, valid for TOKEN_SECONDS.
+    """
+    return signing.dumps('profile', salt=TOKEN_SALT)
+
+
+def valid_token(token):
+    try:
+        return signing.loads(token, salt=TOKEN_SALT, max_age=TOKEN_SECONDS) == 'profile'
+    except signing.BadSignature:
+        return False
+
+
+def wanted(request):
+    """
+    Tells whether a request should be profiled.
+
+    With sampling off and no token header this is two attribute lookups, so the
+    middleware costs nothing measurable on requests that are not profiled.
+
+    Args:
+        request: The HTTP request object.
+
+    Returns:
+        bool: True if the request is sampled or carries a valid token.
+    """
+    rate = settings.PROFILE_SAMPLE_RATE
+    if rate and random.random() < rate:
+        return True
+    token = request.META.get(PROFILE_HEADER)
+    return bool(token) and valid_token(token)
+
+
+def profile_name(path, now=None):
+    """
+    Returns the file name of the profile of a request, which sorts by time.
+
+    Args:
+        path (str): The path of the request.
+        now (datetime): The time of the request, for tests.
+
+    Returns:
+        str: The file name.
+    """
+    now = datetime.datetime.now() if now is None else now
+    slug = re.sub(r'[^A-Za-z0-9]+', '_', path).strip('_')[:80] or 'root'
+    return '%s-%s.prof' % (now.strftime('%Y%m%dT%H%M%S%f'), slug)
+
+
+def profiles():
+    """
+    Returns the names of the stored profiles, newest first.
+
+    Returns:
+        list: The file names.
+    """
+    try:
+        names = os.listdir(settings.PROFILE_DIR)
+    except FileNotFoundError:
+        return []
+    return sorted((name for name in names if PROFILE_NAME.match(name)), reverse=True)
+
+
+def save(profiler, path):
+    """
+    Writes a profile to PROFILE_DIR and removes the oldest ones beyond PROFILE_KEEP.
+
+    Args:
+        profiler (cProfile.Profile): The finished profiler.
+        path (str): The path of the profiled request.
+
+    Returns:
+        str: The file name of the profile.
+    """
+    os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+    name = profile_name(path)
+    profiler.dump_stats(os.path.join(settings.PROFILE_DIR, name))
+    for old in profiles()[settings.PROFILE_KEEP:]:
+        try:
+            os.remove(os.path.join(settings.PROFILE_DIR, old))
+        except FileNotFoundError:
+            pass  # another worker rotated it first
+    return name
+
+
+def profile(get_response, request):
+    """
+    Runs a request under cProfile and saves the profile.
+
+    Args:
+        get_response: The rest of the middleware chain.
+        request: The HTTP request object.
+
+    Returns:
+        HttpResponse: The response of the request.
+    """
+    profiler = cProfile.Profile()
+    response = profiler.runcall(get_response, request)
+    save(profiler, request.path)
+    return response
+
+
+def top_functions(name, limit=TOP_FUNCTIONS):
+    """
+    Returns the functions of a profile with the most cumulative time.
+
+    Args:
+        name (str): The file name of the profile, as returned by profiles().
+        limit (int): The number of functions returned.
+
+    Returns:
+        tuple: The total time of the profile and a list of dicts with the `function`,
+               the number of `calls`, the `own` time and the `cumulative` time in seconds.
+
+    Raises:
+        FileNotFoundError: If there is no such profile.
+    """
+    if not PROFILE_NAME.match(name):
+        raise FileNotFoundError(name)
+    stats = pstats.Stats(os.path.join(settings.PROFILE_DIR, name))
+    rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:limit]
+    return stats.total_tt, [{
+        'function': pstats.func_std_string(function),
+        'calls': calls,
+        'own': own_time,
+        'cumulative': cumulative_time,
+    } for function, (_, calls, own_time, cumulative_time, _) in rows]
@@ -0,0 +1,109 @@
+# MIT License
+
+# Copyright © 2024 Akarsh Reddy Eathamukkala
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the “Software”), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to
+# do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+
+"""
+Chunked removal of soft-deleted lists and deleted accounts.
+
+Django's deletion collector loads every related row into memory before it
+deletes anything. These helpers instead walk the reverse foreign keys
+themselves and remove rows in bounded chunks, children first, with one short
+DELETE statement per chunk so that the SQLite write lock is never held for
+long.
+"""
+
+from django.contrib.auth.models import User
+from django.db import connections, models, router
+
+from todo import sharding, stats
+from todo.models import AccountDeletion, List, ListItem, ListItemArchive
+
+PURGE_CHUNK_SIZE = 1000
+
+
+def _cascading_relations(model):
+    return [rel for rel in model._meta.related_objects
+            if (rel.one_to_many or rel.one_to_one) and rel.on_delete is models.CASCADE]
+
+
+def _delete_rows(model, ids):
+    connection = connections[router.db_for_write(model) or 'default']
+    with connection.cursor() as cursor:
+        cursor.execute('DELETE FROM %s WHERE %s IN (%s)' % (
+            connection.ops.quote_name(model._meta.db_table),
+            connection.ops.quote_name(model._meta.pk.column),
+            ', '.join(['%s'] * len(ids)),
+        ), ids)
+
+
+def purge_rows(model, field_name, values, chunk_size=PURGE_CHUNK_SIZE):
+    """
+    Delete every row of `model` whose `field_name` is in `values`, in chunks.
+
+    Each chunk first purges the rows referencing it, then removes itself with a
+    single DELETE. Returns the number of `model` rows deleted.
+    """
+    deleted = 0
+    lookup = {field_name + '__in': values}
+    while True:
+        ids = list(model.objects.filter(**lookup).values_list('pk', flat=True)[:chunk_size])
+        if not ids:
+            return deleted
+        # children commit chunk by chunk on their own, so an interrupted purge
+        # simply resumes where it stopped the next time it runs
+        for rel in _cascading_relations(model):
+            purge_rows(rel.related_model, rel.field.name, ids, chunk_size)
+        _delete_rows(model, ids)
+        deleted += len(ids)
+
+
+def purge_list(list_id, chunk_size=PURGE_CHUNK_SIZE):
+    """Remove a soft-deleted list, its items and everything else referencing it."""
+    stats.items_removed(ListItem.objects.filter(list_id=list_id))
+    stats.items_removed(ListItemArchive.objects.filter(list_id=list_id))
+    return purge_rows(List, 'id', [list_id], chunk_size)
+
+
+def purge_deleted_lists(chunk_size=PURGE_CHUNK_SIZE):
+    """Purge every soft-deleted list. Returns the number of lists removed."""
+    purged = 0
+    for list_id in list(List.objects.filter(is_deleted=True).values_list('id', flat=True)):
+        purged += purge_list(list_id, chunk_size)
+    return purged
+
+
+def purge_user(user_id, chunk_size=PURGE_CHUNK_SIZE):
+    """Remove all to-do data of a user in chunks, then the account itself."""
+    with sharding.for_user(user_id):
+        for rel in User._meta.related_objects:
+            if rel.related_model._meta.app_label == 'todo' and rel.related_model is not AccountDeletion:
+                if rel.one_to_many or rel.one_to_one:
+                    purge_rows(rel.related_model, rel.field.name, [user_id], chunk_size)
+    # only auth rows are left, the collector handles those cheaply
+    User.objects.filter(id=user_id).delete()
+
+
+def purge_deleted_accounts(chunk_size=PURGE_CHUNK_SIZE):
+    """Purge every account with a pending deletion request. Returns how many were removed."""
+    user_ids = list(AccountDeletion.objects.values_list('user_id', flat=True))
+    for user_id in user_ids:
+        purge_user(user_id, chunk_size)
+    return len(user_ids)
@@ -0,0 +1,102 @@
+# MIT License
+
+# Copyright © 2024 Akarsh Reddy Eathamukkala
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the “Software”), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to
+# do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+
+
+"""
+Recurrence rules of repeating list items.
+
+A rule is one of the shorthands `daily`, `weekly` and `monthly` or a subset of
+RFC 5545 RRULE syntax (FREQ, INTERVAL, BYDAY, BYMONTHDAY, COUNT and UNTIL), e.g.
+`FREQ=WEEKLY;INTERVAL=2;BYDAY=MO,TH`. Occurrences are computed from the item's
+due date, which is the first occurrence of the series.
+"""
+
+import datetime
+
+SHORTHANDS = {
+    'daily': 'FREQ=DAILY',
+    'weekly': 'FREQ=WEEKLY',
+    'monthly': 'FREQ=MONTHLY',
+}
+SUPPORTED_PARTS = ('FREQ', 'INTERVAL', 'BYDAY', 'BYMONTHDAY', 'COUNT', 'UNTIL')
+SUPPORTED_FREQS = ('DAILY', 'WEEKLY', 'MONTHLY', 'YEARLY')
+
+
+def _as_datetime(day):
+    return datetime.datetime.combine(day, datetime.time())
+
+
+def _rule(rule, anchor):
+    # dateutil.rrule is imported on first use, most requests never touch a recurring item
+    from dateutil.rrule import rrulestr
+    return rrulestr(rule, dtstart=_as_datetime(anchor))
+
+
+def normalize(rule):
+    """
+    Validate a recurrence rule and return it in canonical form.
+
+    Args:
+        rule (str): A shorthand or RRULE string; blank means no recurrence.
+
+    Returns:
+        str: The canonical RRULE, or '' for a blank rule.
+
+    Raises:
+        ValueError: If the rule is not supported or does not parse.
+    """
+    rule = (rule or '').strip()
+    if not rule:
+        return ''
+    rule = SHORTHANDS.get(rule.lower(), rule).upper()
+    if rule.startswith('RRULE:'):
+        rule = rule[len('RRULE:'):]
+    parts = {}
+    for part in rule.split(';'):
+        name, sep, value = part.partition('=')
+        if not sep or not value or name not in SUPPORTED_PARTS or name in parts:
+            raise ValueError("unsupported recurrence rule part: %r" % part)
+        parts[name] = value
+    if parts.get('FREQ') not in SUPPORTED_FREQS:
+        raise ValueError("recurrence rule needs FREQ=%s" % '|'.join(SUPPORTED_FREQS))
+    canonical = ';'.join('%s=%s' % (name, parts[name]) for name in SUPPORTED_PARTS if name in parts)
+    # let dateutil reject malformed values such as INTERVAL=x or BYDAY=XX
+    _rule(canonical, datetime.date.today())
+    return canonical
+
+
+def next_occurrence(rule, anchor, after=None):
+    """
+    Return the first occurrence of a series strictly after a date.
+
+    Args:
+        rule (str): A canonical rule as returned by `normalize`.
+        anchor (date): The due date of the first occurrence.
+        after (date): Defaults to `anchor`.
+
+    Returns:
+        date: The next occurrence, or None once the series has ended.
+    """
+    if not rule:
+        return None
+    found = _rule(rule, anchor).after(_as_datetime(after or anchor))
+    return found.date() if found else None
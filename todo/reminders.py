@@ -0,0 +1,140 @@
+# MIT License
+
+# Copyright © 2024 Akarsh Reddy Eathamukkala
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the “Software”), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to
+# do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+
+
+"""
+Due-date reminders, see `manage.py send_reminders`.
+
+Open items due within the reminder window are found through the (is_done, due_date)
+index and streamed ordered by owner, so a run touches only the items it reminds
+about and holds those of one batch of users at a time. A user gets a single email
+per run however their items fall into chunks. Every reminder is claimed in
+SentReminder before its email goes out; the unique (item, due_date) constraint makes
+sure each one is sent at most once, even when runs overlap.
+"""
+
+import datetime
+import uuid
+from itertools import groupby, islice
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import Max
+from django.utils import timezone
+
+from todo.models import ListItem, ReminderPreference, SentReminder
+
+REMINDER_BATCH_SIZE = 500
+# applies to users who never saved their reminder preferences
+DEFAULT_DAYS_BEFORE = ReminderPreference._meta.get_field('days_before').default
+
+
+def due_items(start, end, batch_size=REMINDER_BATCH_SIZE):
+    """
+    Yield (user id, items) pairs of the open items due from `start` to `end`, one owner at a time.
+
+    The items are streamed in chunks of `batch_size`, ordered by owner, so only the items
+    of the owner at hand are kept in memory. Lists without an owner have nobody to remind.
+    """
+    items = ListItem.objects.filter(
+        is_done=False, due_date__gte=start, due_date__lte=end, list__is_deleted=False, list__user_id__isnull=False,
+    ).select_related('list').order_by('list__user_id', 'due_date', 'id')
+    for user_id, owned in groupby(items.iterator(chunk_size=batch_size), key=lambda item: item.list.user_id_id):
+        yield user_id, list(owned)
+
+
+def _message(user, items):
+    lines = ["Hi %s," % user.username, "", "these to-do items are due soon:", ""]
+    lines += ["- %s (%s), due %s" % (item.item_name, item.list.title_text, item.due_date.isoformat())
+              for item in items]
+    return EmailMessage("To-Done: %d item(s) due soon" % len(items), "\n".join(lines),
+                        settings.EMAIL_HOST_USER, [user.email])
+
+
+def _wanted(groups, today):
+    """Return (owner, items) pairs of the (user id, items) groups, keeping the items their owners want a reminder about today."""
+    # users live on the default database, which a shard cannot join
+    owners = User.objects.in_bulk([user_id for user_id, _ in groups])
+    preferences = {p.user_id: p for p in ReminderPreference.objects.filter(user_id__in=owners)}
+    wanted = []
+    for user_id, items in groups:
+        owner = owners.get(user_id)
+        preference = preferences.get(user_id)
+        if owner is None or not owner.is_active or not owner.email:
+            continue
+        if preference is not None and not preference.enabled:
+            continue
+        days_before = preference.days_before if preference is not None else DEFAULT_DAYS_BEFORE
+        items = [item for item in items if (item.due_date - today).days <= days_before]
+        if items:
+            wanted.append((owner, items))
+    return wanted
+
+
+def _send_owners(owners, dispatch, connection):
+    """Claim and email the reminders of a batch of (user, items) pairs, one email per user."""
+    SentReminder.objects.bulk_create(
+        [SentReminder(item=item, due_date=item.due_date, dispatch=dispatch) for _, items in owners for item in items],
+        ignore_conflicts=True)
+    # rows that already existed belong to an earlier or concurrent run
+    claimed = set(SentReminder.objects.filter(
+        dispatch=dispatch, item_id__in=[item.id for _, items in owners for item in items]).values_list('item_id', flat=True))
+    sent = 0
+    for index, (owner, items) in enumerate(owners):
+        items = [item for item in items if item.id in claimed]
+        if not items:
+            continue
+        try:
+            connection.send_messages([_message(owner, items)])
+        except Exception:
+            # release the claims of this and the following users only, the earlier emails went out
+            unsent = [item.id for _, items in owners[index:] for item in items]
+            SentReminder.objects.filter(dispatch=dispatch, item_id__in=unsent).delete()
+            raise
+        sent += len(items)
+    return sent
+
+
+def send_reminders(today=None, batch_size=REMINDER_BATCH_SIZE):
+    """
+    Email every user about their open items due within their reminder window.
+
+    Args:
+        today (date): The first day of the window. Defaults to today.
+        batch_size (int): Number of due items read per query chunk, and of users emailed per batch.
+
+    Returns:
+        int: The number of reminded items.
+    """
+    today = today or timezone.now().date()
+    horizon = ReminderPreference.objects.filter(enabled=True).aggregate(days=Max('days_before'))['days']
+    horizon = max(horizon or 0, DEFAULT_DAYS_BEFORE)
+    groups = due_items(today, today + datetime.timedelta(days=horizon), batch_size)
+    dispatch = uuid.uuid4().hex
+    sent = 0
+    with get_connection() as connection:
+        while True:
+            batch = list(islice(groups, batch_size))
+            if not batch:
+                return sent
+            sent += _send_owners(_wanted(batch, today), dispatch, connection)
@@ -0,0 +1,159 @@
+# MIT License
+
+# Copyright © 2024 Akarsh Reddy Eathamukkala
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the “Software”), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to
+# do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+
+
+"""
+Optional read replica for the read-only views.
+
+With `TODO_REPLICA` set, views decorated with `read_only` read from the 'replica'
+database, e.g. a periodically snapshotted copy of the SQLite file or a PostgreSQL
+standby, while every write still goes to the primary. A user who just wrote reads
+from the primary for `sticky_seconds()` so they always see their own
+changes, and everybody falls back to the primary while the replica lags more than
+`REPLICA_MAX_LAG` seconds behind.
+
+Lag is measured on the change log: the first change the replica is missing tells
+how long ago it stopped catching up. With `TODO_SHARDS` set the change log lives on
+the shards, which have no replica, so the replica is not used.
+"""
+
+import functools
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError
+from django.db.backends.signals import connection_created
+from django.db.models import Max
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.connection import ConnectionDoesNotExist
+
+from todo import sharding
+from todo.models import ChangeLog
+
+REPLICA_ALIAS = 'replica'
+# present while the browser must read from the primary after a write
+STICKY_COOKIE = 'todo_primary'
+LAG_CACHE_KEY = 'replica:lag'
+
+_state = threading.local()
+
+
+def replica_configured():
+    return bool(getattr(settings, 'TODO_REPLICA', None))
+
+
+def lag():
+    """Return how many seconds the replica is behind the primary, cached for REPLICA_LAG_CHECK_SECONDS."""
+    value = cache.get(LAG_CACHE_KEY)
+    if value is not None:
+        return value
+    try:
+        replica_max = ChangeLog.objects.using(REPLICA_ALIAS).aggregate(last=Max('id'))['last'] or 0
+        missing = ChangeLog.objects.using('default').filter(id__gt=replica_max).order_by('id') \
+            .values_list('created_on', flat=True).first()
+        value = 0.0 if missing is None else max((timezone.now() - missing).total_seconds(), 0.0)
+    except (ConnectionDoesNotExist, DatabaseError):
+        # an unreachable or unmigrated replica is as good as infinitely behind
+        value = float('inf')
+    cache.set(LAG_CACHE_KEY, value, settings.REPLICA_LAG_CHECK_SECONDS)
+    return value
+
+
+def use_replica(request):
+    """Return whether this request may read from the replica."""
+    return (replica_configured() and not sharding.shard_count() and STICKY_COOKIE not in request.COOKIES
+            and lag() <= settings.REPLICA_MAX_LAG)
+
+
+def read_only(view):
+    """Let a view that never writes read from the replica when that is safe, see `use_replica`."""
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        previous = getattr(_state, 'active', False)
+        _state.active = use_replica(request)
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            _state.active = previous
+    return wrapper
+
+
+def sticky_seconds():
+    """
+    Return how long a user reads from the primary after a write.
+
+    The replica is used while its measured lag is at most REPLICA_MAX_LAG, and the
+    measurement is cached for REPLICA_LAG_CHECK_SECONDS, so a write can take that
+    long to show up there. A shorter REPLICA_STICKY_SECONDS is raised to match.
+    """
+    return max(settings.REPLICA_STICKY_SECONDS, settings.REPLICA_MAX_LAG + settings.REPLICA_LAG_CHECK_SECONDS)
+
+
+def mark_sticky(response):
+    """Make the browser read from the primary for the next `sticky_seconds()`."""
+    response.set_cookie(STICKY_COOKIE, '1', max_age=sticky_seconds(), httponly=True,
+                        samesite='Lax')
+    return response
+
+
+@receiver(connection_created)
+def read_test_writes(sender, connection, **kwargs):
+    """
+    Let the replica see the uncommitted rows of a test.
+
+    In tests the replica is a second connection to the in-memory test database (its
+    TEST MIRROR), while every test runs in a transaction on the default connection.
+    Reading uncommitted rows makes the replica an up to date copy, as it would be
+    after replication, instead of one that blocks on the test's table locks.
+    """
+    if connection.alias == REPLICA_ALIAS and connection.vendor == 'sqlite' and \
+            connection.creation.is_in_memory_db(connection.settings_dict['NAME']):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA read_uncommitted = 1')
+
+
+class ReplicaRouter:
+    """Database router sending the reads of `read_only` views to the replica."""
+
+    def db_for_read(self, model, **hints):
+        if not getattr(_state, 'active', False):
+            return None
+        if sharding.shard_count() and sharding.is_sharded(model):
+            # the shards have no replica, let the shard router decide
+            return None
+        return REPLICA_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if {obj1._state.db, obj2._state.db} <= {'default', REPLICA_ALIAS}:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # the replica is a copy of the primary and never migrated on its own
+        if db == REPLICA_ALIAS:
+            return False
+        return None
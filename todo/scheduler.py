@@ -0,0 +1,172 @@
+# MIT License
+
+# Copyright © 2024 Akarsh Reddy Eathamukkala
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the “Software”), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to
+# do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+
+
+"""
+Materializes the occurrences of repeating list items, see `manage.py run_scheduler`.
+
+Every repeating item stores the due date of its next occurrence. The scheduler keeps
+those dates in a min-heap, so each tick only looks at the series that are due, and
+learns about new or edited rules by following the change log instead of rescanning
+every rule.
+"""
+
+import heapq
+from collections import defaultdict
+
+from django.db.models import Max
+from django.utils import timezone
+
+from todo import positions, recurrence, sharding, stats, sync
+from todo.models import List, ListItem, ChangeLog
+
+CHANGE_LOG_PAGE_SIZE = 1000
+
+
+def materialize(due, today):
+    """
+    Create the occurrences of due series and move each series to its next occurrence.
+
+    A series only fires if its stored next occurrence still matches the date it was
+    scheduled under; the check and the inserts share a transaction, so a restarted
+    or duplicate scheduler never creates an occurrence twice.
+
+    Args:
+        due (list): (item id, next occurrence) pairs of the series to fire.
+        today (date): Occurrences up to and including this day are created.
+
+    Returns:
+        dict: The new next occurrence (or None) of every series that fired.
+    """
+    series = ListItem.objects.select_related('list').in_bulk([item_id for item_id, _ in due])
+    advanced = {}
+    new_items = defaultdict(list)
+    with sharding.atomic():
+        for item_id, when in due:
+            item = series.get(item_id)
+            if item is None:
+                continue
+            if item.list.is_deleted:
+                ListItem.objects.filter(id=item_id).update(next_occurrence=None)
+                continue
+            dates = []
+            following = when
+            while following is not None and following <= today:
+                dates.append(following)
+                following = recurrence.next_occurrence(item.recurrence, item.due_date, following)
+            claimed = ListItem.objects.filter(id=item_id, next_occurrence=when).update(next_occurrence=following)
+            if not claimed:
+                continue
+            advanced[item_id] = following
+            now = timezone.now()
+            new_items[item.list].extend(ListItem(
+                item_name=item.item_name,
+                item_text="",
+                created_on=now,
+                finished_on=now,
+                due_date=day,
+                tag_color=item.tag_color,
+                list=item.list,
+                is_done=False,
+            ) for day in dates)
+        for todo_list, items in new_items.items():
+            for item, position in zip(items, positions.next_positions(todo_list.id, len(items))):
+                item.position = position
+                item.content_hash = item.compute_content_hash()
+            ListItem.objects.bulk_create(items)
+            List.objects.adjust_counters(todo_list.id, items=len(items))
+            stats.record(todo_list.user_id_id, today, created=len(items))
+            sync.log_item_changes(todo_list.user_id_id, todo_list.id, [item.id for item in items])
+    return advanced
+
+
+class Scheduler:
+    """
+    A min-heap of (next occurrence, item id) over every repeating item.
+
+    Entries are never removed from the middle of the heap: `scheduled` holds the date
+    each series is currently due, and popped entries that disagree with it are stale
+    and skipped.
+    """
+
+    def __init__(self):
+        self.heap = []
+        self.scheduled = {}
+        self.cursor = 0
+
+    def load(self):
+        """Build the heap from the database and start following the change log."""
+        # take the cursor first so rules written while loading are picked up by refresh()
+        self.cursor = ChangeLog.objects.aggregate(seq=Max('id'))['seq'] or 0
+        self.scheduled = dict(ListItem.objects.filter(next_occurrence__isnull=False)
+                              .values_list('id', 'next_occurrence'))
+        self.heap = [(when, item_id) for item_id, when in self.scheduled.items()]
+        heapq.heapify(self.heap)
+
+    def schedule(self, item_id, when):
+        if when is None:
+            self.scheduled.pop(item_id, None)
+        elif self.scheduled.get(item_id) != when:
+            self.scheduled[item_id] = when
+            heapq.heappush(self.heap, (when, item_id))
+
+    def refresh(self):
+        """Reschedule the items changed since the last refresh."""
+        while True:
+            page = list(ChangeLog.objects.filter(id__gt=self.cursor, kind=ChangeLog.ITEM)
+                        .order_by('id').values_list('id', 'object_id')[:CHANGE_LOG_PAGE_SIZE])
+            if not page:
+                return
+            self.cursor = page[-1][0]
+            item_ids = {item_id for _, item_id in page}
+            current = dict(ListItem.objects.filter(id__in=item_ids).values_list('id', 'next_occurrence'))
+            for item_id in item_ids:
+                self.schedule(item_id, current.get(item_id))
+
+    def due(self, today):
+        """Pop the series whose next occurrence is on or before `today`."""
+        fired = []
+        while self.heap and self.heap[0][0] <= today:
+            when, item_id = heapq.heappop(self.heap)
+            if self.scheduled.get(item_id) == when:
+                del self.scheduled[item_id]
+                fired.append((item_id, when))
+        return fired
+
+    def tick(self, today=None):
+        """
+        Fire every due series.
+
+        Returns:
+            int: The number of series that fired.
+        """
+        today = today or timezone.now().date()
+        self.refresh()
+        fired = self.due(today)
+        advanced = materialize(fired, today)
+        for item_id, when in advanced.items():
+            self.schedule(item_id, when)
+        # series another scheduler fired first are rescheduled from what it stored
+        lost = [item_id for item_id, _ in fired if item_id not in advanced]
+        for item_id, when in ListItem.objects.filter(id__in=lost).values_list('id', 'next_occurrence'):
+            self.schedule(item_id, when)
+        return len(advanced)
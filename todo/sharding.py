@@ -0,0 +1,288 @@
+# MIT License
+
+# Copyright © 2024 Akarsh Reddy Eathamukkala
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the “Software”), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to
+# do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+
+
+"""
+Optional sharding of per-user data across several SQLite files.
+
+With `TODO_SHARDS` set, the lists, items, templates and tags of each user, and the
+change log and daily stats their writes append to, live in one of N databases
+picked by a stable hash of the user id, so writes of different users go to
+different files and no longer queue behind one SQLite writer. Auth, sessions and
+the app's other bookkeeping tables (jobs, reminder preferences, ...) stay on the
+default database.
+
+`ShardRouter` picks the database from the user of the current request, which
+`smarttodo.middleware.ShardMiddleware` records, or from the shard an instance was
+loaded from. Code running outside a request, such as management commands, chooses
+a shard with `pinned` or `for_user`. Views touching a list or item by id, which may
+belong to another user who shared it, go to the shard holding it with `for_row`.
+"""
+
+import hashlib
+import threading
+from contextlib import ExitStack, contextmanager
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connections, models, router, transaction
+
+# every shard hands out ids from its own range, so ids stay unique across shards
+# and rows keep them when `manage.py rebalance_shards` moves a user
+SHARD_ID_SPAN = 10 ** 12
+
+# the per-user models, in the order rows have to be copied (parents first)
+SHARDED_MODELS = ['listtags', 'list', 'listitem', 'listitemarchive', 'sharedusers', 'listteamshare',
+                  'sentreminder', 'template', 'templateitem', 'changelog', 'dailystats']
+# how the rows of each sharded model find their user
+OWNER_LOOKUPS = {
+    'listtags': 'user_id',
+    'list': 'user_id',
+    'listitem': 'list__user_id',
+    'listitemarchive': 'list__user_id',
+    'sharedusers': 'list_id__user_id',
+    'listteamshare': 'list__user_id',
+    'sentreminder': 'item__list__user_id',
+    'template': 'user_id',
+    'templateitem': 'template__user_id',
+    'changelog': 'user_id',
+    'dailystats': 'user_id',
+}
+# models whose rows get new ids on the target shard when a user moves: change log ids
+# are sync cursors, so they have to keep growing in the range of the shard they are on
+RENUMBERED_MODELS = ['changelog']
+# rows moved per bulk INSERT by `move_user`
+MOVE_BATCH_SIZE = 1000
+
+_state = threading.local()
+
+
+def shard_count():
+    return getattr(settings, 'TODO_SHARDS', 0)
+
+
+def shard_aliases():
+    """Return the database aliases of all shards, or ['default'] when sharding is off."""
+    if not shard_count():
+        return ['default']
+    return ['shard%d' % index for index in range(shard_count())]
+
+
+def shard_for_user(user_id):
+    """Return the alias of the shard holding a user's data; rows without a user go to the first shard."""
+    if not shard_count():
+        return 'default'
+    if user_id is None:
+        return 'shard0'
+    # not hash(), which is salted per process
+    digest = hashlib.blake2b(str(user_id).encode('ascii'), digest_size=8).digest()
+    return 'shard%d' % (int.from_bytes(digest, 'big') % shard_count())
+
+
+def is_sharded(model):
+    """Return whether a model, or a model instance, is stored on the shards."""
+    return model._meta.app_label == 'todo' and model._meta.model_name in SHARDED_MODELS
+
+
+def current_user():
+    return getattr(_state, 'user_id', None)
+
+
+@contextmanager
+def for_user(user_id):
+    """Route the sharded models to the shard of `user_id` for the duration of the block."""
+    previous = getattr(_state, 'user_id', None)
+    _state.user_id = user_id
+    try:
+        yield shard_for_user(user_id)
+    finally:
+        _state.user_id = previous
+
+
+@contextmanager
+def pinned(alias):
+    """Route the sharded models to the database `alias` for the duration of the block."""
+    previous = getattr(_state, 'alias', None)
+    _state.alias = alias
+    try:
+        yield alias
+    finally:
+        _state.alias = previous
+
+
+def current_alias():
+    """Return the database the sharded models are routed to right now."""
+    return router.db_for_write(apps.get_model('todo', 'ListItem')) or 'default'
+
+
+def shard_of(model, pk):
+    """
+    Return the alias of the shard holding row `pk` of a sharded model, or None if no shard has it.
+
+    The current shard is looked at first, since users mostly touch their own rows, then
+    the shard whose id range `pk` lies in, where rows of other users (e.g. a list shared
+    with the current user) were created, and then the others, for rows moved since.
+    """
+    if not shard_count():
+        return 'default'
+    aliases = shard_aliases()
+    try:
+        index = int(pk) // SHARD_ID_SPAN
+    except (TypeError, ValueError):
+        return None
+    first = [current_alias()] + ([aliases[index]] if 0 <= index < len(aliases) else [])
+    for alias in dict.fromkeys(first + aliases):
+        if model.objects.using(alias).filter(pk=pk).exists():
+            return alias
+    return None
+
+
+@contextmanager
+def for_row(model, pk):
+    """Route the sharded models to the shard holding row `pk` of `model`, which may be another user's."""
+    with pinned(shard_of(model, pk) or current_alias()) as alias:
+        yield alias
+
+
+def in_id_range(pk):
+    """Return whether `pk` lies in the id range of the current shard, see `reserve_id_range`."""
+    if not shard_count():
+        return True
+    return pk // SHARD_ID_SPAN == shard_aliases().index(current_alias())
+
+
+@contextmanager
+def atomic():
+    """
+    Like transaction.atomic(), spanning the default database and the current shard.
+
+    The two transactions commit one after the other, shard first; this is not a
+    two-phase commit. SQLite only takes the write lock of a database once something
+    is written to it, so blocks that write to the shard alone do not queue behind
+    the default database.
+    """
+    alias = current_alias()
+    with ExitStack() as stack:
+        stack.enter_context(transaction.atomic())
+        if alias != 'default':
+            stack.enter_context(transaction.atomic(using=alias))
+        yield
+
+
+class ShardRouter:
+    """Database router sending the sharded models to their user's shard, see the module docstring."""
+
+    def _db_for(self, model, **hints):
+        instance = hints.get('instance')
+        if not is_sharded(model):
+            # e.g. the user of a list; without an answer Django would look on the list's shard
+            if instance is not None and is_sharded(instance):
+                return 'default'
+            return None
+        if instance is not None and instance._state.db and is_sharded(instance):
+            return instance._state.db
+        alias = getattr(_state, 'alias', None)
+        return alias or shard_for_user(current_user())
+
+    def db_for_read(self, model, **hints):
+        return self._db_for(model, **hints)
+
+    def db_for_write(self, model, **hints):
+        return self._db_for(model, **hints)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if is_sharded(obj1) and is_sharded(obj2):
+            return obj1._state.db == obj2._state.db
+        # a sharded row may point at its user on the default database
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == 'default':
+            # the sharded tables stay on default too, empty, so that deleting a user
+            # there finds nothing to cascade to instead of a missing table
+            return True
+        return app_label == 'todo' and model_name in SHARDED_MODELS
+
+
+def reserve_id_range(alias, index):
+    """Make the autoincrement ids of the sharded tables on shard `index` start at index * SHARD_ID_SPAN."""
+    start = index * SHARD_ID_SPAN
+    with connections[alias].cursor() as cursor:
+        for model_name in SHARDED_MODELS:
+            model = apps.get_model('todo', model_name)
+            if not isinstance(model._meta.pk, models.AutoField):
+                continue
+            table = model._meta.db_table
+            cursor.execute('SELECT seq FROM sqlite_sequence WHERE name = %s', [table])
+            row = cursor.fetchone()
+            if row is None:
+                cursor.execute('INSERT INTO sqlite_sequence (name, seq) VALUES (%s, %s)', [table, start])
+            elif row[0] < start:
+                cursor.execute('UPDATE sqlite_sequence SET seq = %s WHERE name = %s', [start, table])
+
+
+def users_on(alias):
+    """Return the ids of the users owning lists, tags or templates on the database `alias`."""
+    user_ids = set()
+    for model_name in ('list', 'listtags', 'template'):
+        model = apps.get_model('todo', model_name)
+        user_ids.update(model.objects.using(alias).values_list('user_id', flat=True).order_by().distinct())
+    return user_ids
+
+
+def move_user(user_id, source, target, batch_size=MOVE_BATCH_SIZE):
+    """
+    Move all rows of a user from one shard to another, keeping their ids (except
+    those of RENUMBERED_MODELS).
+
+    Rows are copied parents first with bulk INSERTs that skip rows already on the
+    target, then removed from the source, so a move that was interrupted can simply
+    be run again.
+
+    Returns:
+        int: The number of rows copied.
+    """
+    copied = 0
+    with transaction.atomic(using=target):
+        for model_name in SHARDED_MODELS:
+            model = apps.get_model('todo', model_name)
+            rows = model.objects.using(source).filter(**{OWNER_LOOKUPS[model_name]: user_id}).order_by('pk')
+            last_pk = None
+            while True:
+                batch = list((rows if last_pk is None else rows.filter(pk__gt=last_pk))[:batch_size])
+                if not batch:
+                    break
+                last_pk = batch[-1].pk
+                if model_name in RENUMBERED_MODELS:
+                    # a move that is run again copies these a second time, which only
+                    # makes sync clients fetch the same objects twice
+                    for row in batch:
+                        row.pk = None
+                model.objects.using(target).bulk_create(batch, ignore_conflicts=True)
+                copied += len(batch)
+    # imported here because todo.purge itself routes through this module
+    from todo import purge
+    # the purge walks the cascading relations, so lists take their items along
+    with pinned(source):
+        for model_name in ('list', 'template', 'listtags', 'changelog', 'dailystats'):
+            purge.purge_rows(apps.get_model('todo', model_name), 'user_id', [user_id], batch_size)
+    return copied
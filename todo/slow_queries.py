@@ -0,0 +1,218 @@
+# MIT License
+
+# Copyright © 2024 Akarsh Reddy Eathamukkala
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the “Software”), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to
+# do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+
+
+"""
+Slow query log with view attribution.
+
+SlowQueryMiddleware (smarttodo.middleware) wraps every database connection with
+watch() for the duration of a request. Statements taking SLOW_QUERY_MS or longer are
+logged as one JSON object per line to the `todo.slow_queries` logger, which settings
+send to a rotating file. Each entry carries the SQL, the types of its parameters (never
+their values), the duration, the url name of the request and the line of todo/views.py
+that ran the statement. `manage.py slow_queries --top` groups the entries by
+normalized statement.
+"""
+
+import collections
+import json
+import logging
+import os
+import re
+import sys
+import time
+
+from django.urls import Resolver404, resolve
+
+logger = logging.getLogger('todo.slow_queries')
+
+VIEWS_FILE = os.path.join('todo', 'views.py')
+TODO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDERS = re.compile(r'\((?:\s*(?:%s|\?)\s*,)*\s*(?:%s|\?)\s*\)')
+_SPACE = re.compile(r'\s+')
+
+
+def normalize(sql):
+    """
+    Returns a statement with its literals and parameter lists folded, so that the runs
+    of one ORM call with different values group together.
+
+    Args:
+        sql (str): The SQL statement.
+
+    Returns:
+        str: The normalized statement.
+    """
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _PLACEHOLDERS.sub('(...)', sql)
+    return _SPACE.sub(' ', sql).strip()
+
+
+def redact(params, many=False):
+    """
+    Describes query parameters without their values.
+
+    Args:
+        params: The parameters of the statement.
+        many (bool): Whether params holds one parameter sequence per execution.
+
+    Returns:
+        The type names of the parameters, or for executemany the number of executions.
+    """
+    if params is None:
+        return []
+    if many:
+        return {'executions': len(params) if hasattr(params, '__len__') else None}
+    if isinstance(params, dict):
+        return {key: type(value).__name__ for key, value in params.items()}
+    return [type(value).__name__ for value in params]
+
+
+def caller():
+    """
+    Returns the innermost frame of todo/views.py on the stack, or else of the todo app.
+
+    Returns:
+        str: 'path:line in function', or None if the statement came from elsewhere.
+    """
+    frame = sys._getframe(1)
+    fallback = None
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.endswith(VIEWS_FILE):
+            return '%s:%d in %s' % (VIEWS_FILE, frame.f_lineno, frame.f_code.co_name)
+        if fallback is None and filename.startswith(TODO_DIR) and filename != __file__:
+            fallback = '%s:%d in %s' % (os.path.relpath(filename, os.path.dirname(TODO_DIR)),
+                                        frame.f_lineno, frame.f_code.co_name)
+        frame = frame.f_back
+    return fallback
+
+
+def url_name(request):
+    """
+    Returns the url name of a request, also for statements run by middleware before the
+    url was resolved.
+
+    Args:
+        request: The HTTP request object, or None.
+
+    Returns:
+        str: The url name, or None.
+    """
+    if request is None:
+        return None
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            return None
+    return match.url_name
+
+
+def watch(threshold_ms, request=None):
+    """
+    Returns an execute wrapper logging the statements slower than a threshold.
+
+    Args:
+        threshold_ms (float): The threshold in milliseconds.
+        request: The HTTP request whose url name the entries carry.
+
+    Returns:
+        function: A wrapper for connection.execute_wrapper().
+    """
+    def wrapper(execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration_ms = (time.perf_counter() - start) * 1000
+            if duration_ms >= threshold_ms:
+                logger.warning(json.dumps({
+                    'time': time.time(),
+                    'database': context['connection'].alias,
+                    'duration_ms': round(duration_ms, 3),
+                    'sql': sql,
+                    'params': redact(params, many),
+                    'url_name': url_name(request),
+                    'caller': caller(),
+                }))
+    return wrapper
+
+
+def read_entries(path):
+    """
+    Yields the entries of a slow query log and of its rotated backups, oldest first.
+
+    Args:
+        path (str): The path of the current log file.
+
+    Yields:
+        dict: The logged entries; lines that are not entries are skipped.
+    """
+    backups = sorted((name for name in os.listdir(os.path.dirname(path) or '.')
+                      if re.fullmatch(re.escape(os.path.basename(path)) + r'\.\d+', name)),
+                     key=lambda name: int(name.rsplit('.', 1)[1]), reverse=True)
+    files = [os.path.join(os.path.dirname(path), name) for name in backups] + [path]
+    for name in files:
+        try:
+            with open(name, encoding='utf-8') as log:
+                for line in log:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    if isinstance(entry, dict) and 'sql' in entry:
+                        yield entry
+        except FileNotFoundError:
+            continue
+
+
+def report(entries, top=20):
+    """
+    Groups slow query entries by normalized statement, costliest first.
+
+    Args:
+        entries: The entries, as yielded by read_entries().
+        top (int): The number of groups returned.
+
+    Returns:
+        list: One dict per statement with its `count`, `total_ms`, `max_ms`, the
+              normalized `sql` and the most frequent `callers` and `url_names`.
+    """
+    groups = {}
+    for entry in entries:
+        sql = normalize(entry['sql'])
+        group = groups.setdefault(sql, {
+            'sql': sql, 'count': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+            'callers': collections.Counter(), 'url_names': collections.Counter(),
+        })
+        group['count'] += 1
+        group['total_ms'] += entry.get('duration_ms', 0)
+        group['max_ms'] = max(group['max_ms'], entry.get('duration_ms', 0))
+        group['callers'][entry.get('caller')] += 1
+        group['url_names'][entry.get('url_name')] += 1
+    return sorted(groups.values(), key=lambda group: group['total_ms'], reverse=True)[:top]
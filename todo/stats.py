@@ -0,0 +1,142 @@
+# MIT License
+
+# Copyright © 2024 Akarsh Reddy Eathamukkala
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the “Software”), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to
+# do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+
+"""
+Incremental maintenance of the DailyStats rollup table.
+
+Every item mutation adds its deltas to the rollup rows it affects, so the
+stats page and API never have to scan ListItem. `manage.py backfill_stats`
+rebuilds the table from the item history.
+"""
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DurationField, ExpressionWrapper, F, Q, Sum
+from django.db.models.functions import TruncDate
+
+from todo import sharding
+from todo.models import DailyStats
+
+
+def _as_date(value):
+    return value.date() if hasattr(value, 'date') else value
+
+
+def record(user_id, day, created=0, completed=0, overdue=0, seconds=0):
+    """Add the given deltas to the rollup row of a user and day."""
+    if user_id is None:
+        return
+    deltas = {
+        'created_count': F('created_count') + created,
+        'completed_count': F('completed_count') + completed,
+        'overdue_count': F('overdue_count') + overdue,
+        'completion_seconds': F('completion_seconds') + seconds,
+    }
+    if DailyStats.objects.filter(user_id=user_id, day=day).update(**deltas):
+        return
+    try:
+        # the savepoint has to be on the database the row goes to, the user's shard
+        with transaction.atomic(using=sharding.current_alias()):
+            DailyStats.objects.create(
+                user_id=user_id, day=day, created_count=created, completed_count=completed,
+                overdue_count=overdue, completion_seconds=seconds)
+    except IntegrityError:
+        # another request created the row first
+        DailyStats.objects.filter(user_id=user_id, day=day).update(**deltas)
+
+
+def completion_deltas(item):
+    """Return (day, is_late, seconds) describing the completion of a done item."""
+    finished_on = item.finished_on
+    seconds = int((finished_on - item.created_on).total_seconds())
+    is_late = item.due_date is not None and finished_on.date() > _as_date(item.due_date)
+    return finished_on.date(), is_late, seconds
+
+
+def item_created(user_id, item):
+    record(user_id, _as_date(item.created_on), created=1)
+    if item.is_done:
+        item_completed(user_id, item)
+
+
+def item_completed(user_id, item, sign=1):
+    day, is_late, seconds = completion_deltas(item)
+    record(user_id, day, completed=sign, overdue=sign * int(is_late), seconds=sign * seconds)
+
+
+def item_removed(user_id, item):
+    record(user_id, _as_date(item.created_on), created=-1)
+    if item.is_done:
+        item_completed(user_id, item, sign=-1)
+
+
+def aggregate(items):
+    """
+    Compute rollup rows for a ListItem or ListItemArchive queryset with two
+    grouped aggregates.
+
+    Returns a dict mapping (user id, day) to unsaved DailyStats instances.
+    """
+    items = items.filter(list__user_id__isnull=False)
+    rows = {}
+
+    def row(user_id, day):
+        key = (user_id, day)
+        if key not in rows:
+            rows[key] = DailyStats(user_id=user_id, day=day)
+        return rows[key]
+
+    created = items.annotate(day=TruncDate('created_on')).values(
+        'list__user_id', 'day').order_by().annotate(n=Count('id'))
+    for entry in created:
+        row(entry['list__user_id'], entry['day']).created_count = entry['n']
+
+    completed = items.filter(is_done=True).annotate(
+        day=TruncDate('finished_on'),
+        took=ExpressionWrapper(F('finished_on') - F('created_on'), output_field=DurationField()),
+    ).values('list__user_id', 'day').order_by().annotate(
+        n=Count('id'),
+        late=Count('id', filter=Q(finished_on__date__gt=F('due_date'))),
+        took_total=Sum('took'),
+    )
+    for entry in completed:
+        stats_row = row(entry['list__user_id'], entry['day'])
+        stats_row.completed_count = entry['n']
+        stats_row.overdue_count = entry['late']
+        if entry['took_total'] is not None:
+            stats_row.completion_seconds = int(entry['took_total'].total_seconds())
+    return rows
+
+
+def items_added(items):
+    """Add the contributions of a whole queryset of new items to the rollups."""
+    for (user_id, day), stats_row in aggregate(items).items():
+        record(user_id, day, created=stats_row.created_count,
+               completed=stats_row.completed_count, overdue=stats_row.overdue_count,
+               seconds=stats_row.completion_seconds)
+
+
+def items_removed(items):
+    """Take the contributions of a whole queryset of items out of the rollups."""
+    for (user_id, day), stats_row in aggregate(items).items():
+        record(user_id, day, created=-stats_row.created_count,
+               completed=-stats_row.completed_count, overdue=-stats_row.overdue_count,
+               seconds=-stats_row.completion_seconds)
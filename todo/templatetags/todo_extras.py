@@ -29,3 +29,18 @@ register = template.Library()
 def addstr(arg1, arg2):
     """concatenate arg1 & arg2"""
     return str(arg1) + str(arg2)
+
+
+@register.filter
+def duration(seconds):
+    """format a number of seconds as e.g. 2d 3h 4m"""
+    if seconds is None:
+        return "-"
+    minutes = int(seconds) // 60
+    days, minutes = divmod(minutes, 24 * 60)
+    hours, minutes = divmod(minutes, 60)
+    if days:
+        return "%dd %dh %dm" % (days, hours, minutes)
+    if hours:
+        return "%dh %dm" % (hours, minutes)
+    return "%dm" % minutes
@@ -0,0 +1,71 @@
+# MIT License
+
+# Copyright © 2024 Akarsh Reddy Eathamukkala
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the “Software”), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to
+# do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+
+
+"""Shared fixtures of the tests that drive the item views with JSON posts."""
+
+import json
+
+from django.contrib.auth.models import User
+from django.test import TestCase, RequestFactory
+from django.utils import timezone
+
+from todo.models import List
+from todo.views import addNewListItem
+
+
+class ListViewTestCase(TestCase):
+    """A user with one list, and helpers to post JSON to the views that change its items."""
+    databases = '__all__'
+    # when the list was created, defaults to now
+    list_created_on = None
+    # the defaults of the items made by `add_item`
+    item_created_on = 1670292391
+    due_date = "2999-01-01"
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.user = User.objects.create_user(
+            username='jacob', email='jacob@…', password='top_secret')
+        created_on = self.list_created_on or timezone.now()
+        self.todo = List.objects.create(
+            title_text="test list",
+            created_on=created_on,
+            updated_on=created_on,
+            user_id_id=self.user.id,
+        )
+
+    def post_json(self, view, params):
+        request = self.factory.post('/todo/', data=params,
+                                    content_type="application/json")
+        request.user = self.user
+        return view(request)
+
+    def add_item(self, name, due_date=None):
+        response = self.post_json(addNewListItem, {
+            'list_id': self.todo.id,
+            'list_item_name': name,
+            'create_on': self.item_created_on,
+            'due_date': due_date or self.due_date,
+            'tag_color': "#f9f9f9",
+        })
+        return json.loads(response.content)['item_id']
@@ -0,0 +1,94 @@
+# MIT License
+
+# Copyright © 2024 Akarsh Reddy Eathamukkala
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the “Software”), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to
+# do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+
+
+import datetime
+
+from django.contrib.admin import helpers
+from django.contrib.auth.models import User
+from django.test import TestCase, Client
+from django.urls import reverse
+from django.utils import timezone
+
+from todo import admin as todo_admin
+from todo.models import DailyStats, List, ListItem, ListItemArchive
+
+
+class TestAdmin(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_superuser(username='staff', password='top_secret')
+        self.client.login(username='staff', password='top_secret')
+        self.list = List.objects.create(title_text='Chores', created_on=timezone.now(), updated_on=timezone.now(),
+                                        user_id=self.user)
+        yesterday = datetime.date.today() - datetime.timedelta(days=1)
+        self.items = [ListItem.objects.create(list=self.list, item_name='Item %d' % i, created_on=timezone.now(),
+                                              finished_on=timezone.now(), due_date=yesterday)
+                      for i in range(3)]
+        List.objects.adjust_counters(self.list.id, items=3)
+
+    def action(self, name, ids):
+        return self.client.post(reverse('admin:todo_listitem_changelist'), {
+            'action': name, helpers.ACTION_CHECKBOX_NAME: ids})
+
+    def test_change_lists_render(self):
+        for name in ('list', 'listitem', 'template', 'templateitem', 'listtags', 'sharedusers', 'sharedlist'):
+            response = self.client.get(reverse('admin:todo_%s_changelist' % name))
+            self.assertEqual(response.status_code, 200, name)
+        response = self.client.get(reverse('admin:todo_listitem_changelist'), {'q': 'Item 1'})
+        self.assertEqual(list(response.context['cl'].result_list), [self.items[1]])
+
+    def test_count_is_capped(self):
+        old_limit = todo_admin.ADMIN_COUNT_LIMIT
+        todo_admin.ADMIN_COUNT_LIMIT = 2
+        try:
+            response = self.client.get(reverse('admin:todo_listitem_changelist'))
+        finally:
+            todo_admin.ADMIN_COUNT_LIMIT = old_limit
+        self.assertEqual(response.context['cl'].result_count, 2)
+
+    def test_mark_done_keeps_counters(self):
+        self.action('mark_done', [self.items[0].id, self.items[1].id])
+        self.assertEqual(ListItem.objects.filter(is_done=True).count(), 2)
+        todo_list = List.objects.get(id=self.list.id)
+        self.assertEqual((todo_list.item_count, todo_list.done_count), (3, 2))
+        day = DailyStats.objects.get(user=self.user, day=datetime.date.today())
+        self.assertEqual((day.created_count, day.completed_count), (0, 2))
+
+    def test_archive_and_purge(self):
+        self.action('mark_done', [self.items[0].id])
+        self.action('archive_selected', [item.id for item in self.items])
+        self.assertEqual(list(ListItemArchive.objects.values_list('id', flat=True)), [self.items[0].id])
+        self.action('purge_items', [self.items[1].id])
+        self.assertEqual(list(ListItem.objects.values_list('id', flat=True)), [self.items[2].id])
+        todo_list = List.objects.get(id=self.list.id)
+        self.assertEqual((todo_list.item_count, todo_list.done_count), (2, 1))
+
+    def test_list_actions(self):
+        url = reverse('admin:todo_list_changelist')
+        self.client.post(url, {'action': 'soft_delete_lists', helpers.ACTION_CHECKBOX_NAME: [self.list.id]})
+        self.assertTrue(List.objects.get(id=self.list.id).is_deleted)
+        self.client.post(url, {'action': 'purge_lists', helpers.ACTION_CHECKBOX_NAME: [self.list.id]})
+        self.assertFalse(List.objects.filter(id=self.list.id).exists())
+        self.assertFalse(ListItem.objects.exists())
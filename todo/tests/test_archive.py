@@ -0,0 +1,122 @@
+# MIT License
+
+# Copyright © 2024 Akarsh Reddy Eathamukkala
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the “Software”), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to
+# do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+
+import datetime
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, Client
+from django.urls import reverse
+from django.utils import timezone
+
+from todo.models import List, ListItem, ListItemArchive, SharedList
+
+
+class TestArchive(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='jacob', email='jacob@…', password='top_secret')
+        self.client.login(username='jacob', password='top_secret')
+        self.todo = List.objects.create(
+            title_text="test list",
+            created_on=timezone.now(),
+            updated_on=timezone.now(),
+            user_id_id=self.user.id,
+            item_count=3,
+            done_count=2,
+        )
+        long_ago = timezone.now() - datetime.timedelta(days=90)
+        self.old_done = self.create_item("old done", True, long_ago)
+        self.new_done = self.create_item("new done", True, timezone.now())
+        self.open_item = self.create_item("open", False, long_ago)
+
+    def create_item(self, name, is_done, finished_on):
+        return ListItem.objects.create(
+            item_name=name,
+            item_text="",
+            created_on=finished_on - datetime.timedelta(days=1),
+            finished_on=finished_on,
+            tag_color="#f9f9f9",
+            due_date=finished_on.date(),
+            list=self.todo,
+            is_done=is_done,
+        )
+
+    def test_archive_done_moves_old_completed_items(self):
+        out = StringIO()
+        call_command('archive_done', '--older-than', '30', '--batch-size', '1', stdout=out)
+        self.assertIn("Archived 1 item", out.getvalue())
+        self.assertFalse(ListItem.objects.filter(id=self.old_done.id).exists())
+        archived = ListItemArchive.objects.get(id=self.old_done.id)
+        self.assertEqual((archived.item_name, archived.list_id), ("old done", self.todo.id))
+        self.assertEqual(set(ListItem.objects.values_list('id', flat=True)),
+                         {self.new_done.id, self.open_item.id})
+
+        # the counters still include archived items, recount agrees
+        call_command('recount', stdout=StringIO())
+        self.todo.refresh_from_db()
+        self.assertEqual((self.todo.item_count, self.todo.done_count), (3, 2))
+
+    def test_archived_items_are_loaded_lazily(self):
+        call_command('archive_done', '--older-than', '30', stdout=StringIO())
+        response = self.client.get(reverse('todo:index'))
+        self.assertNotIn(self.old_done.id, [item.id for item in response.context['latest_list_items']])
+
+        response = self.client.get(reverse('todo:getArchivedItems', args=[self.todo.id]))
+        self.assertEqual([item['id'] for item in response.json()['items']], [self.old_done.id])
+
+    def test_archived_items_are_private(self):
+        call_command('archive_done', '--older-than', '30', stdout=StringIO())
+        User.objects.create_user(username='mallory', password='top_secret')
+        friend = User.objects.create_user(username='anna', password='top_secret')
+        SharedList.objects.create(user=friend, shared_list_id='%d ' % self.todo.id)
+
+        self.client.login(username='mallory', password='top_secret')
+        response = self.client.get(reverse('todo:getArchivedItems', args=[self.todo.id]))
+        self.assertEqual(response.status_code, 404)
+
+        self.client.login(username='anna', password='top_secret')
+        response = self.client.get(reverse('todo:getArchivedItems', args=[self.todo.id]))
+        self.assertEqual([item['id'] for item in response.json()['items']], [self.old_done.id])
+
+    def test_export_can_include_archived_items(self):
+        call_command('archive_done', '--older-than', '30', stdout=StringIO())
+        response = self.client.get(reverse('todo:export_todo_csv'))
+        self.assertNotIn("old done", response.content.decode('utf-8'))
+
+        response = self.client.get(reverse('todo:export_todo_csv'), {'include_archived': 1})
+        content = b''.join(response.streaming_content).decode('utf-8')
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertIn("old done", content)
+        self.assertIn("open", content)
+
+    def test_export_requires_login(self):
+        # lists created by anonymous csv imports have no user
+        List.objects.create(title_text="orphan", created_on=timezone.now(), updated_on=timezone.now())
+        self.client.logout()
+        response = self.client.get(reverse('todo:export_todo_csv'), {'include_archived': 1})
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(hasattr(response, 'streaming_content'))
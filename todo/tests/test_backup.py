@@ -0,0 +1,163 @@
+# MIT License
+
+# Copyright © 2024 Akarsh Reddy Eathamukkala
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the “Software”), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to
+# do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+
+
+import datetime
+import gzip
+import io
+import json
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, Client
+from django.urls import reverse
+from django.utils import timezone
+
+from todo import archive, backup
+from todo.models import (DailyStats, List, ListItem, ListItemArchive, ListTags, ReminderPreference, SharedList,
+                         SharedUsers, Template, TemplateItem)
+
+
+class TestBackup(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='jacob', email='jacob@…', password='top_secret')
+        self.target = User.objects.create_user(
+            username='target', email='target@…', password='top_secret')
+        self.friend = User.objects.create_user(username='friend', password='top_secret')
+        SharedList.objects.create(user=self.friend, shared_list_id="")
+        self.client.login(username='jacob', password='top_secret')
+
+        tag = ListTags.objects.create(user_id=self.user, tag_name="work", created_on=timezone.now())
+        self.todo = List.objects.create(
+            title_text="test list",
+            created_on=timezone.now(),
+            updated_on=timezone.now(),
+            user_id=self.user,
+            tag=tag,
+            is_shared=True,
+            item_count=3,
+            done_count=2,
+        )
+        finished = timezone.now() - datetime.timedelta(days=60)
+        for name, is_done in (("open", False), ("done", True), ("old", True)):
+            ListItem.objects.create(
+                item_name=name,
+                item_text="note of " + name,
+                created_on=finished - datetime.timedelta(days=1),
+                finished_on=finished,
+                tag_color="#ff0000",
+                due_date=datetime.date(2024, 3, 10),
+                list=self.todo,
+                is_done=is_done,
+                position="a%d" % len(name),
+            )
+        archive.archive_items(ListItem.objects.filter(item_name="old"))
+        SharedUsers.objects.create(list_id=self.todo, shared_user="friend nobody")
+        template = Template.objects.create(
+            title_text="weekly", created_on=timezone.now(), updated_on=timezone.now(), user_id=self.user)
+        TemplateItem.objects.create(
+            item_text="review", created_on=timezone.now(), finished_on=timezone.now(),
+            due_date=datetime.date(2024, 3, 10), tag_color="#00ff00", template=template, recurrence="FREQ=WEEKLY")
+        DailyStats.objects.create(user=self.user, day=datetime.date(2024, 3, 10), created_count=3)
+        ReminderPreference.objects.create(user=self.user, days_before=4)
+
+    def download(self):
+        response = self.client.get(reverse('todo:backup_download'))
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content)
+
+    def test_backup_is_gzipped_ndjson(self):
+        lines = gzip.decompress(self.download()).decode('utf-8').splitlines()
+        records = [json.loads(line) for line in lines]
+        self.assertEqual(records[0]['format'], backup.BACKUP_FORMAT)
+        self.assertEqual([r['type'] for r in records[1:]], [
+            'tag', 'list', 'item', 'item', 'archived_item', 'template', 'template_item',
+            'shared_users', 'daily_stats', 'reminder_preference'])
+
+    def test_round_trip(self):
+        data = self.download()
+        self.client.login(username='target', password='top_secret')
+        upload = SimpleUploadedFile('backup.ndjson.gz', data, content_type='application/gzip')
+        response = self.client.post(reverse('todo:backup_restore'), {'backup_file': upload})
+        self.assertEqual(response.status_code, 302)
+
+        restored = List.objects.get(user_id=self.target)
+        self.assertNotEqual(restored.id, self.todo.id)
+        self.assertEqual(restored.tag.tag_name, "work")
+        self.assertEqual(restored.tag.user_id, self.target)
+        self.assertEqual((restored.item_count, restored.done_count, restored.is_shared), (3, 2, True))
+        items = {item.item_name: item for item in ListItem.objects.filter(list=restored)}
+        self.assertEqual(set(items), {"open", "done", "old"})
+        original = ListItem.objects.get(list=self.todo, item_name="done")
+        self.assertEqual(items["done"].finished_on, original.finished_on)
+        self.assertEqual(items["done"].item_text, "note of done")
+        self.assertEqual(items["done"].tag_color, "#ff0000")
+        self.assertEqual(items["done"].position, "a4")
+        self.assertTrue(items["old"].is_done)
+        template_item = TemplateItem.objects.get(template__user_id=self.target)
+        self.assertEqual((template_item.item_text, template_item.recurrence), ("review", "FREQ=WEEKLY"))
+        self.assertEqual(SharedUsers.objects.get(list_id=restored).shared_user, "friend nobody")
+        self.assertEqual(SharedList.objects.get(user=self.friend).shared_list_id, "%d " % restored.id)
+        self.assertEqual(DailyStats.objects.get(user=self.target).created_count, 3)
+        self.assertEqual(ReminderPreference.objects.get(user=self.target).days_before, 4)
+
+    def test_small_chunks(self):
+        counts = backup.restore(self.target, io.BytesIO(b''.join(backup.dump(self.user.id, chunk_size=1))),
+                                chunk_size=1)
+        self.assertEqual(counts['item'] + counts['archived_item'], 3)
+        self.assertEqual(ListItem.objects.filter(list__user_id=self.target).count(), 3)
+
+    def test_broken_backup_restores_nothing(self):
+        data = gzip.compress(b'{"type":"header","format":"to-done-backup","version":1}\n'
+                             b'{"type":"list","id":1,"title_text":"x"}\n'
+                             b'{"type":"item","id":1,"list_id":2}\n')
+        with self.assertRaises(ValueError):
+            backup.restore(self.target, io.BytesIO(data))
+        self.assertFalse(List.objects.filter(user_id=self.target).exists())
+        with self.assertRaises(ValueError):
+            backup.restore(self.target, io.BytesIO(gzip.compress(b'{"type":"list"}\n')))
+        with self.assertRaises(OSError):
+            backup.restore(self.target, io.BytesIO(b'not gzip'))
+
+    def test_malformed_records_name_their_line(self):
+        self.client.login(username='target', password='top_secret')
+        header = b'{"type":"header","format":"to-done-backup","version":1}\n'
+        for line, message in [
+                (b'{"type":"list","title_text":"x","created_on":"2024-01-01T00:00:00",'
+                 b'"updated_on":"2024-01-01T00:00:00"}', 'list record without id'),
+                (b'{"type":"list","id":1,"title_text":"x","created_on":"yesterday",'
+                 b'"updated_on":"2024-01-01T00:00:00"}', 'invalid created_on'),
+                (b'{"type":"daily_stats","day":"someday"}', 'invalid day'),
+                (b'{"type":"daily_stats"}', 'without day'),
+                (b'{"type":"list",', 'not a JSON record'),
+                (b'{"type":"nonsense"}', 'unknown record type')]:
+            upload = SimpleUploadedFile('backup.ndjson.gz', gzip.compress(header + b'\n' + line + b'\n'))
+            response = self.client.post(reverse('todo:backup_restore'), {'backup_file': upload})
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('line 3: ', response.content.decode())
+            self.assertIn(message, response.content.decode())
+        self.assertFalse(List.objects.filter(user_id=self.target).exists())
+        self.assertEqual(ListItemArchive.objects.count(), 1)
@@ -0,0 +1,120 @@
+# MIT License
+
+# Copyright © 2024 Akarsh Reddy Eathamukkala
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the “Software”), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to
+# do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+
+import datetime
+from io import StringIO
+
+from django.core.management import call_command
+from django.utils import timezone
+
+from todo.models import List, ListItem
+from todo.tests.helpers import ListViewTestCase
+from todo.views import markListItem, removeListItem
+
+
+class TestListCounters(ListViewTestCase):
+    def setUp(self):
+        self.old = self.list_created_on = timezone.now() - datetime.timedelta(days=3)
+        super().setUp()
+
+    def overdue_count(self, today=None):
+        return List.objects.with_overdue_counts([self.todo], today=today)[0].overdue_count
+
+    def test_add_item_increments_counters_and_touches_list(self):
+        self.add_item("future item")
+        self.add_item("late item", due_date="2000-01-01")
+        self.todo.refresh_from_db()
+        self.assertEqual(self.todo.item_count, 2)
+        self.assertEqual(self.todo.done_count, 0)
+        self.assertEqual(self.overdue_count(), 1)
+        self.assertGreater(self.todo.updated_on, self.old)
+
+    def test_mark_and_remove_item_update_counters(self):
+        item_id = self.add_item("late item", due_date="2000-01-01")
+        params = {
+            'list_id': self.todo.id,
+            'list_item_name': "late item",
+            'list_item_id': item_id,
+            'is_done': True,
+            'finish_on': 1670292392,
+        }
+        self.post_json(markListItem, params)
+        self.todo.refresh_from_db()
+        self.assertEqual((self.todo.item_count, self.todo.done_count, self.overdue_count()), (1, 1, 0))
+
+        # marking an item done twice must not count it twice
+        self.post_json(markListItem, params)
+        self.todo.refresh_from_db()
+        self.assertEqual(self.todo.done_count, 1)
+
+        self.post_json(removeListItem, {'list_item_id': item_id})
+        self.todo.refresh_from_db()
+        self.assertEqual((self.todo.item_count, self.todo.done_count, self.overdue_count()), (0, 0, 0))
+
+    def test_overdue_count_follows_the_clock(self):
+        today = datetime.date.today()
+        due = today + datetime.timedelta(days=1)
+        item_id = self.add_item("soon", due_date=due.isoformat())
+        self.add_item("later", due_date=due.isoformat())
+        self.assertEqual(self.overdue_count(today), 0)
+        # the due date passes without any write to the items
+        after = due + datetime.timedelta(days=1)
+        self.assertEqual(self.overdue_count(after), 2)
+        self.post_json(markListItem, {
+            'list_id': self.todo.id,
+            'list_item_name': "soon",
+            'list_item_id': item_id,
+            'is_done': True,
+            'finish_on': 1670292392,
+        })
+        self.post_json(removeListItem, {'list_item_id': item_id})
+        self.assertEqual(self.overdue_count(after), 1)
+        self.assertEqual(self.overdue_count(today), 0)
+
+    def test_recount_repairs_drift(self):
+        ListItem.objects.create(
+            item_name="done item",
+            item_text="",
+            created_on=timezone.now(),
+            finished_on=timezone.now(),
+            tag_color="#f9f9f9",
+            due_date=datetime.date(2000, 1, 1),
+            list=self.todo,
+            is_done=True,
+        )
+        ListItem.objects.create(
+            item_name="late item",
+            item_text="",
+            created_on=timezone.now(),
+            finished_on=timezone.now(),
+            tag_color="#f9f9f9",
+            due_date=datetime.date(2000, 1, 1),
+            list=self.todo,
+            is_done=False,
+        )
+        out = StringIO()
+        call_command('recount', stdout=out)
+        self.todo.refresh_from_db()
+        self.assertEqual((self.todo.item_count, self.todo.done_count), (2, 1))
+        self.assertIn("1 list", out.getvalue())
+        # recounting does not count as activity on the list
+        self.assertEqual(self.todo.updated_on, self.old)
@@ -13,6 +13,8 @@ from todo.models import List, ListItem, Template, TemplateItem, ListTags, Shared
 
 
 class ExportTodoTestCase(TestCase):
+    databases = '__all__'
+
     def setUp(self):
         # Define the export URL using 'export_todo_csv' view name
         # Create and log in a test user
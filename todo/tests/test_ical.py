@@ -0,0 +1,107 @@
+# MIT License
+
+# Copyright © 2024 Akarsh Reddy Eathamukkala
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the “Software”), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to
+# do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+
+
+import datetime
+
+from django.contrib.auth.models import User
+from django.db import connections
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from todo import ical, sharding, sync
+from todo.models import List, ListItem, CalendarFeed
+
+
+class TestCalendarFeed(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='jacob', email='jacob@…', password='top_secret')
+        self.client.login(username='jacob', password='top_secret')
+        self.todo = List.objects.create(
+            title_text="test list",
+            created_on=timezone.now(),
+            updated_on=timezone.now(),
+            user_id_id=self.user.id,
+        )
+        self.client.post(reverse('todo:calendar_token'))
+        self.url = reverse('todo:calendar_feed', args=[CalendarFeed.objects.get(user=self.user).token])
+        self.create_item("pay rent, water", False)
+        self.create_item("already done", True)
+
+    def create_item(self, name, is_done):
+        item = ListItem.objects.create(
+            item_name=name,
+            item_text="",
+            created_on=timezone.now(),
+            finished_on=timezone.now(),
+            tag_color="#f9f9f9",
+            due_date=datetime.date(2024, 3, 10),
+            list=self.todo,
+            is_done=is_done,
+        )
+        sync.log_item_changes(self.user.id, self.todo.id, [item.id])
+        return item
+
+    def test_feed_streams_open_items(self):
+        client = Client()
+        response = client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/calendar; charset=utf-8')
+        body = b''.join(response.streaming_content).decode('utf-8')
+        self.assertTrue(body.startswith('BEGIN:VCALENDAR\r\n'))
+        self.assertIn('SUMMARY:pay rent\\, water\r\n', body)
+        self.assertIn('DTSTART;VALUE=DATE:20240310\r\n', body)
+        self.assertNotIn('already done', body)
+        self.assertEqual(body.count('BEGIN:VEVENT'), 1)
+
+    def test_unchanged_feed_is_not_modified(self):
+        client = Client()
+        first = client.get(self.url)
+        with CaptureQueriesContext(connections[sharding.shard_for_user(self.user.id)]) as queries:
+            second = client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 304)
+        self.assertFalse([q for q in queries.captured_queries if 'todo_listitem' in q['sql']])
+        self.assertEqual(client.get(self.url, HTTP_IF_MODIFIED_SINCE=first['Last-Modified']).status_code, 304)
+
+        self.create_item("new item", False)
+        third = client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(third.status_code, 200)
+        self.assertNotEqual(third['ETag'], first['ETag'])
+
+    def test_token_rotation(self):
+        old_url = self.url
+        self.client.post(reverse('todo:calendar_token'))
+        self.assertEqual(Client().get(old_url).status_code, 404)
+
+    def test_fold(self):
+        line = 'SUMMARY:' + 'é' * 100
+        folded = ical.fold(line)
+        parts = folded[:-2].split('\r\n')
+        self.assertTrue(all(len(part.encode('utf-8')) <= ical.LINE_LIMIT for part in parts))
+        self.assertEqual(''.join(part[1:] if i else part for i, part in enumerate(parts)), line)
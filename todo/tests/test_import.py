@@ -4,12 +4,20 @@ from django.utils import timezone
 import csv
 from io import StringIO
 from django.test import TestCase
-from todo.models import List, ListItem
+from todo import csv_import, sharding
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth.models import User
+from todo.models import List, ListItem, item_content_hash
 import datetime
 
 class ImportTodoCSVTestCase(TestCase):
+    databases = '__all__'
+
     def setUp(self):
         self.url = reverse('todo:import_todo_csv')
+        self.user = User.objects.create_user(username='jacob', password='top_secret')
+        self.client.force_login(self.user)
 
     # Utility function to generate CSV files for testing
     def generate_csv_file(self, rows):
@@ -129,4 +137,149 @@ class ImportTodoCSVTestCase(TestCase):
         ])
         response = self.client.post(self.url, {'csv_file': csv_file})
         self.assertTrue(ListItem.objects.filter(item_name="Single Item").exists())
-        
\ No newline at end of file
+        
+
+class ImportValidationTestCase(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        self.url = reverse('todo:import_todo_csv')
+        self.user = User.objects.create_user(username='jacob', password='top_secret')
+        self.client.force_login(self.user)
+        self.rows = [
+            ['List', 'Good', 'Text', 'true', '2024-01-01', '2024-02-01'],
+            ['List', 'Short row'],
+            ['List', 'Bad dates', 'Text', 'false', 'yesterday', ''],
+            ['', 'No list', 'Text', 'false', '2024-01-01 10:30:00', '2024-02-01T00:00:00'],
+            ['List', 'Good too', 'Text', 'false', '2024-01-01 10:30:00.250000', '2024-02-01'],
+        ]
+
+    def csv_lines(self, rows):
+        file = StringIO()
+        writer = csv.writer(file)
+        writer.writerow(['List Title', 'Item Name', 'Item Text', 'Is Done', 'Created On', 'Due Date'])
+        writer.writerows(rows)
+        return file.getvalue().splitlines()
+
+    def test_dry_run_reports_every_error(self):
+        upload = SimpleUploadedFile("test.csv", "\n".join(self.csv_lines(self.rows)).encode('utf-8'))
+        response = self.client.post(self.url, {'csv_file': upload, 'dry_run': '1'})
+        report = response.json()
+        self.assertEqual(report['rows'], 5)
+        self.assertFalse(report['valid'])
+        self.assertEqual([(e['row'], e['column']) for e in report['errors']], [
+            (3, None), (4, 'Created On'), (4, 'Due Date'), (5, 'List Title')])
+        self.assertEqual(ListItem.objects.count(), 0)
+
+    def test_invalid_file_imports_nothing(self):
+        upload = SimpleUploadedFile("test.csv", "\n".join(self.csv_lines(self.rows)).encode('utf-8'))
+        response = self.client.post(self.url, {'csv_file': upload})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(ListItem.objects.count(), 0)
+
+    def test_parallel_validation_matches_serial(self):
+        rows = self.rows * 5
+        serial = csv_import.validate(self.csv_lines(rows))
+        parallel = csv_import.validate(self.csv_lines(rows), parallel_threshold=1, chunk_rows=4, max_workers=2)
+        self.assertEqual(parallel.rows, serial.rows)
+        self.assertEqual(parallel.errors, serial.errors)
+        self.assertEqual(len(serial.rows), 10)
+        self.assertEqual(serial.errors[-1], (25, 'List Title', 'List Title is required'))
+
+    def test_parse_timestamp(self):
+        self.assertEqual(csv_import.parse_timestamp('2024-02-29'), datetime.datetime(2024, 2, 29))
+        self.assertEqual(csv_import.parse_timestamp('2024-02-29 08:15:00'), datetime.datetime(2024, 2, 29, 8, 15))
+        with self.assertRaises(ValueError):
+            csv_import.parse_timestamp('2023-02-29')
+
+
+class IdempotentImportTestCase(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        self.url = reverse('todo:import_todo_csv')
+        self.user = User.objects.create_user(username='jacob', password='top_secret')
+        self.client.force_login(self.user)
+        self.rows = [
+            ['Reimport', 'First', 'Text one', 'false', '2024-01-01', '2024-02-01'],
+            ['Reimport', 'Second', 'Text two', 'true', '2024-01-02', '2024-03-01'],
+        ]
+
+    def upload(self, rows):
+        file = StringIO()
+        writer = csv.writer(file)
+        writer.writerow(['List Title', 'Item Name', 'Item Text', 'Is Done', 'Created On', 'Due Date'])
+        writer.writerows(rows)
+        return self.client.post(self.url, {'csv_file': SimpleUploadedFile("test.csv", file.getvalue().encode('utf-8'))})
+
+    def test_reimport_writes_nothing(self):
+        self.upload(self.rows)
+        self.assertEqual(ListItem.objects.count(), 2)
+        with CaptureQueriesContext(connections[sharding.shard_for_user(self.user.id)]) as queries:
+            self.upload(self.rows)
+        writes = [q['sql'] for q in queries.captured_queries if q['sql'].startswith(('INSERT', 'UPDATE'))]
+        self.assertEqual(writes, [])
+        self.assertEqual(ListItem.objects.count(), 2)
+        self.assertEqual(List.objects.get(title_text='Reimport').item_count, 2)
+
+    def test_changed_rows_update_in_place(self):
+        self.upload(self.rows)
+        first = ListItem.objects.get(item_name='First')
+        changed = [['Reimport', 'First', 'New text', 'true', '2024-01-01', '2024-02-01'], self.rows[1],
+                   ['Reimport', 'Third', 'Text three', 'false', '2024-01-03', '2024-03-01']]
+        counts = csv_import.import_rows(csv_import.validate(
+            ['List Title,Item Name,Item Text,Is Done,Created On,Due Date'] + [','.join(row) for row in changed]).rows, self.user.id)
+        self.assertEqual(counts, {'created': 1, 'updated': 1, 'unchanged': 1})
+        first.refresh_from_db()
+        self.assertEqual((first.item_text, first.is_done), ('New text', True))
+        todo_list = List.objects.get(title_text='Reimport')
+        self.assertEqual((todo_list.item_count, todo_list.done_count), (3, 2))
+
+    def test_users_importing_the_same_list_title_keep_their_own_lists(self):
+        self.upload(self.rows)
+        other = User.objects.create_user(username='mallory', password='top_secret')
+        self.client.force_login(other)
+        self.upload([['Reimport', 'First', 'Hacked', 'true', '2024-01-01', '2024-02-01'],
+                     ['Reimport', 'Beer', 'Text', 'false', '2024-01-03', '2024-03-01']])
+        with sharding.for_user(self.user.id):
+            mine = List.objects.get(title_text='Reimport', user_id=self.user)
+            self.assertEqual(sorted(mine.listitem_set.values_list('item_name', 'item_text', 'is_done')),
+                             [('First', 'Text one', False), ('Second', 'Text two', True)])
+        with sharding.for_user(other.id):
+            theirs = List.objects.get(title_text='Reimport', user_id=other)
+            self.assertEqual(sorted(theirs.listitem_set.values_list('item_name', 'item_text', 'is_done')),
+                             [('Beer', 'Text', False), ('First', 'Hacked', True)])
+
+    def test_duplicate_rows_in_file_count_once(self):
+        self.upload(self.rows + self.rows)
+        self.assertEqual(ListItem.objects.count(), 2)
+
+    def test_conflicting_rows_in_file_are_rejected(self):
+        changed = ['Reimport', 'First', 'Other text', 'false', '2024-01-01', '2024-02-01']
+        report = csv_import.validate(['List Title,Item Name,Item Text,Is Done,Created On,Due Date'] +
+                                     [','.join(row) for row in self.rows + [changed]])
+        self.assertEqual(report.errors, [(4, None, 'same item as row 2 with another Item Text or Is Done')])
+        self.upload(self.rows + [changed])
+        self.assertEqual(ListItem.objects.count(), 0)
+
+    def test_save_fills_content_hash(self):
+        item = ListItem.objects.create(list=List.objects.create(
+            title_text='Saved', user_id=self.user, created_on=timezone.now(), updated_on=timezone.now()), item_name='Item', finished_on=timezone.now(),
+                                       created_on=datetime.datetime(2024, 1, 1), due_date=datetime.date(2024, 2, 1))
+        self.assertEqual(item.content_hash, item_content_hash('Saved', 'Item', datetime.datetime(2024, 1, 1),
+                                                              datetime.date(2024, 2, 1)))
+        self.upload([['Saved', 'Item', '', 'false', '2024-01-01', '2024-02-01']])
+        self.assertEqual(ListItem.objects.count(), 1)
+
+    def test_save_keeps_content_hash_without_loading_the_list(self):
+        self.upload(self.rows)
+        item = ListItem.objects.get(item_name='First')
+        content_hash = item.content_hash
+        item.item_text = 'Edited'
+        with self.assertNumQueries(1, using=sharding.shard_for_user(self.user.id)):
+            item.save()
+        item.item_name = 'Renamed'
+        item.save()
+        self.assertNotEqual(item.content_hash, content_hash)
+        self.assertEqual(item.content_hash, item_content_hash('Reimport', 'Renamed', datetime.datetime(2024, 1, 1),
+                                                              datetime.date(2024, 2, 1)))
@@ -0,0 +1,115 @@
+# MIT License
+
+# Copyright © 2024 Akarsh Reddy Eathamukkala
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the “Software”), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to
+# do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+
+
+import datetime
+import json
+
+from django.contrib.auth.models import User
+from django.test import TestCase, Client
+from django.urls import reverse
+from django.utils import timezone
+
+from todo.models import List, ListItem, ListTags
+
+
+class TestItemQuery(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='jacob', email='jacob@…', password='top_secret')
+        self.client.login(username='jacob', password='top_secret')
+        self.tag = ListTags.objects.create(user_id=self.user, tag_name="work", created_on=timezone.now())
+        self.work = self.create_list("work", self.user, self.tag)
+        self.home = self.create_list("home", self.user)
+        self.today = datetime.date(2024, 3, 10)
+        self.items = [
+            self.create_item("Alpha", self.work, 0),
+            self.create_item("beta", self.work, 2, is_done=True),
+            self.create_item("gamma", self.home, 1, tag_color="#ff0000"),
+            self.create_item("Alpine", self.home, 9),
+            self.create_item("delta", self.work, 1),
+        ]
+        other = User.objects.create_user(username='other', password='top_secret')
+        self.create_item("Alpha", self.create_list("other", other), 0)
+
+    def create_list(self, title, user, tag=None):
+        return List.objects.create(
+            title_text=title,
+            created_on=timezone.now(),
+            updated_on=timezone.now(),
+            user_id=user,
+            tag=tag,
+        )
+
+    def create_item(self, name, todo_list, days, is_done=False, tag_color="#f9f9f9"):
+        return ListItem.objects.create(
+            item_name=name,
+            item_text="",
+            created_on=timezone.now(),
+            finished_on=timezone.now(),
+            tag_color=tag_color,
+            due_date=self.today + datetime.timedelta(days=days),
+            list=todo_list,
+            is_done=is_done,
+        )
+
+    def query(self, **params):
+        response = self.client.get(reverse('todo:query_items'), params)
+        return response.status_code, json.loads(response.content)
+
+    def names(self, **params):
+        return [item['name'] for item in self.query(**params)[1]['items']]
+
+    def test_filters(self):
+        week = {'due_after': '2024-03-10', 'due_before': '2024-03-16'}
+        self.assertEqual(self.names(done='false', **week), ['Alpha', 'gamma', 'delta'])
+        self.assertEqual(self.names(done='true'), ['beta'])
+        self.assertEqual(self.names(tag='work', done='false'), ['Alpha', 'delta'])
+        self.assertEqual(self.names(color='#ff0000'), ['gamma'])
+        self.assertEqual(self.names(list=self.home.id), ['gamma', 'Alpine'])
+        self.assertEqual(self.names(prefix='alp'), ['Alpha', 'Alpine'])
+
+    def test_sort_and_keyset_pages(self):
+        self.assertEqual(self.names(sort='-due'), ['Alpine', 'beta', 'delta', 'gamma', 'Alpha'])
+        seen = []
+        cursor = None
+        while True:
+            params = {'sort': 'name', 'limit': 2}
+            if cursor:
+                params['cursor'] = cursor
+            status, body = self.query(**params)
+            self.assertEqual(status, 200)
+            seen += [item['name'] for item in body['items']]
+            cursor = body['next_cursor']
+            if cursor is None:
+                break
+        self.assertEqual(seen, ['Alpha', 'Alpine', 'beta', 'delta', 'gamma'])
+
+    def test_invalid_parameters(self):
+        for params in ({'done': 'maybe'}, {'due_after': '2024-13-40'}, {'sort': 'color'},
+                       {'cursor': 'not a cursor'}, {'list': 'x'}):
+            self.assertEqual(self.query(**params)[0], 400)
+        self.client.logout()
+        self.assertEqual(self.query()[0], 401)
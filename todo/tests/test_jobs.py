@@ -0,0 +1,148 @@
+# MIT License
+
+# Copyright © 2024 Akarsh Reddy Eathamukkala
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the “Software”), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to
+# do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+
+
+import json
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from todo import jobs
+from todo.models import Job, List, ListItem, Template, TemplateItem
+
+CSV = ("List Title,Item Name,Item Text,Is Done,Created On,Due Date\n"
+       "Jobs,First,Text,false,2024-01-01,2024-02-01\n"
+       "Jobs,Second,Text,true,2024-01-02,2024-02-01\n")
+
+
+@override_settings(BACKGROUND_JOBS=True)
+class TestJobs(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username='jacob', password='top_secret')
+        self.client.login(username='jacob', password='top_secret')
+
+    def status(self, key):
+        return self.client.get(reverse('todo:job_status', args=[key])).json()
+
+    def test_import_is_queued_and_run_by_a_worker(self):
+        response = self.client.post(reverse('todo:import_todo_csv'),
+                                    {'csv_file': SimpleUploadedFile('test.csv', CSV.encode('utf-8'))},
+                                    HTTP_ACCEPT='application/json')
+        self.assertEqual(response.status_code, 202)
+        key = response.json()['job']
+        self.assertEqual(self.status(key)['status'], Job.QUEUED)
+        self.assertEqual(ListItem.objects.count(), 0)
+
+        self.assertEqual(jobs.work('test', once=True), 1)
+        status = self.status(key)
+        self.assertEqual((status['status'], status['progress'], status['total']), (Job.DONE, 2, 2))
+        self.assertEqual(ListItem.objects.filter(list__title_text='Jobs').count(), 2)
+        result = json.loads(b''.join(self.client.get(status['result_url'])))
+        self.assertEqual((result['created'], result['rows']), (2, 2))
+
+    def test_export_result_is_downloadable(self):
+        todo = List.objects.create(title_text='Mine', created_on=timezone.now(), updated_on=timezone.now(),
+                                   user_id=self.user)
+        ListItem.objects.create(list=todo, item_name='Exported', created_on=timezone.now(),
+                                finished_on=timezone.now(), due_date=timezone.now().date())
+        key = self.client.get(reverse('todo:export_todo_csv'), HTTP_ACCEPT='application/json').json()['job']
+        self.assertEqual(self.client.get(reverse('todo:job_result', args=[key])).status_code, 404)
+        call_command('run_workers', '--once', stdout=open('/dev/null', 'w'))
+        response = self.client.get(self.status(key)['result_url'])
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertIn('Mine,Exported', response.content.decode('utf-8'))
+
+    def test_template_and_delete(self):
+        template = Template.objects.create(title_text='Weekly', created_on=timezone.now(),
+                                           updated_on=timezone.now(), user_id=self.user)
+        TemplateItem.objects.create(item_text='Step', created_on=timezone.now(), template=template,
+                                    finished_on=timezone.now(), due_date=timezone.now().date(), tag_color='red')
+        self.client.post(reverse('todo:todo_from_template'), {'template': template.id})
+        jobs.work('test', once=True)
+        todo = List.objects.get(title_text='Weekly')
+        self.assertEqual(todo.item_count, 1)
+
+        self.client.post(reverse('todo:delete_todo'), {'todo': todo.id})
+        self.assertTrue(List.objects.filter(id=todo.id, is_deleted=True).exists())
+        jobs.work('test', once=True)
+        self.assertFalse(List.objects.filter(id=todo.id).exists())
+
+    def test_failed_template_copy_leaves_nothing_behind(self):
+        template = Template.objects.create(title_text='Weekly', created_on=timezone.now(),
+                                           updated_on=timezone.now(), user_id=self.user)
+        TemplateItem.objects.create(item_text='Step', created_on=timezone.now(), template=template,
+                                    finished_on=timezone.now(), due_date=timezone.now().date(), tag_color='red')
+        with mock.patch('todo.sync.log_item_changes', side_effect=OSError):
+            with self.assertRaises(OSError):
+                jobs.instantiate_template(template.id, self.user.id)
+        self.assertFalse(List.objects.filter(title_text='Weekly').exists())
+        self.assertFalse(ListItem.objects.exists())
+
+    def test_form_post_redirects_to_the_job_page(self):
+        response = self.client.post(reverse('todo:import_todo_csv'),
+                                    {'csv_file': SimpleUploadedFile('test.csv', CSV.encode('utf-8'))})
+        job = Job.objects.get()
+        self.assertRedirects(response, reverse('todo:job_page', args=[job.key]))
+        self.assertContains(self.client.get(response.url), reverse('todo:job_status', args=[job.key]))
+
+    def test_jobs_are_private(self):
+        job = jobs.enqueue('export_csv', self.user.id)
+        jobs.work('test', once=True)
+        other = Client()
+        other.force_login(User.objects.create_user(username='mallory', password='top_secret'))
+        for name in ('job_status', 'job_page', 'job_result'):
+            self.assertEqual(self.client.get(reverse('todo:' + name, args=[job.key])).status_code, 200)
+            self.assertEqual(other.get(reverse('todo:' + name, args=[job.key])).status_code, 404)
+            self.assertEqual(Client().get(reverse('todo:' + name, args=[job.key])).status_code, 404)
+
+    def test_claim_is_exclusive(self):
+        job = jobs.enqueue('export_csv', self.user.id)
+        self.assertEqual(jobs.claim('one').id, job.id)
+        self.assertIsNone(jobs.claim('two'))
+        self.assertEqual(Job.objects.get(id=job.id).worker, 'one')
+
+    def test_failure_and_requeue(self):
+        job = jobs.enqueue('import_csv', None, data=b'List Title,Item Name\nJobs')
+        self.assertEqual(jobs.run(jobs.claim('one')), Job.FAILED)
+        self.assertIn('ValueError', Job.objects.get(id=job.id).error)
+
+        stale = jobs.enqueue('export_csv', self.user.id)
+        jobs.claim('crashed')
+        Job.objects.filter(id=stale.id).update(updated_on=timezone.now() - timezone.timedelta(hours=1))
+        self.assertEqual(jobs.requeue_stale(60), 1)
+        self.assertEqual(Job.objects.get(id=stale.id).status, Job.QUEUED)
+
+    def test_workers_reclaim_jobs_of_dead_workers(self):
+        stale = jobs.enqueue('export_csv', self.user.id)
+        jobs.claim('crashed')
+        Job.objects.filter(id=stale.id).update(updated_on=timezone.now() - timezone.timedelta(hours=1))
+        self.assertEqual(jobs.work('test', once=True), 0)
+        self.assertEqual(jobs.work('test', once=True, requeue_after=60), 1)
+        self.assertEqual(Job.objects.get(id=stale.id).status, Job.DONE)
@@ -0,0 +1,162 @@
+# MIT License
+
+# Copyright © 2024 Akarsh Reddy Eathamukkala
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the “Software”), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to
+# do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+
+
+import json
+import random
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connections
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from todo import positions, sharding
+from todo.models import List, ListItem
+from todo.ranking import key_between, keys_after
+
+
+class TestRanking(TestCase):
+    databases = '__all__'
+
+    def test_key_between_sorts_between_bounds(self):
+        keys = keys_after(None, 3)
+        self.assertEqual(keys, sorted(keys))
+        middle = key_between(keys[0], keys[1])
+        self.assertTrue(keys[0] < middle < keys[1])
+        self.assertTrue(key_between(None, keys[0]) < keys[0])
+
+    def test_random_inserts_keep_order(self):
+        rng = random.Random(7)
+        keys = []
+        for _ in range(500):
+            index = rng.randint(0, len(keys))
+            before = keys[index - 1] if index else None
+            after = keys[index] if index < len(keys) else None
+            keys.insert(index, key_between(before, after))
+        self.assertEqual(keys, sorted(keys))
+        self.assertEqual(len(set(keys)), len(keys))
+
+    def test_rejects_bounds_out_of_order(self):
+        with self.assertRaises(ValueError):
+            key_between('a1', 'a0')
+
+
+class TestReorder(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='jacob', email='jacob@…', password='top_secret')
+        self.client.login(username='jacob', password='top_secret')
+        self.todo = List.objects.create(
+            title_text="test list",
+            created_on=timezone.now(),
+            updated_on=timezone.now(),
+            user_id_id=self.user.id,
+        )
+        self.items = [self.create_item("item %d" % i, position)
+                      for i, position in enumerate(positions.next_positions(self.todo.id, 4))]
+
+    def create_item(self, name, position):
+        return ListItem.objects.create(
+            item_name=name,
+            item_text="",
+            created_on=timezone.now(),
+            finished_on=timezone.now(),
+            tag_color="#f9f9f9",
+            due_date=timezone.now().date(),
+            list=self.todo,
+            position=position,
+        )
+
+    def order(self):
+        return list(ListItem.objects.filter(list=self.todo).order_by('position', 'id').values_list('id', flat=True))
+
+    def reorder(self, item, prev, next):
+        return self.client.post(reverse('todo:reorderListItem'), json.dumps({
+            'list_item_id': item.id,
+            'prev_id': prev.id if prev else None,
+            'next_id': next.id if next else None,
+        }), content_type='application/json')
+
+    def test_move_updates_only_the_moved_row(self):
+        first, second, third, fourth = self.items
+        with CaptureQueriesContext(connections[sharding.shard_for_user(self.user.id)]) as queries:
+            response = self.reorder(fourth, first, second)
+        self.assertEqual(response.status_code, 200)
+        updates = [q['sql'] for q in queries.captured_queries
+                   if q['sql'].startswith('UPDATE "todo_listitem"')]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(self.order(), [first.id, fourth.id, second.id, third.id])
+        self.assertEqual(json.loads(response.content)['version'], fourth.version + 1)
+
+    def test_move_to_either_end(self):
+        first, second, third, fourth = self.items
+        self.reorder(first, fourth, None)
+        self.reorder(third, None, second)
+        self.assertEqual(self.order(), [third.id, second.id, fourth.id, first.id])
+
+    def test_unranked_neighbours_trigger_rebalance(self):
+        first, second, third, fourth = self.items
+        ListItem.objects.filter(list=self.todo).update(position='')
+        self.reorder(first, third, fourth)
+        self.assertEqual(self.order(), [second.id, third.id, first.id, fourth.id])
+        self.assertNotIn('', ListItem.objects.values_list('position', flat=True))
+
+    def test_swapped_neighbours_are_a_conflict(self):
+        first, second, third, fourth = self.items
+        response = self.reorder(first, fourth, third)
+        self.assertEqual(response.status_code, 409)
+        # unranked neighbours only turn out to be swapped after the rebalance
+        ListItem.objects.filter(list=self.todo).update(position='')
+        response = self.reorder(first, fourth, third)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(self.order(), [first.id, second.id, third.id, fourth.id])
+
+    def test_neighbours_must_be_other_items_of_the_list(self):
+        first, second, third, fourth = self.items
+        other_list = List.objects.create(title_text="other list", created_on=timezone.now(),
+                                         updated_on=timezone.now(), user_id_id=self.user.id)
+        stranger = ListItem.objects.create(item_name="stranger", created_on=timezone.now(),
+                                           finished_on=timezone.now(), due_date=timezone.now().date(),
+                                           list=other_list, position=first.position)
+        self.assertEqual(self.reorder(first, stranger, second).status_code, 400)
+        self.assertEqual(self.reorder(first, first, second).status_code, 400)
+        self.assertEqual(self.order(), [first.id, second.id, third.id, fourth.id])
+
+    def test_rebalance_command_shortens_keys(self):
+        by_id = {item.id: item for item in self.items}
+        for _ in range(60):
+            order = self.order()
+            self.reorder(by_id[order[-1]], by_id[order[0]], by_id[order[1]])
+        self.assertTrue(any(len(p) > 4 for p in ListItem.objects.values_list('position', flat=True)))
+        before = self.order()
+        out = StringIO()
+        call_command('rebalance_positions', '--max-length', '4', stdout=out)
+        self.assertIn('Rebalanced 1 list(s)', out.getvalue())
+        self.assertEqual(self.order(), before)
+        self.assertTrue(all(len(p) <= 4 for p in ListItem.objects.values_list('position', flat=True)))
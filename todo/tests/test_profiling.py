@@ -0,0 +1,95 @@
+# MIT License
+
+# Copyright © 2024 Akarsh Reddy Eathamukkala
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the “Software”), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to
+# do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+
+
+import datetime
+import os
+import shutil
+import tempfile
+
+from django.contrib.auth.models import User
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from todo import profiling
+
+
+class TestProfiling(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.override = override_settings(PROFILE_DIR=self.directory, PROFILE_KEEP=3)
+        self.override.enable()
+        self.user = User.objects.create_user(username='jacob', password='top_secret')
+
+    def tearDown(self):
+        self.override.disable()
+        shutil.rmtree(self.directory)
+
+    def test_profile_names_sort_by_time(self):
+        name = profiling.profile_name('/todo/12', now=datetime.datetime(2024, 3, 1, 9, 30, 5, 42))
+        self.assertEqual(name, '20240301T093005000042-todo_12.prof')
+        self.assertTrue(profiling.PROFILE_NAME.match(profiling.profile_name('/')))
+
+    @override_settings(PROFILE_SAMPLE_RATE=0)
+    def test_requests_are_not_profiled_by_default(self):
+        self.client.login(username='jacob', password='top_secret')
+        self.client.get(reverse('todo:index'))
+        self.assertEqual(profiling.profiles(), [])
+
+    @override_settings(PROFILE_SAMPLE_RATE=1)
+    def test_sampled_requests_are_profiled_and_rotated(self):
+        self.client.login(username='jacob', password='top_secret')
+        for _ in range(5):
+            self.client.get(reverse('todo:index'))
+        names = profiling.profiles()
+        self.assertEqual(len(names), 3)
+        self.assertEqual(len(os.listdir(self.directory)), 3)
+        slug = profiling.profile_name(reverse('todo:index')).split('-', 1)[1]
+        self.assertTrue(names[0].endswith(slug))
+        total_time, functions = profiling.top_functions(names[0])
+        self.assertGreater(total_time, 0)
+        cumulative = [function['cumulative'] for function in functions]
+        self.assertEqual(cumulative, sorted(cumulative, reverse=True))
+
+    @override_settings(PROFILE_SAMPLE_RATE=0)
+    def test_signed_header_forces_a_profile(self):
+        request = RequestFactory().get('/', HTTP_X_PROFILE_TOKEN=profiling.make_token())
+        self.assertTrue(profiling.wanted(request))
+        request = RequestFactory().get('/', HTTP_X_PROFILE_TOKEN='forged')
+        self.assertFalse(profiling.wanted(request))
+
+    def test_profiles_page_is_for_staff(self):
+        self.client.login(username='jacob', password='top_secret')
+        self.assertEqual(self.client.get(reverse('todo:profiles')).status_code, 302)
+        self.user.is_staff = True
+        self.user.save()
+        with override_settings(PROFILE_SAMPLE_RATE=1):
+            self.client.get(reverse('todo:index'))
+        name = profiling.profiles()[0]
+        response = self.client.get(reverse('todo:profile', args=[name]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['selected'], name)
+        self.assertTrue(response.context['functions'])
+        response = self.client.get(reverse('todo:profile', args=['..settings.prof']))
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,97 @@
+# MIT License
+
+# Copyright © 2024 Akarsh Reddy Eathamukkala
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the “Software”), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to
+# do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, Client
+from django.urls import reverse
+from django.utils import timezone
+
+from todo.models import AccountDeletion, List, ListItem, SharedUsers
+from todo import purge
+
+
+class TestChunkedPurge(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='jacob', email='jacob@…', password='top_secret')
+        self.client.login(username='jacob', password='top_secret')
+        self.todo = self.create_list("big list", items=7)
+
+    def create_list(self, title, items):
+        todo = List.objects.create(
+            title_text=title,
+            created_on=timezone.now(),
+            updated_on=timezone.now(),
+            user_id_id=self.user.id,
+        )
+        ListItem.objects.bulk_create([ListItem(
+            item_name="item %d" % i,
+            item_text="",
+            created_on=timezone.now(),
+            finished_on=timezone.now(),
+            tag_color="#f9f9f9",
+            due_date=timezone.now(),
+            list=todo,
+            is_done=False,
+        ) for i in range(items)])
+        SharedUsers.objects.create(list_id=todo, shared_user="someone")
+        return todo
+
+    def test_delete_todo_hides_list_immediately(self):
+        response = self.client.post(reverse('todo:delete_todo'), {'todo': self.todo.id})
+        self.assertEqual(response.status_code, 302)
+        self.todo.refresh_from_db()
+        self.assertTrue(self.todo.is_deleted)
+        # the rows are still there until the purge runs
+        self.assertEqual(ListItem.objects.filter(list=self.todo).count(), 7)
+
+        response = self.client.get(reverse('todo:index'))
+        self.assertNotIn(self.todo, response.context['latest_lists'])
+        self.assertFalse([item for item in response.context['latest_list_items'] if item.list_id == self.todo.id])
+
+    def test_purge_removes_rows_in_chunks(self):
+        kept = self.create_list("kept list", items=2)
+        self.client.post(reverse('todo:delete_todo'), {'todo': self.todo.id})
+
+        self.assertEqual(purge.purge_deleted_lists(chunk_size=3), 1)
+        self.assertFalse(List.objects.filter(id=self.todo.id).exists())
+        self.assertFalse(ListItem.objects.filter(list_id=self.todo.id).exists())
+        self.assertFalse(SharedUsers.objects.filter(list_id_id=self.todo.id).exists())
+        self.assertEqual(ListItem.objects.filter(list=kept).count(), 2)
+
+    def test_account_deletion(self):
+        response = self.client.post(reverse('todo:delete_account'))
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(User.objects.get(id=self.user.id).is_active)
+        self.assertTrue(AccountDeletion.objects.filter(user=self.user).exists())
+
+        out = StringIO()
+        call_command('purge_deleted', '--chunk-size', '2', stdout=out)
+        self.assertIn("1 account", out.getvalue())
+        self.assertFalse(User.objects.filter(id=self.user.id).exists())
+        self.assertFalse(ListItem.objects.exists())
@@ -0,0 +1,142 @@
+# MIT License
+
+# Copyright © 2024 Akarsh Reddy Eathamukkala
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the “Software”), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to
+# do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+
+
+import datetime
+import json
+
+from django.contrib.auth.models import User
+from django.test import TestCase, Client
+from django.urls import reverse
+from django.utils import timezone
+
+from todo import recurrence, sync
+from todo.models import List, ListItem, ChangeLog
+from todo.scheduler import Scheduler
+
+
+class TestRules(TestCase):
+    databases = '__all__'
+
+    def test_normalize(self):
+        self.assertEqual(recurrence.normalize(''), '')
+        self.assertEqual(recurrence.normalize('Weekly'), 'FREQ=WEEKLY')
+        self.assertEqual(recurrence.normalize('rrule:byday=mo,th;freq=weekly'), 'FREQ=WEEKLY;BYDAY=MO,TH')
+        for bad in ('hourly', 'FREQ=SECONDLY', 'FREQ=DAILY;BYHOUR=3', 'FREQ=DAILY;INTERVAL=x'):
+            with self.assertRaises(ValueError):
+                recurrence.normalize(bad)
+
+    def test_next_occurrence(self):
+        monday = datetime.date(2024, 1, 1)
+        rule = recurrence.normalize('FREQ=WEEKLY;BYDAY=MO,TH')
+        self.assertEqual(recurrence.next_occurrence(rule, monday), datetime.date(2024, 1, 4))
+        self.assertEqual(recurrence.next_occurrence(rule, monday, datetime.date(2024, 1, 4)),
+                         datetime.date(2024, 1, 8))
+        rule = recurrence.normalize('FREQ=DAILY;COUNT=2')
+        self.assertEqual(recurrence.next_occurrence(rule, monday), datetime.date(2024, 1, 2))
+        self.assertIsNone(recurrence.next_occurrence(rule, monday, datetime.date(2024, 1, 2)))
+
+
+class TestScheduler(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='jacob', email='jacob@…', password='top_secret')
+        self.client.login(username='jacob', password='top_secret')
+        self.todo = List.objects.create(
+            title_text="test list",
+            created_on=timezone.now(),
+            updated_on=timezone.now(),
+            user_id_id=self.user.id,
+        )
+        self.today = datetime.date(2024, 3, 10)
+
+    def create_series(self, rule, due_date):
+        rule = recurrence.normalize(rule)
+        item = ListItem.objects.create(
+            item_name="water plants",
+            item_text="",
+            created_on=timezone.now(),
+            finished_on=timezone.now(),
+            tag_color="#f9f9f9",
+            due_date=due_date,
+            list=self.todo,
+            recurrence=rule,
+            next_occurrence=recurrence.next_occurrence(rule, due_date),
+        )
+        sync.log_item_changes(self.user.id, self.todo.id, [item.id])
+        return item
+
+    def occurrences(self):
+        return list(ListItem.objects.filter(list=self.todo, recurrence='')
+                    .order_by('due_date').values_list('due_date', flat=True))
+
+    def test_tick_creates_missed_occurrences_once(self):
+        series = self.create_series('FREQ=DAILY', datetime.date(2024, 3, 7))
+        scheduler = Scheduler()
+        scheduler.load()
+        self.assertEqual(scheduler.tick(self.today), 1)
+        self.assertEqual(self.occurrences(), [datetime.date(2024, 3, d) for d in (8, 9, 10)])
+        series.refresh_from_db()
+        self.assertEqual(series.next_occurrence, datetime.date(2024, 3, 11))
+        self.assertEqual(List.objects.get(id=self.todo.id).item_count, 3)
+        self.assertEqual(scheduler.tick(self.today), 0)
+
+    def test_restart_is_idempotent(self):
+        self.create_series('FREQ=DAILY', datetime.date(2024, 3, 9))
+        stale = Scheduler()
+        stale.load()
+        fresh = Scheduler()
+        fresh.load()
+        self.assertEqual(fresh.tick(self.today), 1)
+        # a second scheduler holding the old heap must not fire the same occurrence again
+        self.assertEqual(stale.tick(self.today), 0)
+        self.assertEqual(self.occurrences(), [self.today])
+        self.assertEqual(stale.scheduled, fresh.scheduled)
+
+    def test_refresh_picks_up_new_rules(self):
+        scheduler = Scheduler()
+        scheduler.load()
+        series = self.create_series('weekly', datetime.date(2024, 3, 1))
+        self.assertEqual(scheduler.tick(self.today), 1)
+        self.assertEqual(self.occurrences(), [datetime.date(2024, 3, 8)])
+        self.assertEqual(scheduler.scheduled, {series.id: datetime.date(2024, 3, 15)})
+
+    def test_add_item_with_rule(self):
+        params = {
+            'list_id': self.todo.id,
+            'list_item_name': 'standup',
+            'create_on': 1670292391,
+            'due_date': '2024-03-10',
+            'tag_color': '#f9f9f9',
+        }
+        response = self.client.post(reverse('todo:addNewListItem'), json.dumps(dict(params, recurrence='daily')),
+                                    content_type='application/json')
+        item = ListItem.objects.get(id=json.loads(response.content)['item_id'])
+        self.assertEqual(item.recurrence, 'FREQ=DAILY')
+        self.assertEqual(item.next_occurrence, datetime.date(2024, 3, 11))
+        self.assertTrue(ChangeLog.objects.filter(kind=ChangeLog.ITEM, object_id=item.id).exists())
+        response = self.client.post(reverse('todo:addNewListItem'), json.dumps(dict(params, recurrence='hourly')),
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,157 @@
+# MIT License
+
+# Copyright © 2024 Akarsh Reddy Eathamukkala
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the “Software”), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to
+# do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+
+
+import datetime
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.mail.backends import locmem
+from django.test import TestCase, Client
+from django.urls import reverse
+from django.utils import timezone
+
+from todo import reminders
+from todo.models import List, ListItem, ReminderPreference, SentReminder
+
+
+class TestReminders(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='jacob', email='jacob@example.com', password='top_secret')
+        self.client.login(username='jacob', password='top_secret')
+        self.todo = List.objects.create(
+            title_text="test list",
+            created_on=timezone.now(),
+            updated_on=timezone.now(),
+            user_id_id=self.user.id,
+        )
+        self.today = datetime.date(2024, 3, 10)
+
+    def create_item(self, name, days_from_today, is_done=False, todo=None):
+        return ListItem.objects.create(
+            item_name=name,
+            item_text="",
+            created_on=timezone.now(),
+            finished_on=timezone.now(),
+            tag_color="#f9f9f9",
+            due_date=self.today + datetime.timedelta(days=days_from_today),
+            list=todo or self.todo,
+            is_done=is_done,
+        )
+
+    def test_reminds_open_items_in_window_once(self):
+        self.create_item("today", 0)
+        self.create_item("tomorrow", 1)
+        self.create_item("next week", 7)
+        self.create_item("done", 0, is_done=True)
+        self.create_item("overdue", -1)
+        self.assertEqual(reminders.send_reminders(self.today), 2)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['jacob@example.com'])
+        self.assertIn("today", mail.outbox[0].body)
+        self.assertIn("tomorrow", mail.outbox[0].body)
+        self.assertNotIn("next week", mail.outbox[0].body)
+        self.assertEqual(reminders.send_reminders(self.today), 0)
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_preferences(self):
+        self.create_item("next week", 7)
+        preference = ReminderPreference.objects.create(user=self.user, days_before=7)
+        self.assertEqual(reminders.send_reminders(self.today), 1)
+        self.create_item("tomorrow", 1)
+        preference.enabled = False
+        preference.save()
+        self.assertEqual(reminders.send_reminders(self.today), 0)
+
+    def test_due_items_are_grouped_by_owner(self):
+        other = User.objects.create_user(username='anna', email='anna@example.com', password='top_secret')
+        other_list = List.objects.create(title_text="anna's list", created_on=timezone.now(),
+                                         updated_on=timezone.now(), user_id=other)
+        for i in range(5):
+            self.create_item("item %d" % i, i % 2, todo=other_list if i % 2 else None)
+        groups = list(reminders.due_items(self.today, self.today + datetime.timedelta(days=1), batch_size=2))
+        self.assertEqual([(user_id, len(items)) for user_id, items in groups], [(self.user.id, 3), (other.id, 2)])
+        # the window is still found through the due date index, only the sort is by owner
+        plan = ListItem.objects.filter(is_done=False, due_date__gte=self.today, list__user_id__isnull=False) \
+            .order_by('list__user_id', 'due_date', 'id').explain()
+        self.assertIn('listitem_open_due', plan)
+
+    def test_lists_without_an_owner_are_skipped(self):
+        ownerless = List.objects.create(title_text="imported", created_on=timezone.now(), updated_on=timezone.now())
+        self.create_item("nobody's", 0, todo=ownerless)
+        self.create_item("today", 0)
+        self.assertEqual(reminders.send_reminders(self.today), 1)
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_failed_send_releases_claims(self):
+        self.create_item("today", 0)
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.send_messages', side_effect=OSError):
+            with self.assertRaises(OSError):
+                reminders.send_reminders(self.today)
+        self.assertFalse(SentReminder.objects.exists())
+        self.assertEqual(reminders.send_reminders(self.today), 1)
+
+    def test_items_across_batches_make_one_email(self):
+        for i in range(5):
+            self.create_item("item %d" % i, 0)
+        self.assertEqual(reminders.send_reminders(self.today, batch_size=2), 5)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn("item 4", mail.outbox[0].body)
+
+    def test_failed_send_keeps_the_claims_of_sent_emails(self):
+        other = User.objects.create_user(username='anna', email='anna@example.com', password='top_secret')
+        other_list = List.objects.create(title_text="anna's list", created_on=timezone.now(),
+                                         updated_on=timezone.now(), user_id=other)
+        self.create_item("jacob's item", 0)
+        self.create_item("anna's item", 0, todo=other_list)
+        original = locmem.EmailBackend.send_messages
+        calls = []
+
+        def fail_second(backend, messages):
+            calls.append(messages)
+            if len(calls) == 2:
+                raise OSError
+            return original(backend, messages)
+
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.send_messages', fail_second):
+            with self.assertRaises(OSError):
+                reminders.send_reminders(self.today)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(SentReminder.objects.count(), 1)
+        # the next run only sends the email that failed
+        self.assertEqual(reminders.send_reminders(self.today), 1)
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertNotEqual(mail.outbox[0].to, mail.outbox[1].to)
+
+    def test_save_preferences(self):
+        response = self.client.post(reverse('todo:reminder_preferences'), {'enabled': 'on', 'days_before': 3})
+        self.assertEqual(response.status_code, 302)
+        preference = ReminderPreference.objects.get(user=self.user)
+        self.assertTrue(preference.enabled)
+        self.assertEqual(preference.days_before, 3)
+        self.client.post(reverse('todo:reminder_preferences'), {'days_before': 3})
+        self.assertFalse(ReminderPreference.objects.get(user=self.user).enabled)
@@ -0,0 +1,131 @@
+# MIT License
+
+# Copyright © 2024 Akarsh Reddy Eathamukkala
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the “Software”), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to
+# do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+
+
+import json
+import unittest
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from todo import replica
+from todo.models import List, ListItem
+
+
+@override_settings(TODO_REPLICA='replica.sqlite3')
+# the replica is only used without shards, see todo.replica
+@override_settings(TODO_SHARDS=0)
+class TestReplicaRouting(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        cache.delete(replica.LAG_CACHE_KEY)
+        self.router = replica.ReplicaRouter()
+        self.seen = []
+
+        @replica.read_only
+        def view(request):
+            self.seen.append(self.router.db_for_read(List))
+            return HttpResponse()
+        self.view = view
+
+    def tearDown(self):
+        cache.delete(replica.LAG_CACHE_KEY)
+
+    def test_reads_go_to_a_fresh_replica(self):
+        cache.set(replica.LAG_CACHE_KEY, 0.0)
+        self.view(RequestFactory().get('/'))
+        self.assertEqual(self.seen, ['replica'])
+        self.assertIsNone(self.router.db_for_read(List))
+        self.assertIsNone(self.router.db_for_write(List))
+
+    def test_sticky_cookie_and_lag_use_the_primary(self):
+        cache.set(replica.LAG_CACHE_KEY, 0.0)
+        request = RequestFactory().get('/')
+        request.COOKIES[replica.STICKY_COOKIE] = '1'
+        self.view(request)
+        cache.set(replica.LAG_CACHE_KEY, settings.REPLICA_MAX_LAG + 1)
+        self.view(RequestFactory().get('/'))
+        self.assertEqual(self.seen, [None, None])
+
+    @unittest.skipIf('replica' in settings.DATABASES, "a replica is configured")
+    def test_unreachable_replica_counts_as_lagging(self):
+        # there is no 'replica' database in this configuration
+        self.assertEqual(replica.lag(), float('inf'))
+
+    def test_writes_make_the_session_sticky(self):
+        # keep the reads on the primary, this test is about the cookie
+        cache.set(replica.LAG_CACHE_KEY, float('inf'))
+        user = User.objects.create_user(username='jacob', password='top_secret')
+        self.client.login(username='jacob', password='top_secret')
+        todo_list = List.objects.create(title_text='Mine', created_on=timezone.now(), updated_on=timezone.now(),
+                                        user_id=user)
+        item = ListItem.objects.create(list=todo_list, item_name='Item', created_on=timezone.now(),
+                                       finished_on=timezone.now(), due_date=timezone.now().date())
+        response = self.client.post(reverse('todo:getListItemById'), json.dumps({
+            'list_id': str(todo_list.id), 'list_item_name': 'Item', 'list_item_id': str(item.id)}),
+            content_type='application/json')
+        self.assertNotIn(replica.STICKY_COOKIE, response.cookies)
+        response = self.client.post(reverse('todo:markListItem'), json.dumps({
+            'list_id': todo_list.id, 'list_item_name': 'Item', 'list_item_id': item.id, 'is_done': True,
+            'finish_on': 0}),
+            content_type='application/json')
+        self.assertEqual(response.cookies[replica.STICKY_COOKIE]['max-age'], replica.sticky_seconds())
+
+    @override_settings(REPLICA_STICKY_SECONDS=10, REPLICA_MAX_LAG=30, REPLICA_LAG_CHECK_SECONDS=5)
+    def test_sticky_window_covers_the_allowed_lag(self):
+        # a replica 30s behind is still used, and its lag is only rechecked every 5s,
+        # so a 10s cookie would send the writer back to a replica without their write
+        response = replica.mark_sticky(HttpResponse())
+        self.assertEqual(response.cookies[replica.STICKY_COOKIE]['max-age'], 35)
+        with self.settings(REPLICA_STICKY_SECONDS=60):
+            response = replica.mark_sticky(HttpResponse())
+        self.assertEqual(response.cookies[replica.STICKY_COOKIE]['max-age'], 60)
+
+
+@unittest.skipUnless('replica' in settings.DATABASES, "run with TODO_REPLICA set")
+class TestReplicaDatabase(TransactionTestCase):
+    # rows committed by the test, as writes on the primary that reached the replica
+    databases = '__all__'
+
+    def test_index_reads_from_the_replica(self):
+        cache.delete(replica.LAG_CACHE_KEY)
+        User.objects.create_user(username='jacob', password='top_secret')
+        self.client.login(username='jacob', password='top_secret')
+        self.assertEqual(self.client.get(reverse('todo:index')).status_code, 200)
+        self.assertEqual(replica.lag(), 0.0)
+
+
+@unittest.skipUnless('replica' in settings.DATABASES, "run with TODO_REPLICA set")
+class TestReplicaMirror(TestCase):
+    databases = '__all__'
+
+    def test_replica_sees_the_rows_of_the_test(self):
+        User.objects.create_user(username='jacob', password='top_secret')
+        self.assertTrue(User.objects.using(replica.REPLICA_ALIAS).filter(username='jacob').exists())
+        User.objects.filter(username='jacob').update(first_name='Jacob')
+        self.assertEqual(User.objects.using(replica.REPLICA_ALIAS).get(username='jacob').first_name, 'Jacob')
@@ -0,0 +1,216 @@
+# MIT License
+
+# Copyright © 2024 Akarsh Reddy Eathamukkala
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the “Software”), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to
+# do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+
+
+import datetime
+import unittest
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.management import call_command
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from todo import recurrence, sharding, sync
+from todo.models import ChangeLog, DailyStats, Job, List, ListItem, SharedList, Template
+
+
+@override_settings(TODO_SHARDS=4)
+class TestShardRouter(SimpleTestCase):
+    def setUp(self):
+        self.router = sharding.ShardRouter()
+
+    def test_shard_for_user_is_stable_and_spread(self):
+        self.assertEqual(sharding.shard_for_user(42), sharding.shard_for_user(42))
+        self.assertEqual({sharding.shard_for_user(user_id) for user_id in range(100)},
+                         {'shard0', 'shard1', 'shard2', 'shard3'})
+        self.assertEqual(sharding.shard_for_user(None), 'shard0')
+        with self.settings(TODO_SHARDS=0):
+            self.assertEqual(sharding.shard_for_user(42), 'default')
+            self.assertEqual(sharding.shard_aliases(), ['default'])
+
+    def test_routing(self):
+        with sharding.for_user(42):
+            self.assertEqual(self.router.db_for_write(ListItem), sharding.shard_for_user(42))
+            self.assertEqual(self.router.db_for_write(ChangeLog), sharding.shard_for_user(42))
+            self.assertIsNone(self.router.db_for_write(Job))
+            with sharding.pinned('shard3'):
+                self.assertEqual(self.router.db_for_read(Template), 'shard3')
+        todo_list = List()
+        todo_list._state.db = 'shard2'
+        self.assertEqual(self.router.db_for_read(ListItem, instance=todo_list), 'shard2')
+        self.assertEqual(self.router.db_for_read(User, instance=todo_list), 'default')
+        self.assertTrue(self.router.allow_relation(todo_list, User()))
+
+    def test_allow_migrate(self):
+        self.assertTrue(self.router.allow_migrate('shard1', 'todo', 'listitem'))
+        self.assertTrue(self.router.allow_migrate('default', 'todo', 'listitem'))
+        self.assertFalse(self.router.allow_migrate('shard1', 'todo', 'job'))
+        self.assertTrue(self.router.allow_migrate('shard1', 'todo', 'changelog'))
+        self.assertFalse(self.router.allow_migrate('shard1', 'auth', 'user'))
+
+
+@unittest.skipUnless(settings.TODO_SHARDS >= 2, "run with TODO_SHARDS=2 or more")
+class TestShardedDatabases(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='jacob', password='top_secret')
+
+    def users_on_every_shard(self):
+        """Create a user, with a list, on each shard."""
+        lists = {}
+        index = 0
+        while len(lists) < sharding.shard_count():
+            index += 1
+            user = User.objects.create_user(username='user%d' % index, email='user%d@example.com' % index)
+            alias = sharding.shard_for_user(user.id)
+            if alias in lists:
+                continue
+            with sharding.for_user(user.id):
+                lists[alias] = List.objects.create(title_text='Mine', created_on=timezone.now(),
+                                                   updated_on=timezone.now(), user_id=user)
+        return lists
+
+    def test_reminders_cover_every_shard(self):
+        today = timezone.now().date()
+        for alias, todo_list in self.users_on_every_shard().items():
+            with sharding.pinned(alias):
+                ListItem.objects.create(list=todo_list, item_name='Due', created_on=timezone.now(),
+                                        finished_on=timezone.now(), due_date=today)
+        call_command('send_reminders', stdout=StringIO())
+        self.assertEqual(len(mail.outbox), sharding.shard_count())
+
+    def test_scheduler_covers_every_shard(self):
+        yesterday = timezone.now().date() - datetime.timedelta(days=1)
+        rule = recurrence.normalize('FREQ=DAILY')
+        for alias, todo_list in self.users_on_every_shard().items():
+            with sharding.pinned(alias):
+                ListItem.objects.create(list=todo_list, item_name='Daily', created_on=timezone.now(),
+                                        finished_on=timezone.now(), due_date=yesterday, recurrence=rule,
+                                        next_occurrence=recurrence.next_occurrence(rule, yesterday))
+        out = StringIO()
+        call_command('run_scheduler', '--once', stdout=out)
+        self.assertEqual(out.getvalue().strip(), "Fired %d repeating item(s)" % sharding.shard_count())
+
+    def test_lists_shared_across_shards(self):
+        # as `manage.py migrate_shards` does, so list ids do not repeat across shards
+        for index, alias in enumerate(sharding.shard_aliases()):
+            sharding.reserve_id_range(alias, index)
+        (owner_alias, shared), (_, own) = list(self.users_on_every_shard().items())[:2]
+        with sharding.pinned(owner_alias):
+            item = ListItem.objects.create(list=shared, item_name='Shared item', created_on=timezone.now(),
+                                           finished_on=timezone.now(), due_date=timezone.now().date())
+            long_ago = timezone.now() - datetime.timedelta(days=90)
+            ListItem.objects.create(list=shared, item_name='Archived', created_on=long_ago, finished_on=long_ago,
+                                    due_date=long_ago.date(), is_done=True)
+        call_command('archive_done', '--older-than', '30', stdout=StringIO())
+        SharedList.objects.create(user=own.user_id, shared_list_id='%d ' % shared.id)
+        self.client.force_login(own.user_id)
+
+        response = self.client.get('/todo')
+        self.assertEqual([todo_list.id for todo_list in response.context['shared_list']], [shared.id])
+        self.assertIn(item.id, [list_item.id for list_item in response.context['latest_list_items']])
+        response = self.client.post('/markListItem', {
+            'list_id': shared.id, 'list_item_name': 'Shared item', 'list_item_id': item.id, 'is_done': 'true',
+            'finish_on': 1670292391}, content_type='application/json')
+        self.assertEqual(response.json()['list_name'], 'Mine')
+        self.assertTrue(ListItem.objects.using(owner_alias).get(id=item.id).is_done)
+        self.assertEqual(DailyStats.objects.using(owner_alias).get(user=shared.user_id).completed_count, 1)
+        response = self.client.get('/getArchivedItems/%d' % shared.id)
+        self.assertEqual([row['name'] for row in response.json()['items']], ['Archived'])
+
+    def test_streamed_export_reads_the_users_shard(self):
+        alias, todo_list = next((alias, todo_list) for alias, todo_list in self.users_on_every_shard().items()
+                                if alias != sharding.shard_for_user(None))
+        with sharding.pinned(alias):
+            ListItem.objects.create(list=todo_list, item_name='Elsewhere', created_on=timezone.now(),
+                                    finished_on=timezone.now(), due_date=timezone.now().date())
+        self.client.force_login(todo_list.user_id)
+        response = self.client.get('/export_todo_csv', {'include_archived': 1})
+        rows = b''.join(response.streaming_content).decode('utf-8').splitlines()
+        self.assertEqual(len(rows), 2)
+        self.assertIn('Elsewhere', rows[1])
+
+    def test_requests_write_to_the_users_shard(self):
+        self.client.login(username='jacob', password='top_secret')
+        self.client.post('/createNewTodoList', '{"list_name": "Sharded", "create_on": 0, "list_tag": "none",'
+                         ' "shared_user": ""}', content_type='application/json')
+        home = sharding.shard_for_user(self.user.id)
+        self.assertTrue(List.objects.using(home).filter(title_text='Sharded').exists())
+        for alias in sharding.shard_aliases():
+            if alias != home:
+                self.assertFalse(List.objects.using(alias).exists())
+
+    def test_rebalance_moves_misplaced_users(self):
+        home = sharding.shard_for_user(self.user.id)
+        wrong = next(alias for alias in sharding.shard_aliases() if alias != home)
+        with sharding.pinned(wrong):
+            todo_list = List.objects.create(title_text='Misplaced', created_on=timezone.now(),
+                                            updated_on=timezone.now(), user_id=self.user)
+            ListItem.objects.create(list=todo_list, item_name='Item', created_on=timezone.now(),
+                                    finished_on=timezone.now(), due_date=timezone.now().date())
+        call_command('rebalance_shards', stdout=StringIO())
+        self.assertFalse(List.objects.using(wrong).exists())
+        self.assertFalse(ListItem.objects.using(wrong).exists())
+        self.assertEqual(ListItem.objects.using(home).get().list_id, todo_list.id)
+
+    def test_item_writes_stay_on_the_users_shard(self):
+        self.client.login(username='jacob', password='top_secret')
+        home = sharding.shard_for_user(self.user.id)
+        with sharding.pinned(home):
+            todo_list = List.objects.create(title_text='Mine', created_on=timezone.now(),
+                                            updated_on=timezone.now(), user_id=self.user)
+        with CaptureQueriesContext(connections['default']) as queries:
+            self.client.post('/addNewListItem', {
+                'list_id': todo_list.id, 'list_item_name': 'Item', 'create_on': 1670292391,
+                'due_date': '2023-01-01', 'tag_color': '#f9f9f9'}, content_type='application/json')
+        # nothing queues behind the single writer of the default database
+        self.assertEqual([q['sql'] for q in queries if q['sql'].startswith(('INSERT', 'UPDATE', 'DELETE'))], [])
+        self.assertTrue(ListItem.objects.using(home).filter(item_name='Item').exists())
+        self.assertTrue(ChangeLog.objects.using(home).filter(user=self.user, kind=ChangeLog.ITEM).exists())
+        self.assertEqual(DailyStats.objects.using(home).get(user=self.user).created_count, 1)
+
+    def test_sync_cursor_survives_a_rebalance(self):
+        # as `manage.py migrate_shards` does
+        for index, alias in enumerate(sharding.shard_aliases()):
+            sharding.reserve_id_range(alias, index)
+        home = sharding.shard_for_user(self.user.id)
+        wrong = next(alias for alias in sharding.shard_aliases() if alias != home)
+        with sharding.pinned(wrong):
+            first = List.objects.create(title_text='First', created_on=timezone.now(),
+                                        updated_on=timezone.now(), user_id=self.user)
+            sync.log_change(self.user.id, ChangeLog.LIST, first.id)
+            cursor = sync.changes_since(self.user.id, 0, 100)['cursor']
+        call_command('rebalance_shards', stdout=StringIO())
+        self.assertFalse(ChangeLog.objects.using(wrong).exists())
+        with sharding.for_user(self.user.id):
+            second = List.objects.create(title_text='Second', created_on=timezone.now(),
+                                         updated_on=timezone.now(), user_id=self.user)
+            sync.log_change(self.user.id, ChangeLog.LIST, second.id)
+            # the cursor came from the old shard, so the whole log is replayed
+            changes = sync.changes_since(self.user.id, cursor, 100)
+        self.assertEqual({row['id'] for row in changes['lists']}, {first.id, second.id})
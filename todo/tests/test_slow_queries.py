@@ -0,0 +1,110 @@
+# MIT License
+
+# Copyright © 2024 Akarsh Reddy Eathamukkala
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the “Software”), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to
+# do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+
+
+import io
+import json
+import logging
+import os
+import shutil
+import tempfile
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from todo import slow_queries
+from todo.models import List, SharedList
+
+
+class TestSlowQueries(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'slow.log')
+        self.handler = logging.FileHandler(self.path, delay=True)
+        slow_queries.logger.addHandler(self.handler)
+        self.user = User.objects.create_user(username='jacob', password='top_secret')
+        self.client.login(username='jacob', password='top_secret')
+
+    def tearDown(self):
+        slow_queries.logger.removeHandler(self.handler)
+        self.handler.close()
+        shutil.rmtree(self.directory)
+
+    def entries(self):
+        return list(slow_queries.read_entries(self.path))
+
+    def test_normalize(self):
+        self.assertEqual(
+            slow_queries.normalize("SELECT * FROM todo_list WHERE id = 12 AND title_text = 'it''s'"),
+            "SELECT * FROM todo_list WHERE id = ? AND title_text = ?")
+        self.assertEqual(
+            slow_queries.normalize('SELECT "a" FROM "t"\n WHERE "id" IN (%s, %s, %s)'),
+            slow_queries.normalize('SELECT "a" FROM "t" WHERE "id" IN (%s)'))
+
+    def test_parameters_are_redacted(self):
+        self.assertEqual(slow_queries.redact(['secret', 3, None]), ['str', 'int', 'NoneType'])
+        self.assertEqual(slow_queries.redact([['a'], ['b']], many=True), {'executions': 2})
+
+    @override_settings(SLOW_QUERY_MS=0.000001)
+    def test_statements_are_attributed_to_the_view(self):
+        now = timezone.now()
+        todo_list = List.objects.create(title_text='shared', created_on=now, updated_on=now, user_id=self.user)
+        SharedList.objects.create(user=self.user, shared_list_id='%d ' % todo_list.id)
+        self.client.get(reverse('todo:index'))
+        entries = self.entries()
+        self.assertTrue(entries)
+        self.assertTrue(all(entry['url_name'] == 'index' for entry in entries))
+        self.assertNotIn('top_secret', json.dumps(entries))
+        callers = {entry['caller'] for entry in entries}
+        self.assertTrue(any(caller.startswith('todo/views.py:') and caller.endswith(' in index')
+                            for caller in callers if caller))
+
+    @override_settings(SLOW_QUERY_MS=0)
+    def test_log_can_be_turned_off(self):
+        self.client.get(reverse('todo:index'))
+        self.assertEqual(self.entries(), [])
+
+    def test_report_groups_by_statement(self):
+        with open(self.path, 'w') as log:
+            for list_id, duration in [(1, 5), (2, 7), (3, 9)]:
+                log.write(json.dumps({'sql': 'SELECT * FROM todo_list WHERE id = %d' % list_id,
+                                      'duration_ms': duration, 'url_name': 'index',
+                                      'caller': 'todo/views.py:175 in index'}) + '\n')
+            log.write(json.dumps({'sql': 'SELECT 1', 'duration_ms': 50, 'url_name': None, 'caller': None}) + '\n')
+            log.write('not an entry\n')
+        with open(self.path + '.1', 'w') as log:
+            log.write(json.dumps({'sql': 'SELECT * FROM todo_list WHERE id = 4', 'duration_ms': 1}) + '\n')
+        groups = slow_queries.report(self.entries())
+        self.assertEqual([group['count'] for group in groups], [1, 4])
+        self.assertEqual(groups[1]['total_ms'], 22)
+        self.assertEqual(groups[1]['max_ms'], 9)
+        self.assertEqual(groups[1]['callers'].most_common(1)[0], ('todo/views.py:175 in index', 3))
+
+        out = io.StringIO()
+        call_command('slow_queries', '--top', '1', '--log', self.path, stdout=out)
+        self.assertIn('SELECT ?', out.getvalue())
+        self.assertNotIn('todo_list', out.getvalue())
@@ -0,0 +1,75 @@
+# MIT License
+
+# Copyright © 2024 Akarsh Reddy Eathamukkala
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the “Software”), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to
+# do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+
+
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.test import SimpleTestCase
+
+# what a worker does before serving its first request: set up Django and load the URLconf
+STARTUP = "import smarttodo.wsgi; from django.urls import get_resolver; get_resolver().url_patterns"
+# milliseconds of imports allowed at startup, override with STARTUP_BUDGET_MS on slow machines
+STARTUP_BUDGET_MS = float(os.environ.get('STARTUP_BUDGET_MS', 1000))
+# optional integrations that must stay out of worker startup
+LAZY_MODULES = ['google.auth', 'google.oauth2', 'dateutil.parser', 'dateutil.rrule', 'concurrent.futures.process']
+
+
+def import_times(code):
+    """
+    Runs code in a fresh interpreter under `python -X importtime`.
+
+    Args:
+        code (str): The code to run.
+
+    Returns:
+        dict: The self time of every imported module, in microseconds.
+    """
+    output = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=settings.BASE_DIR,
+                            capture_output=True, text=True, check=True).stderr
+    times = {}
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(self_us)
+    return times
+
+
+class TestStartupTime(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.times = import_times(STARTUP)
+
+    def test_startup_imports_fit_the_budget(self):
+        total_ms = sum(self.times.values()) / 1000
+        slowest = sorted(self.times, key=self.times.get, reverse=True)[:10]
+        self.assertLess(total_ms, STARTUP_BUDGET_MS,
+                        'startup imports took %.0fms, slowest: %s' % (total_ms, ', '.join(slowest)))
+
+    def test_optional_integrations_are_lazy(self):
+        self.assertIn('todo.views', self.times)
+        for module in LAZY_MODULES:
+            self.assertNotIn(module, self.times)
@@ -0,0 +1,122 @@
+# MIT License
+
+# Copyright © 2024 Akarsh Reddy Eathamukkala
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the “Software”), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to
+# do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+
+import datetime
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import connections
+from django.db.models import QuerySet
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from todo import sharding, stats
+from todo.models import DailyStats
+from todo.tests.helpers import ListViewTestCase
+from todo.views import markListItem, removeListItem
+
+
+class TestDailyStats(ListViewTestCase):
+    list_created_on = datetime.datetime(2024, 1, 1)
+    created = datetime.datetime(2024, 1, 1, 9, 0)
+    item_created_on = created.timestamp()
+    due_date = "2024-01-02"
+
+    def mark(self, item_id, is_done, finished):
+        self.post_json(markListItem, {
+            'list_id': self.todo.id,
+            'list_item_name': "item",
+            'list_item_id': item_id,
+            'is_done': is_done,
+            'finish_on': finished.timestamp(),
+        })
+
+    def snapshot(self):
+        return sorted(DailyStats.objects.values_list(
+            'day', 'created_count', 'completed_count', 'overdue_count', 'completion_seconds'))
+
+    def test_rollups_follow_item_changes(self):
+        on_time = self.add_item("on time")
+        late = self.add_item("late")
+        self.mark(on_time, True, datetime.datetime(2024, 1, 1, 11, 0))
+        self.mark(late, True, datetime.datetime(2024, 1, 3, 9, 0))
+
+        self.assertEqual(self.snapshot(), [
+            (datetime.date(2024, 1, 1), 2, 1, 0, 2 * 3600),
+            (datetime.date(2024, 1, 3), 0, 1, 1, 2 * 86400),
+        ])
+
+        # undoing and removing items takes their contributions back out
+        self.mark(late, False, datetime.datetime(2024, 1, 4, 9, 0))
+        self.post_json(removeListItem, {'list_item_id': on_time})
+        self.assertEqual(self.snapshot(), [
+            (datetime.date(2024, 1, 1), 1, 0, 0, 0),
+            (datetime.date(2024, 1, 3), 0, 0, 0, 0),
+        ])
+
+    def test_first_write_of_a_day_retries_on_the_users_shard(self):
+        day = datetime.date(2024, 1, 5)
+        with sharding.for_user(self.user.id):
+            stats.record(self.user.id, day, created=1)
+        original = QuerySet.update
+        misses = []
+
+        def miss_once(queryset, **kwargs):
+            # another request creates the row between this one's UPDATE and INSERT
+            if not misses:
+                misses.append(kwargs)
+                return 0
+            return original(queryset, **kwargs)
+
+        with sharding.for_user(self.user.id) as alias, CaptureQueriesContext(connections[alias]) as queries, \
+                mock.patch.object(QuerySet, 'update', miss_once):
+            stats.record(self.user.id, day, created=1)
+        self.assertTrue(any(q['sql'].startswith('ROLLBACK TO SAVEPOINT') for q in queries.captured_queries))
+        with sharding.for_user(self.user.id):
+            self.assertEqual(DailyStats.objects.get(user=self.user, day=day).created_count, 2)
+
+    def test_backfill_matches_incremental_rollups(self):
+        first = self.add_item("first")
+        self.add_item("second")
+        self.mark(first, True, datetime.datetime(2024, 1, 5, 10, 0))
+        incremental = self.snapshot()
+
+        DailyStats.objects.all().delete()
+        call_command('backfill_stats', stdout=StringIO())
+        self.assertEqual(self.snapshot(), incremental)
+
+    def test_stats_json(self):
+        item_id = self.add_item("item")
+        self.mark(item_id, True, datetime.datetime(2024, 1, 1, 10, 30))
+        self.client.login(username='jacob', password='top_secret')
+        response = self.client.get(reverse('todo:stats_json'), {'from': '2024-01-01', 'to': '2024-01-31'})
+        data = response.json()
+        self.assertEqual(data['summary']['created'], 1)
+        self.assertEqual(data['summary']['completed'], 1)
+        self.assertEqual(data['days'][0]['average_completion_seconds'], 5400)
+
+    def test_stats_page(self):
+        self.client.login(username='jacob', password='top_secret')
+        response = self.client.get(reverse('todo:stats'), {'days': 7})
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'todo/stats.html')
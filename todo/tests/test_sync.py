@@ -0,0 +1,85 @@
+# MIT License
+
+# Copyright © 2024 Akarsh Reddy Eathamukkala
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the “Software”), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to
+# do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+
+from django.urls import reverse
+
+from todo.tests.helpers import ListViewTestCase
+from todo.views import markListItem, removeListItem, delete_todo
+
+
+class TestDeltaSync(ListViewTestCase):
+    due_date = "2024-01-01"
+
+    def setUp(self):
+        super().setUp()
+        self.client.login(username='jacob', password='top_secret')
+
+    def sync(self, since, **params):
+        return self.client.get(reverse('todo:sync'), dict(since=since, **params)).json()
+
+    def test_sync_returns_changes_after_cursor(self):
+        first = self.add_item("first")
+        data = self.sync(0)
+        self.assertEqual([item['id'] for item in data['items']], [first])
+        self.assertEqual([row['id'] for row in data['lists']], [self.todo.id])
+        self.assertFalse(data['has_more'])
+
+        second = self.add_item("second")
+        self.post_json(markListItem, {
+            'list_id': self.todo.id,
+            'list_item_name': "first",
+            'list_item_id': first,
+            'is_done': True,
+            'finish_on': 1670292392,
+        })
+        self.post_json(removeListItem, {'list_item_id': second})
+
+        delta = self.sync(data['cursor'])
+        self.assertEqual([(item['id'], item['is_done']) for item in delta['items']], [(first, True)])
+        self.assertEqual(delta['deleted']['items'], [second])
+        self.assertEqual(self.sync(delta['cursor'])['items'], [])
+
+    def test_sync_pages_are_bounded(self):
+        for i in range(3):
+            self.add_item("item %d" % i)
+        cursor, pages, seen = 0, 0, set()
+        while True:
+            data = self.sync(cursor, limit=2)
+            seen.update(item['id'] for item in data['items'])
+            cursor = data['cursor']
+            pages += 1
+            if not data['has_more']:
+                break
+        self.assertEqual(len(seen), 3)
+        self.assertEqual(pages, 3)
+
+    def test_deleted_list_is_a_tombstone(self):
+        cursor = self.sync(0)['cursor']
+        request = self.factory.post('/delete-todo', {'todo': self.todo.id})
+        request.user = self.user
+        delete_todo(request)
+        self.assertEqual(self.sync(cursor)['deleted']['lists'], [self.todo.id])
+
+    def test_sync_requires_login(self):
+        self.client.logout()
+        response = self.client.get(reverse('todo:sync'))
+        self.assertEqual(response.status_code, 401)
@@ -0,0 +1,82 @@
+# MIT License
+
+# Copyright © 2024 Akarsh Reddy Eathamukkala
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the “Software”), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to
+# do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+
+
+import json
+
+from django.contrib.auth.models import User
+from django.test import TestCase, Client
+from django.urls import reverse
+from django.utils import timezone
+
+from todo.models import List, ListItem, ListTags
+
+
+class TestTags(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='jacob', email='jacob@…', password='top_secret')
+        self.client.login(username='jacob', password='top_secret')
+
+    def create_list(self, name, tag_name, create_new_tag=True):
+        self.client.post(reverse('todo:createNewTodoList'), json.dumps({
+            'list_name': name,
+            'create_on': 1670292391,
+            'list_tag': tag_name,
+            'shared_user': None,
+            'create_new_tag': create_new_tag,
+        }), content_type='application/json')
+        return List.objects.get(title_text=name)
+
+    def test_tag_is_created_once(self):
+        first = self.create_list("first", "work")
+        second = self.create_list("second", "work")
+        third = self.create_list("third", "none", create_new_tag=False)
+        self.assertEqual(ListTags.objects.filter(user_id=self.user, tag_name="work").count(), 1)
+        self.assertEqual(first.tag_id, second.tag_id)
+        self.assertIsNone(third.tag)
+
+    def test_index_filters_by_tag(self):
+        work = self.create_list("work list", "work")
+        self.create_list("other work list", "work")
+        home = self.create_list("home list", "home")
+        for todo_list in (work, home):
+            ListItem.objects.create(
+                item_name="item of " + todo_list.title_text,
+                item_text="",
+                created_on=timezone.now(),
+                finished_on=timezone.now(),
+                tag_color="#f9f9f9",
+                due_date=timezone.now(),
+                list=todo_list,
+            )
+        response = self.client.get('/todo', {'tag': 'home'})
+        self.assertEqual([todo_list.id for todo_list in response.context['latest_lists']], [home.id])
+        self.assertEqual([item.list_id for item in response.context['latest_list_items']], [home.id])
+        counts = {tag.tag_name: tag.list_count for tag in response.context['list_tags']}
+        self.assertEqual(counts, {'work': 2, 'home': 1})
+
+        response = self.client.get('/todo')
+        self.assertEqual(len(response.context['latest_lists']), 3)
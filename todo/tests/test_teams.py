@@ -0,0 +1,128 @@
+# MIT License
+
+# Copyright © 2024 Akarsh Reddy Eathamukkala
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the “Software”), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to
+# do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+
+
+import json
+
+from django.contrib.auth.models import User
+from django.db import connection, connections
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from todo import sharding
+from todo.models import List, ListTeamShare, SharedList, Team, TeamMembership
+
+
+class TestTeams(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        self.owner = User.objects.create_user(username='jacob', password='top_secret')
+        self.member = User.objects.create_user(username='anna', password='top_secret')
+        self.outsider = User.objects.create_user(username='otto', password='top_secret')
+        for user in (self.owner, self.member, self.outsider):
+            SharedList.objects.create(user=user, shared_list_id='')
+        self.client.login(username='jacob', password='top_secret')
+
+    def create_team(self, name='crew'):
+        response = self.client.post(reverse('todo:teams'), {'name': name})
+        self.assertEqual(response.status_code, 201)
+        return Team.objects.get(id=response.json()['id'])
+
+    def create_list(self, user, title='groceries'):
+        now = timezone.now()
+        return List.objects.create(title_text=title, created_on=now, updated_on=now, user_id=user)
+
+    def test_creating_a_team_makes_the_owner_a_member(self):
+        team = self.create_team()
+        self.assertEqual(team.owner, self.owner)
+        self.assertTrue(TeamMembership.objects.filter(team=team, user=self.owner).exists())
+        response = self.client.post(reverse('todo:teams'), {'name': 'crew'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.client.get(reverse('todo:teams')).json(),
+                         {'teams': [{'id': team.id, 'name': 'crew', 'is_owner': True}]})
+
+    def test_membership_changes_are_single_writes(self):
+        team = self.create_team()
+        url = reverse('todo:team_members', args=[team.id])
+        response = self.client.post(url, {'username': 'anna'})
+        self.assertTrue(response.json()['is_member'])
+        self.assertTrue(TeamMembership.objects.filter(team=team, user=self.member).exists())
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(url, {'username': 'anna', 'action': 'remove'})
+        self.assertEqual(len([q for q in queries if q['sql'].startswith('DELETE')]), 1)
+        self.assertFalse(TeamMembership.objects.filter(team=team, user=self.member).exists())
+        self.assertEqual(self.client.post(url, {'username': 'nobody'}).status_code, 400)
+
+    def test_only_the_owner_manages_members(self):
+        team = self.create_team()
+        self.client.login(username='anna', password='top_secret')
+        response = self.client.post(reverse('todo:team_members', args=[team.id]), {'username': 'otto'})
+        self.assertEqual(response.status_code, 404)
+        self.client.logout()
+        self.assertEqual(self.client.get(reverse('todo:teams')).status_code, 401)
+
+    def test_sharing_with_a_large_team_is_one_insert(self):
+        team = self.create_team()
+        users = User.objects.bulk_create([User(username='user%d' % i) for i in range(500)])
+        TeamMembership.objects.bulk_create([TeamMembership(team=team, user=user) for user in users])
+        body = {'list_name': 'groceries', 'create_on': 1670292391, 'list_tag': 'none',
+                'shared_user': None, 'shared_teams': [team.id]}
+        with CaptureQueriesContext(connections[sharding.shard_for_user(self.owner.id)]) as queries:
+            self.client.post(reverse('todo:createNewTodoList'), json.dumps(body), content_type='application/json')
+        inserts = [q for q in queries if 'INSERT INTO "todo_listteamshare"' in q['sql']]
+        self.assertEqual(len(inserts), 1)
+        todo_list = List.objects.get(title_text='groceries')
+        self.assertTrue(todo_list.is_shared)
+        self.assertEqual(ListTeamShare.objects.get().team, team)
+
+    def test_shared_users_are_resolved_in_bulk(self):
+        body = {'list_name': 'groceries', 'create_on': 1670292391, 'list_tag': 'none',
+                'shared_user': 'anna otto nobody'}
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(reverse('todo:createNewTodoList'), json.dumps(body), content_type='application/json')
+        todo_list = List.objects.get(title_text='groceries')
+        self.assertEqual(SharedList.objects.get(user=self.member).shared_list_id, '%d ' % todo_list.id)
+        self.assertEqual(SharedList.objects.get(user=self.outsider).shared_list_id, '%d ' % todo_list.id)
+        self.assertEqual(len([q for q in queries if q['sql'].startswith('UPDATE "todo_sharedlist"')]), 1)
+
+    def test_team_lists_show_up_for_members_only(self):
+        team = self.create_team()
+        self.client.post(reverse('todo:team_members', args=[team.id]), {'username': 'anna'})
+        todo_list = self.create_list(self.owner)
+        response = self.client.post(reverse('todo:share_list_with_team', args=[todo_list.id]), {'team_id': team.id})
+        self.assertTrue(response.json()['is_shared'])
+
+        self.client.login(username='anna', password='top_secret')
+        self.assertEqual(self.client.get(reverse('todo:index')).context['shared_list'], [todo_list])
+        self.client.login(username='otto', password='top_secret')
+        self.assertEqual(self.client.get(reverse('todo:index')).context['shared_list'], [])
+        # the owner sees the list once, as one of their own
+        self.client.login(username='jacob', password='top_secret')
+        self.assertEqual(self.client.get(reverse('todo:index')).context['shared_list'], [])
+
+        # the membership is the only thing that changes when someone leaves
+        self.client.post(reverse('todo:team_members', args=[team.id]), {'username': 'anna', 'action': 'remove'})
+        self.client.login(username='anna', password='top_secret')
+        self.assertEqual(self.client.get(reverse('todo:index')).context['shared_list'], [])
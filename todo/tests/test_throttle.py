@@ -0,0 +1,99 @@
+# MIT License
+
+# Copyright © 2024 Akarsh Reddy Eathamukkala
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the “Software”), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to
+# do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+
+
+import threading
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+
+from smarttodo.middleware import count_request
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+            'throttle': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'throttle-tests'}},
+    THROTTLE_CACHE='throttle',
+    THROTTLE_RATES={'default': (3, 60), 'addNewListItem': (2, 60)},
+)
+class TestThrottle(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username='jacob', password='top_secret')
+        caches['throttle'].clear()
+
+    def test_window_resets(self):
+        cache = caches['throttle']
+        self.assertEqual(count_request(cache, 'window', 2, 10, now=100), 0)
+        self.assertEqual(count_request(cache, 'window', 2, 10, now=105), 0)
+        self.assertAlmostEqual(count_request(cache, 'window', 2, 10, now=105), 5)
+        self.assertAlmostEqual(count_request(cache, 'window', 2, 10, now=107), 3)
+        self.assertEqual(count_request(cache, 'window', 2, 10, now=110), 0)
+
+    def test_concurrent_requests_do_not_exceed_the_limit(self):
+        cache = caches['throttle']
+        start = threading.Barrier(20)
+        waits = []
+
+        def request():
+            start.wait()
+            waits.append(count_request(cache, 'burst', 5, 60, now=100))
+
+        threads = [threading.Thread(target=request) for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(waits.count(0), 5)
+
+    def test_endpoint_rate_returns_429(self):
+        self.client.login(username='jacob', password='top_secret')
+        url = reverse('todo:addNewListItem')
+        with mock.patch('smarttodo.middleware.time.time', return_value=1000):
+            statuses = [self.client.get(url).status_code for _ in range(3)]
+            response = self.client.get(url)
+        self.assertNotIn(429, statuses[:2])
+        self.assertEqual(statuses[2], 429)
+        self.assertEqual(response.json(), {'error': 'rate limit exceeded'})
+        # the one-minute window of t=1000 ends at t=1020
+        self.assertEqual(int(response['Retry-After']), 20)
+
+    def test_buckets_are_per_user_and_endpoint(self):
+        self.client.login(username='jacob', password='top_secret')
+        for _ in range(2):
+            self.client.get(reverse('todo:addNewListItem'))
+        self.assertEqual(self.client.get(reverse('todo:addNewListItem')).status_code, 429)
+        # other csrf-exempt endpoints fall back to the default rate with their own bucket
+        self.assertNotEqual(self.client.get(reverse('todo:getListItemById')).status_code, 429)
+        # so does another user
+        other = Client()
+        other.force_login(User.objects.create_user(username='other', password='top_secret'))
+        self.assertNotEqual(other.get(reverse('todo:addNewListItem')).status_code, 429)
+
+    def test_pages_are_not_throttled(self):
+        for _ in range(5):
+            self.assertNotEqual(self.client.get(reverse('todo:login')).status_code, 429)
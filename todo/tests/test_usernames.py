@@ -0,0 +1,82 @@
+# MIT License
+
+# Copyright © 2024 Akarsh Reddy Eathamukkala
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the “Software”), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to
+# do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+
+from todo import usernames
+
+
+class TestUsernameSearch(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        usernames.cache.clear()
+        for name in ['anna', 'annabel', 'anne', 'bob', 'Annika']:
+            User.objects.create_user(username=name, password='top_secret')
+        self.client.login(username='bob', password='top_secret')
+
+    def tearDown(self):
+        usernames.cache.clear()
+
+    def test_prefix_range(self):
+        self.assertEqual(usernames.prefix_range('ann'), ('ann', 'ano'))
+        self.assertEqual(usernames.suggest('ann'), ('anna', 'annabel', 'anne'))
+        self.assertEqual(usernames.suggest('anna'), ('anna', 'annabel'))
+        self.assertEqual(usernames.suggest(''), ())
+
+    def test_prefix_search_uses_the_username_index(self):
+        low, high = usernames.prefix_range('ann')
+        sql, params = User.objects.filter(username__gte=low, username__lt=high) \
+            .order_by('username').values_list('username').query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            plan = ' '.join(str(row[-1]) for row in cursor.fetchall())
+        # a range seek on the unique username index, not a table scan
+        self.assertIn('SEARCH auth_user USING COVERING INDEX', plan)
+
+    def test_suggestions_are_cached(self):
+        usernames.suggest('ann')
+        with self.assertNumQueries(0):
+            self.assertEqual(usernames.suggest('ann'), ('anna', 'annabel', 'anne'))
+
+    def test_cache_evicts_the_least_recently_used_and_expired_entries(self):
+        cache = usernames.LRUCache(2, seconds=10)
+        cache.set('a', 1, now=0)
+        cache.set('b', 2, now=0)
+        cache.get('a', now=1)
+        cache.set('c', 3, now=1)
+        self.assertIsNone(cache.get('b', now=1))
+        self.assertEqual(cache.get('a', now=1), 1)
+        self.assertIsNone(cache.get('a', now=10))
+
+    def test_endpoint(self):
+        response = self.client.get(reverse('todo:username_search'), {'q': 'Ann'})
+        self.assertEqual(response.json(), {'usernames': ['Annika']})
+        response = self.client.get(reverse('todo:username_search'), {'names': 'anne nobody bob'})
+        self.assertEqual(response.json(), {'usernames': ['anne', 'bob']})
+        self.client.logout()
+        response = self.client.get(reverse('todo:username_search'), {'q': 'ann'})
+        self.assertEqual(response.status_code, 401)
@@ -36,6 +36,8 @@ import json
 
 
 class TestViews(TestCase):
+    databases = '__all__'
+
     def setUp(self):
         # Every test needs access to the client and request factory.
         self.client = Client()
@@ -653,4 +655,119 @@ class TestViews(TestCase):
 
         # Verify redirect URL again
         self.assertEqual(response.status_code, 302)
-        self.assertEqual(response.url, reverse('todo:template'))
\ No newline at end of file
+        self.assertEqual(response.url, reverse('todo:template'))
+
+    def test_markListItem_version_conflict(self):
+        todo = List.objects.create(
+            title_text="test list",
+            created_on=timezone.now(),
+            updated_on=timezone.now(),
+            user_id_id=self.user.id,
+        )
+        listItem = ListItem.objects.create(
+            item_name="test item",
+            item_text="This is a test item on a test list",
+            created_on=timezone.now(),
+            finished_on=timezone.now(),
+            tag_color="#f9f9f9",
+            due_date=timezone.now(),
+            list=todo,
+            is_done=False,
+        )
+        params = {
+            'list_id': todo.id,
+            'list_item_name': listItem.item_name,
+            "finish_on": 1670292392,
+            "is_done": True,
+            "list_item_id": listItem.id,
+            "version": 0,
+        }
+        request = self.factory.post('/todo/', data=params,
+                                    content_type="application/json")
+        request.user = self.user
+        response = markListItem(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content)['version'], 1)
+
+        # a second client still holding version 0 must not overwrite the change
+        params['is_done'] = False
+        request = self.factory.post('/todo/', data=params,
+                                    content_type="application/json")
+        request.user = self.user
+        response = markListItem(request)
+        self.assertEqual(response.status_code, 409)
+        current = json.loads(response.content)['item']
+        self.assertEqual((current['is_done'], current['version']), (True, 1))
+        self.assertTrue(ListItem.objects.get(id=listItem.id).is_done)
+
+    def test_updateListItem_version_conflict(self):
+        request = self.factory.get('/todo/')
+        request.user = self.user
+        todo = List.objects.create(
+            title_text="test list",
+            created_on=timezone.now(),
+            updated_on=timezone.now(),
+            user_id_id=request.user.id,
+        )
+        item = ListItem.objects.create(
+            item_name="test item",
+            item_text="original note",
+            created_on=timezone.now(),
+            finished_on=timezone.now(),
+            tag_color="#f9f9f9",
+            due_date=timezone.now(),
+            list=todo,
+            is_done=False,
+            version=3,
+        )
+        post = request.POST.copy()
+        post['note'] = 'stale note'
+        post['version'] = 2
+        request.POST = post
+        request.method = "POST"
+        response = updateListItem(request, item.id)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response['Content-Type'], 'text/html; charset=utf-8')
+        # the form comes back with the user's text and the current note and version
+        content = response.content.decode()
+        self.assertIn('stale note', content)
+        self.assertIn('original note', content)
+        self.assertIn('name="version" value="3"', content)
+        self.assertEqual(ListItem.objects.get(id=item.id).item_text, "original note")
+
+    def test_invalid_versions_are_rejected(self):
+        todo = List.objects.create(
+            title_text="test list",
+            created_on=timezone.now(),
+            updated_on=timezone.now(),
+            user_id_id=self.user.id,
+        )
+        item = ListItem.objects.create(
+            item_name="test item",
+            item_text="original note",
+            created_on=timezone.now(),
+            finished_on=timezone.now(),
+            tag_color="#f9f9f9",
+            due_date=timezone.now(),
+            list=todo,
+            is_done=False,
+        )
+        for version in ("abc", 1.5, [1]):
+            request = self.factory.post('/todo/', data={
+                'list_id': todo.id,
+                'list_item_name': item.item_name,
+                "finish_on": 1670292392,
+                "is_done": True,
+                "list_item_id": item.id,
+                "version": version,
+            }, content_type="application/json")
+            request.user = self.user
+            response = markListItem(request)
+            self.assertEqual(response.status_code, 400)
+
+        request = self.factory.post('/todo/', data={'note': 'new note', 'version': 'abc'})
+        request.user = self.user
+        response = updateListItem(request, item.id)
+        self.assertEqual(response.status_code, 400)
+        item.refresh_from_db()
+        self.assertEqual((item.item_text, item.is_done, item.version), ("original note", False, 0))
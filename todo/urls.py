@@ -46,6 +46,7 @@ urlpatterns = [
     path('getListItemByName', views.getListItemByName, name='getListItemByName'),
     path('getListItemById', views.getListItemById, name='getListItemById'),
     path('markListItem', views.markListItem, name='markListItem'),
+    path('reorderListItem', views.reorderListItem, name='reorderListItem'),
     path('addNewListItem', views.addNewListItem, name='addNewListItem'),
     path('updateListItem/<int:item_id>',
          views.updateListItem, name='updateListItem'),
@@ -54,7 +55,27 @@ urlpatterns = [
     path("social_login", views.social_login, name="social_login"),
     path("logout", views.logout_request, name="logout"),
     path("password_reset", views.password_reset_request, name="password_reset"),
+    path("delete_account", views.delete_account, name="delete_account"),
+    path("reminder_preferences", views.reminder_preferences, name="reminder_preferences"),
+    path("calendar_token", views.calendar_token, name="calendar_token"),
+    path("backup", views.backup_download, name="backup_download"),
+    path("backup/restore", views.backup_restore, name="backup_restore"),
+    path("calendar/<str:token>.ics", views.calendar_feed, name="calendar_feed"),
     path('templates/delete/<int:template_id>', views.delete_template, name='delete_template'),
     path('export_todo_csv', views.export_todo_csv, name='export_todo_csv'),
     path('import_todo_csv', views.import_todo_csv, name='import_todo_csv'),
+    path('jobs/<str:key>', views.job_status, name='job_status'),
+    path('jobs/<str:key>/page', views.job_page, name='job_page'),
+    path('jobs/<str:key>/result', views.job_result, name='job_result'),
+    path('stats', views.stats_page, name='stats'),
+    path('api/stats', views.stats_json, name='stats_json'),
+    path('api/sync', views.sync_changes, name='sync'),
+    path('api/items', views.query_items, name='query_items'),
+    path('getArchivedItems/<int:list_id>', views.getArchivedItems, name='getArchivedItems'),
+    path('api/usernames', views.username_search, name='username_search'),
+    path('profiles', views.profiles_page, name='profiles'),
+    path('profiles/<str:name>', views.profiles_page, name='profile'),
+    path('teams', views.teams, name='teams'),
+    path('teams/<int:team_id>/members', views.team_members, name='team_members'),
+    path('todo/<int:list_id>/teams', views.share_list_with_team, name='share_list_with_team'),
 ]
@@ -0,0 +1,136 @@
+# MIT License
+
+# Copyright © 2024 Akarsh Reddy Eathamukkala
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the “Software”), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to
+# do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+
+
+"""
+Username autocompletion for the share dialog.
+
+A prefix is searched as the range [prefix, next prefix) of `auth_user.username`, so
+the unique index of the column answers it with one seek and a short scan; LIKE
+'prefix%' would scan the table on SQLite. Recent answers are kept in a small LRU
+cache, since every keystroke of every user asks for the same few short prefixes.
+"""
+
+import collections
+import threading
+import time
+
+from django.contrib.auth.models import User
+
+# maximum number of usernames suggested for one prefix
+SUGGESTION_LIMIT = 10
+# number of prefixes whose suggestions are cached per process
+CACHE_SIZE = 1024
+# seconds before cached suggestions are read again, so new users show up
+CACHE_SECONDS = 60
+
+
+class LRUCache:
+    """
+    A thread-safe least recently used cache whose entries also expire.
+
+    Args:
+        size (int): The maximum number of entries.
+        seconds (float): How long an entry stays valid.
+    """
+
+    def __init__(self, size, seconds):
+        self.size = size
+        self.seconds = seconds
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, now=None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value, now=None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._entries[key] = (now + self.seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+cache = LRUCache(CACHE_SIZE, CACHE_SECONDS)
+
+
+def prefix_range(prefix):
+    """
+    Returns the bounds of the strings starting with a prefix.
+
+    Args:
+        prefix (str): A non-empty prefix.
+
+    Returns:
+        tuple: The inclusive lower and exclusive upper bound.
+    """
+    return prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def suggest(prefix):
+    """
+    Returns the first usernames starting with a prefix, in alphabetical order.
+
+    An existing username equal to the prefix always comes first.
+
+    Args:
+        prefix (str): The start of the username, matched case-sensitively.
+
+    Returns:
+        tuple: At most SUGGESTION_LIMIT usernames.
+    """
+    if not prefix:
+        return ()
+    usernames = cache.get(prefix)
+    if usernames is None:
+        low, high = prefix_range(prefix)
+        usernames = tuple(User.objects.filter(username__gte=low, username__lt=high)
+                          .order_by('username').values_list('username', flat=True)[:SUGGESTION_LIMIT])
+        cache.set(prefix, usernames)
+    return usernames
+
+
+def existing(usernames):
+    """
+    Returns which of the given usernames belong to a user.
+
+    Unlike suggestions this is never cached; it validates names right before sharing.
+
+    Args:
+        usernames (list): The usernames to check.
+
+    Returns:
+        list: The existing usernames, in alphabetical order.
+    """
+    return list(User.objects.filter(username__in=set(usernames)).order_by('username')
+                .values_list('username', flat=True))
@@ -24,47 +24,45 @@
 import json
 
 from django.shortcuts import render, redirect, get_object_or_404, get_list_or_404
-from django.http import HttpResponse, JsonResponse, Http404, HttpResponseRedirect
+from django.http import HttpResponse, HttpResponseBadRequest, JsonResponse, Http404, HttpResponseRedirect, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
-from django.db import transaction, IntegrityError
+from django.db import IntegrityError
 from django.utils import timezone
-from django.views.decorators.http import require_POST
+from django.views.decorators.http import condition, require_POST
 
-from todo.models import List, ListItem, Template, TemplateItem, ListTags, SharedUsers, SharedList
+from todo.models import List, ListItem, Template, TemplateItem, ListTags, SharedUsers, SharedList, DailyStats, ChangeLog, AccountDeletion, ListItemArchive, ReminderPreference, CalendarFeed, Job, Team, TeamMembership, ListTeamShare
+from todo import backup, csv_import, ical, item_query, jobs, positions, profiling, recurrence, replica, sharding, stats, sync, usernames
+from todo.ranking import key_between
 
-from todo.forms import NewUserForm
+from todo.forms import NewUserForm, ReminderPreferenceForm
 from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth import login, authenticate, logout
-from django.contrib.auth.forms import AuthenticationForm
+from django.contrib.auth.forms import AuthenticationForm, PasswordResetForm
 from django.contrib import messages
-from django.core.mail import send_mail, BadHeaderError
-from django.contrib.auth.forms import PasswordResetForm
 from django.contrib.auth.models import User
 from django.template.loader import render_to_string
-from django.db.models.query_utils import Q
+from django.db.models import Count, F, Q, Value
+from django.db.models.functions import Concat
 from django.utils.http import urlsafe_base64_encode
 from django.contrib.auth.tokens import default_token_generator
 from django.utils.encoding import force_bytes
-from django.core.mail import EmailMessage
-from google.oauth2 import id_token
-from google.auth.transport import requests
-
-
-import csv
-from django.http import HttpResponse, HttpResponseRedirect
-from django.shortcuts import render
+from django.utils.dateparse import parse_date
 from django.urls import reverse
-from .models import List, ListItem
 
+# the Google sign-in client and the mail classes are imported by the views using them
 
-# import csv
-# from django.shortcuts import render, redirect
-# from django.http import HttpResponseRedirect
-# from django.urls import reverse
-# from .models import List, ListItem
-# from django.contrib import messages 
+import csv
 import datetime
-from dateutil import parser
+import secrets
+
+# maximum number of change log entries returned by one sync page
+SYNC_PAGE_SIZE = 500
+# maximum number of archived items returned per request
+ARCHIVE_PAGE_SIZE = 100
+# default and maximum number of items returned by one item query page
+ITEM_QUERY_PAGE_SIZE = 50
+ITEM_QUERY_MAX_PAGE_SIZE = 200
 
 config = {
     "darkMode": False,
@@ -100,6 +98,7 @@ def config_hook(request, template_str):
 # Render the home page with users' to-do lists
 
 
+@replica.read_only
 def index(request, list_id=0):
     """
     Renders the index page for the to-do application.
@@ -108,7 +107,8 @@ def index(request, list_id=0):
     and whether a specific list ID is provided. If the user is not authenticated, they are redirected
     to the login page. If a valid list ID is provided, that specific list is retrieved; otherwise, the
     latest lists for the authenticated user are fetched along with any shared lists. It also gathers
-    the user's list items, saved templates, and list tags, and checks for overdue items to change their color.
+    the items of the displayed lists, saved templates, and list tags, and checks for overdue items to change their color.
+    A `tag` query parameter only shows the lists with that tag.
 
     Args:
         request: The HTTP request object.
@@ -117,23 +117,32 @@ def index(request, list_id=0):
     Returns:
         HttpResponse: The rendered HTML response for the index page with the context containing:
             - latest_lists: A list of the user's latest lists or the specific list if an ID is provided.
-            - latest_list_items: A queryset of all list items ordered by their list ID.
+            - latest_list_items: The displayed lists' items ordered by their list ID, then position.
             - templates: A queryset of saved templates for the authenticated user, ordered by creation date.
-            - list_tags: A queryset of tags associated with the user's lists, ordered by creation date.
+            - list_tags: A queryset of the user's tags with their `list_count`, ordered by creation date.
+            - selected_tag: The tag the lists are filtered by, if any.
             - shared_list: A list of shared lists for the user.
+            - reminder_preference: The user's reminder preferences, or the defaults if never saved.
+            - calendar_feed_url: The url of the user's iCalendar feed, if they created one.
     """
     if not request.user.is_authenticated:
         return redirect("/login")
 
     shared_list = []
+    selected_tag = request.GET.get('tag')
+    tag_filter = Q(tag__tag_name=selected_tag) if selected_tag else Q()
 
     if list_id != 0:
         # latest_lists = List.objects.filter(id=list_id, user_id_id=request.user.id)
-        latest_lists = List.objects.filter(id=list_id)
+        with sharding.for_row(List, list_id):
+            latest_lists = list(List.objects.filter(id=list_id, is_deleted=False).select_related('tag'))
 
     else:
         latest_lists = List.objects.filter(
-            user_id_id=request.user.id).order_by('-updated_on')
+            user_id_id=request.user.id, is_deleted=False).select_related('tag').order_by('-updated_on')
+        if selected_tag:
+            # resolved through the unique (user, tag name) index, then the tag foreign key index
+            latest_lists = latest_lists.filter(tag__user_id_id=request.user.id, tag__tag_name=selected_tag)
 
         try:
             query_list_str = SharedList.objects.get(
@@ -150,18 +159,45 @@ def index(request, list_id=0):
             for list_id in shared_list_id:
 
                 try:
-                    query_list = List.objects.get(id=int(list_id))
+                    # lists shared by users on other shards are read from the owner's shard
+                    with sharding.for_row(List, int(list_id)):
+                        query_list = List.objects.select_related('tag').get(tag_filter, id=int(list_id), is_deleted=False)
                 except List.DoesNotExist:
                     query_list = None
 
                 if query_list:
                     shared_list.append(query_list)
 
-    latest_list_items = ListItem.objects.order_by('list_id')
+        # lists shared with the user's teams, found through the (team, list) share rows
+        team_ids = list(TeamMembership.objects.filter(user_id=request.user.id).values_list('team_id', flat=True))
+        if team_ids:
+            latest_lists = list(latest_lists)
+            shown = {todo_list.id for todo_list in latest_lists + shared_list}
+            team_lists = []
+            # a share row lives next to its list, on the shard of the list's owner
+            for alias in sharding.shard_aliases():
+                with sharding.pinned(alias):
+                    team_lists.extend(List.objects.filter(tag_filter, listteamshare__team_id__in=team_ids,
+                                                          is_deleted=False).select_related('tag').distinct())
+            shared_list.extend(todo_list for todo_list in team_lists if todo_list.id not in shown)
+
+    # overdue counts change with the date, so they are counted for the shown lists only
+    latest_lists = list(latest_lists)
+    List.objects.with_overdue_counts(latest_lists + shared_list)
+    shown_list_ids = {}
+    for todo_list in latest_lists + shared_list:
+        shown_list_ids.setdefault(todo_list._state.db, []).append(todo_list.id)
+    latest_list_items = []
+    for alias, list_ids in shown_list_ids.items():
+        with sharding.pinned(alias):
+            latest_list_items.extend(ListItem.objects.filter(list_id__in=list_ids).order_by('list_id', 'position', 'id'))
+    # the sort is stable, so the items of a list keep their order
+    latest_list_items.sort(key=lambda list_item: list_item.list_id)
     saved_templates = Template.objects.filter(
         user_id_id=request.user.id).order_by('created_on')
     list_tags = ListTags.objects.filter(
-        user_id=request.user.id).order_by('created_on')
+        user_id=request.user.id).annotate(
+        list_count=Count('list', filter=Q(list__is_deleted=False))).order_by('created_on')
 
     # change color when is or over due
     cur_date = datetime.date.today()
@@ -173,7 +209,11 @@ def index(request, list_id=0):
         'latest_list_items': latest_list_items,
         'templates': saved_templates,
         'list_tags': list_tags,
+        'selected_tag': selected_tag,
         'shared_list': shared_list,
+        'reminder_preference': ReminderPreference.objects.filter(user=request.user).first()
+                               or ReminderPreference(user=request.user),
+        'calendar_feed_url': _calendar_feed_url(request),
         'config': config
     }
     return render(request, 'todo/index.html', context)
@@ -194,7 +234,8 @@ def todo_from_template(request):
         request: The HTTP request object containing the user's input data.
 
     Returns:
-        HttpResponse: A redirect to the to-do page after successfully creating the new list and its items.
+        HttpResponse: A redirect to the to-do page after successfully creating the new list and its items,
+                      or with background jobs enabled the answer of `_job_accepted` for the queued job.
 
     Raises:
         Http404: If the specified template does not exist, a 404 error is raised.
@@ -203,23 +244,9 @@ def todo_from_template(request):
         return redirect("/login")
     template_id = request.POST['template']
     fetched_template = get_object_or_404(Template, pk=template_id)
-    todo = List.objects.create(
-        title_text=fetched_template.title_text,
-        created_on=timezone.now(),
-        updated_on=timezone.now(),
-        user_id_id=request.user.id
-    )
-    for template_item in fetched_template.templateitem_set.all():
-        ListItem.objects.create(
-            item_name=template_item.item_text,
-            item_text="",
-            created_on=timezone.now(),
-            finished_on=timezone.now(),
-            due_date=timezone.now(),
-            tag_color=template_item.tag_color,
-            list=todo,
-            is_done=False,
-        )
+    if settings.BACKGROUND_JOBS:
+        return _job_accepted(request, jobs.enqueue('list_from_template', request.user.id, {'template_id': fetched_template.id}))
+    jobs.instantiate_template(fetched_template.id, request.user.id)
     return redirect("/todo")
 
 
@@ -245,21 +272,25 @@ def template_from_todo(request):
     if not request.user.is_authenticated:
         return redirect("/login")
     todo_id = request.POST['todo']
-    fetched_todo = get_object_or_404(List, pk=todo_id)
+    # the list may be shared from another shard; the template goes to the user's own
+    with sharding.for_row(List, todo_id):
+        fetched_todo = get_object_or_404(List, pk=todo_id)
+        todo_items = list(fetched_todo.listitem_set.all())
     new_template = Template.objects.create(
         title_text=fetched_todo.title_text,
         created_on=timezone.now(),
         updated_on=timezone.now(),
         user_id_id=request.user.id
     )
-    for todo_item in fetched_todo.listitem_set.all():
+    for todo_item in todo_items:
         TemplateItem.objects.create(
             item_text=todo_item.item_name,
             created_on=timezone.now(),
             finished_on=timezone.now(),
             due_date=timezone.now(),
             tag_color=todo_item.tag_color,
-            template=new_template
+            template=new_template,
+            recurrence=todo_item.recurrence,
         )
     return redirect("/templates")
 
@@ -271,7 +302,8 @@ def delete_todo(request):
 
     This view function is invoked when a user wants to delete a to-do item. 
     It first checks if the user is authenticated; if not, it redirects them to the login page. 
-    If the user is authenticated, it retrieves the specified to-do item by its ID and deletes it.
+    If the user is authenticated, it retrieves the specified to-do item by its ID and soft-deletes it,
+    which hides it immediately; the rows themselves are purged later in bounded chunks.
 
     Args:
         request: The HTTP request object containing the user's input data.
@@ -285,12 +317,19 @@ def delete_todo(request):
     if not request.user.is_authenticated:
         return redirect("/login")
     todo_id = request.POST['todo']
-    fetched_todo = get_object_or_404(List, pk=todo_id)
-    fetched_todo.delete()
+    with sharding.for_row(List, todo_id):
+        fetched_todo = get_object_or_404(List, pk=todo_id, is_deleted=False)
+        # hide the list right away; its rows are removed in chunks by `manage.py purge_deleted`
+        List.objects.filter(id=fetched_todo.id).update(is_deleted=True, version=F('version') + 1)
+        sync.log_change(fetched_todo.user_id_id, ChangeLog.LIST, fetched_todo.id, ChangeLog.DELETE)
+    if settings.BACKGROUND_JOBS:
+        # or right away by a worker
+        jobs.enqueue('purge_list', fetched_todo.user_id_id, {'list_id': fetched_todo.id})
     return redirect("/todo")
 
 
 # Render the template list page
+@replica.read_only
 def template(request, template_id=0):
     """
     Retrieves and displays saved templates for the authenticated user.
@@ -349,9 +388,15 @@ def removeListItem(request):
         list_item_id = body['list_item_id']
         print("list_item_id: ", list_item_id)
         try:
-            with transaction.atomic():
+            with sharding.for_row(ListItem, list_item_id), sharding.atomic():
                 being_removed_item = ListItem.objects.get(id=list_item_id)
                 being_removed_item.delete()
+                List.objects.adjust_counters(
+                    being_removed_item.list_id, items=-1,
+                    done=-int(being_removed_item.is_done))
+                stats.item_removed(being_removed_item.list.user_id_id, being_removed_item)
+                sync.log_item_changes(being_removed_item.list.user_id_id, being_removed_item.list_id,
+                                      [list_item_id], ChangeLog.DELETE)
         except IntegrityError as e:
             print(str(e))
             print("unknown error occurs when trying to update todo list item text")
@@ -359,6 +404,33 @@ def removeListItem(request):
     else:
         return redirect("/todo")
 
+def _client_version(value):
+    """
+    Parse the item version a client sent with a conditional update.
+
+    Args:
+        value: The `version` of the JSON body or form; None or "" when the client sent none.
+
+    Returns:
+        int: The version, or None to update whatever version the item has.
+
+    Raises:
+        ValueError: If the version is not an integer.
+    """
+    if value is None or value == '':
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise ValueError("version must be an integer")
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError("version must be an integer")
+
+def _conflict_response(list_item):
+    """Return a 409 carrying the current state of an item whose conditional update failed."""
+    list_item.refresh_from_db()
+    return JsonResponse({'error': 'conflict', 'item': sync.serialize_item(list_item)}, status=409)
+
 # Update a to-do list item, called by javascript function
 
 
@@ -379,6 +451,8 @@ def updateListItem(request, item_id):
 
     Returns:
         HttpResponse: Redirects to the home page after updating the item or to the index if item ID is invalid.
+                      If the item changed since the form was loaded, the form is rendered again with the
+                      current note and a 409 status. A 400 if the `version` is not an integer.
 
     Raises:
         IntegrityError: If there is a database integrity error while trying to update the list item.
@@ -393,10 +467,25 @@ def updateListItem(request, item_id):
         if item_id <= 0:
             return redirect("index")
         try:
-            with transaction.atomic():
+            client_version = _client_version(request.POST.get('version'))
+        except ValueError as e:
+            return HttpResponseBadRequest(str(e), content_type='text/plain')
+        try:
+            with sharding.for_row(ListItem, item_id), sharding.atomic():
                 todo_list_item = ListItem.objects.get(id=item_id)
-                todo_list_item.item_text = updated_text
-                todo_list_item.save(force_update=True)
+                expected_version = todo_list_item.version if client_version is None else client_version
+                updated = ListItem.objects.filter(id=item_id, version=expected_version).update(
+                    item_text=updated_text, version=F('version') + 1)
+                if not updated:
+                    # the note comes from a form post, so the form is shown again rather than JSON
+                    todo_list_item.refresh_from_db()
+                    return render(request, 'todo/edit_note.html', {
+                        'item': todo_list_item,
+                        'note': updated_text,
+                        'config': config,
+                    }, status=409)
+                List.objects.adjust_counters(todo_list_item.list_id)
+                sync.log_item_changes(todo_list_item.list.user_id_id, todo_list_item.list_id, [item_id])
         except IntegrityError as e:
             print(str(e))
             print("unknown error occurs when trying to update todo list item text")
@@ -414,7 +503,8 @@ def addNewListItem(request):
     This view function is invoked to create a new to-do list item. It checks if the user is authenticated;
     if not, it redirects them to the login page. On receiving a POST request, it decodes the JSON body to 
     retrieve the list item details and creates a new ListItem object. If an IntegrityError occurs during 
-    the creation process, it logs the error and returns an item ID of -1.
+    the creation process, it logs the error and returns an item ID of -1. An optional `recurrence` rule
+    makes the item repeat; an invalid rule is rejected with a 400 response.
 
     Args:
         request: The HTTP request object containing the user's input data.
@@ -434,16 +524,25 @@ def addNewListItem(request):
         finished_on_time = datetime.datetime.fromtimestamp(create_on)
         due_date = body['due_date']
         tag_color = body['tag_color']
+        try:
+            rule = recurrence.normalize(body.get('recurrence'))
+        except ValueError as e:
+            return JsonResponse({'item_id': -1, 'error': str(e)}, status=400)
         print(item_name)
         print(create_on)
         result_item_id = -1
         # create a new to-do list object and save it to the database
         try:
-            with transaction.atomic():
+            with sharding.for_row(List, list_id), sharding.atomic():
                 todo_list_item = ListItem(item_name=item_name, created_on=create_on_time, finished_on=finished_on_time,
-                                          due_date=due_date, tag_color=tag_color, list_id=list_id, item_text="", is_done=False)
+                                          due_date=due_date, tag_color=tag_color, list_id=list_id, item_text="", is_done=False,
+                                          position=positions.next_positions(list_id)[0], recurrence=rule,
+                                          next_occurrence=recurrence.next_occurrence(rule, parse_date(str(due_date))))
                 todo_list_item.save()
                 result_item_id = todo_list_item.id
+                List.objects.adjust_counters(list_id, items=1)
+                stats.item_created(todo_list_item.list.user_id_id, todo_list_item)
+                sync.log_item_changes(todo_list_item.list.user_id_id, list_id, [result_item_id])
         except IntegrityError:
             print("unknown error occurs when trying to create and save a new todo list")
             return JsonResponse({'item_id': -1})
@@ -453,6 +552,73 @@ def addNewListItem(request):
         return JsonResponse({'item_id': -1})
 
 
+# Move a to-do list item between two others, called by javascript function
+@csrf_exempt
+def reorderListItem(request):
+    """
+    Moves a to-do list item to a new place in its list.
+
+    The item gets a rank key between the keys of its new neighbours, so a move is a
+    single-row update no matter how long the list is. Lists whose keys are missing or
+    would grow too long are rebalanced first.
+
+    Args:
+        request: The HTTP request object. The JSON body holds `list_item_id` and the ids
+                 of the items that will be directly before (`prev_id`) and after
+                 (`next_id`) it; either may be null at the ends of the list.
+
+    Returns:
+        JsonResponse: The item's new position and version. A 400 if a neighbour is not
+                      another item of the same list, and a 409 if the neighbours are not
+                      next to each other in that order, which means the client's copy
+                      of the list is stale.
+    """
+    if not request.user.is_authenticated:
+        return redirect("/login")
+    if request.method != 'POST':
+        return HttpResponse("Request method is not a Post")
+    body = json.loads(request.body.decode('utf-8'))
+    # the item may be on another user's list, on that user's shard
+    with sharding.for_row(ListItem, body['list_item_id']):
+        item = get_object_or_404(ListItem, id=body['list_item_id'])
+        try:
+            neighbour_ids = [int(i) if i else None for i in (body.get('prev_id'), body.get('next_id'))]
+        except (TypeError, ValueError):
+            return JsonResponse({'error': 'prev_id and next_id must be item ids'}, status=400)
+
+        def neighbour_positions():
+            found = dict(ListItem.objects.filter(
+                list_id=item.list_id, id__in=[i for i in neighbour_ids if i]).values_list('id', 'position'))
+            return [found.get(i) if i else None for i in neighbour_ids]
+
+        def out_of_order(prev_position, next_position):
+            return bool(prev_position and next_position and prev_position >= next_position)
+
+        with sharding.atomic():
+            prev_position, next_position = neighbour_positions()
+            missing = [i for i, found in zip(neighbour_ids, (prev_position, next_position)) if i and found is None]
+            if missing or item.id in neighbour_ids:
+                return JsonResponse({'error': 'prev_id and next_id must be other items of the same list'}, status=400)
+            if out_of_order(prev_position, next_position):
+                return JsonResponse({'error': 'conflict', 'detail': 'neighbours out of order'}, status=409)
+            try:
+                if '' in (prev_position, next_position):
+                    raise ValueError("unranked neighbour")
+                position = key_between(prev_position, next_position)
+                if len(position) > positions.POSITION_MAX_LENGTH:
+                    raise ValueError("rank key too long")
+            except ValueError:
+                positions.rebalance(item.list_id)
+                prev_position, next_position = neighbour_positions()
+                # unranked neighbours only get their order from the rebalance
+                if out_of_order(prev_position, next_position):
+                    return JsonResponse({'error': 'conflict', 'detail': 'neighbours out of order'}, status=409)
+                position = key_between(prev_position, next_position)
+            ListItem.objects.filter(id=item.id).update(position=position, version=F('version') + 1)
+            sync.log_item_changes(item.list.user_id_id, item.list_id, [item.id])
+        return JsonResponse({'item_id': item.id, 'position': position, 'version': item.version + 1})
+
+
 # Mark a to-do list item as done/not done, called by javascript function
 @csrf_exempt
 def markListItem(request):
@@ -470,6 +636,8 @@ def markListItem(request):
 
     Returns:
         JsonResponse: Contains the name of the item and the list if successful, or an empty response in case of failure.
+                      A 409 with the current item if its `version` changed, and a 400 if the `version`
+                      is not an integer.
 
     Raises:
         IntegrityError: If there is a database integrity error while trying to update the list item.
@@ -491,14 +659,37 @@ def markListItem(request):
         if is_done_str == "0" or is_done_str == "False" or is_done_str == "false":
             list_item_is_done = False
         try:
-            with transaction.atomic():
+            client_version = _client_version(body.get('version'))
+        except ValueError as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        try:
+            with sharding.for_row(List, list_id), sharding.atomic():
                 query_list = List.objects.get(id=list_id)
                 query_item = ListItem.objects.get(id=list_item_id)
+                was_done = query_item.is_done
+                # conditional UPDATE of the changed columns only; it fails if another
+                # collaborator changed the item since the client (or this request) read it
+                expected_version = query_item.version if client_version is None else client_version
+                updated = ListItem.objects.filter(
+                    id=query_item.id, version=expected_version, is_done=was_done).update(
+                    is_done=list_item_is_done, finished_on=finished_on_time, version=F('version') + 1)
+                if not updated:
+                    return _conflict_response(query_item)
+                if was_done:
+                    # the previous completion no longer counts in the rollups
+                    stats.item_completed(query_list.user_id_id, query_item, sign=-1)
                 query_item.is_done = list_item_is_done
                 query_item.finished_on = finished_on_time
-                query_item.save()
+                query_item.version = expected_version + 1
+                if list_item_is_done:
+                    stats.item_completed(query_list.user_id_id, query_item)
+                if was_done != list_item_is_done:
+                    List.objects.adjust_counters(query_item.list_id, done=1 if list_item_is_done else -1)
+                else:
+                    List.objects.adjust_counters(query_item.list_id)
+                sync.log_item_changes(query_list.user_id_id, query_item.list_id, [query_item.id])
                 # Sending an success response
-                return JsonResponse({'item_name': query_item.item_name, 'list_name': query_list.title_text, 'item_text': query_item.item_text})
+                return JsonResponse({'item_name': query_item.item_name, 'list_name': query_list.title_text, 'item_text': query_item.item_text, 'version': query_item.version})
         except IntegrityError:
             print("query list item" + str(list_item_name) + " failed!")
             JsonResponse({})
@@ -529,7 +720,7 @@ def getListTagsByUserid(request):
         return redirect("/login")
     if request.method == 'POST':
         try:
-            with transaction.atomic():
+            with sharding.atomic():
                 user_id = request.user.id
                 list_tag_list = ListTags.objects.filter(
                     user_id=user_id).values()
@@ -544,6 +735,7 @@ def getListTagsByUserid(request):
 
 
 @csrf_exempt
+@replica.read_only
 def getListItemByName(request):
     """
     Retrieve a to-do list item by its name.
@@ -574,7 +766,7 @@ def getListItemByName(request):
         print("list_id: " + list_id)
         print("list_item_name: " + list_item_name)
         try:
-            with transaction.atomic():
+            with sharding.for_row(List, list_id), sharding.atomic():
                 query_list = List.objects.get(id=list_id)
                 query_item = ListItem.objects.get(
                     list_id=list_id, item_name=list_item_name)
@@ -589,6 +781,7 @@ def getListItemByName(request):
 
 # Get a to-do list item by id, called by javascript function
 @csrf_exempt
+@replica.read_only
 def getListItemById(request):
     """
     Retrieve a to-do list item by its ID.
@@ -620,12 +813,12 @@ def getListItemById(request):
         print("list_item_id: " + list_item_id)
 
         try:
-            with transaction.atomic():
+            with sharding.for_row(List, list_id), sharding.atomic():
                 query_list = List.objects.get(id=list_id)
                 query_item = ListItem.objects.get(id=list_item_id)
                 print("item_text", query_item.item_text)
                 # Sending an success response
-                return JsonResponse({'item_id': query_item.id, 'item_name': query_item.item_name, 'list_name': query_list.title_text, 'item_text': query_item.item_text})
+                return JsonResponse({'item_id': query_item.id, 'item_name': query_item.item_name, 'list_name': query_list.title_text, 'item_text': query_item.item_text, 'version': query_item.version})
         except IntegrityError:
             print("query list item" + str(list_item_name) + " failed!")
             JsonResponse({})
@@ -642,6 +835,7 @@ def createNewTodoList(request):
     This function checks if the user is authenticated and processes 
     a POST request to create a new to-do list with the specified 
     attributes, including sharing it with other users if needed.
+    The optional `shared_teams` ids share the list with teams of the user.
 
     Args:
         request (HttpRequest): The HTTP request object containing 
@@ -669,17 +863,16 @@ def createNewTodoList(request):
         # print(create_on)
         # create a new to-do list object and save it to the database
         try:
-            with transaction.atomic():
+            with sharding.atomic():
                 user_id = request.user.id
                 # print(user_id)
+                tag = None
+                if tag_name and tag_name != 'none':
+                    # an existing tag is reused whether or not the client asked for a new one
+                    tag, _ = ListTags.objects.get_or_create(
+                        user_id_id=user_id, tag_name=tag_name, defaults={'created_on': create_on_time})
                 todo_list = List(user_id_id=user_id, title_text=list_name,
-                                 created_on=create_on_time, updated_on=create_on_time, list_tag=tag_name)
-                if body['create_new_tag']:
-                    # print('new tag')
-                    new_tag = ListTags(
-                        user_id_id=user_id, tag_name=tag_name, created_on=create_on_time)
-                    new_tag.save()
-
+                                 created_on=create_on_time, updated_on=create_on_time, tag=tag)
                 todo_list.save()
                 print(todo_list.id)
 
@@ -687,31 +880,15 @@ def createNewTodoList(request):
                 if body['shared_user']:
                     user_list = shared_user.split(' ')
 
-                    k = len(user_list)-1
-                    i = 0
-                    while i <= k:
-
-                        try:
-                            query_user = User.objects.get(
-                                username=user_list[i])
-                        except User.DoesNotExist:
-                            query_user = None
-
-                        if query_user:
-
-                            shared_list_id = SharedList.objects.get(
-                                user=query_user).shared_list_id
-                            shared_list_id = shared_list_id + \
-                                str(todo_list.id) + " "
-                            SharedList.objects.filter(user=query_user).update(
-                                shared_list_id=shared_list_id)
-                            i += 1
-
-                        else:
-                            print("No user named " + user_list[i] + " found!")
-                            user_not_found.append(user_list[i])
-                            user_list.remove(user_list[i])
-                            k -= 1
+                    # one query resolves every name and one UPDATE appends the list to all of them
+                    found = set(User.objects.filter(username__in=user_list).values_list('username', flat=True))
+                    for name in user_list:
+                        if name not in found:
+                            print("No user named " + name + " found!")
+                            user_not_found.append(name)
+                    user_list = [name for name in user_list if name in found]
+                    SharedList.objects.filter(user__username__in=user_list).update(
+                        shared_list_id=Concat('shared_list_id', Value('%d ' % todo_list.id)))
 
                     shared_user = ' '.join(user_list)
                     new_shared_user = SharedUsers(
@@ -722,7 +899,19 @@ def createNewTodoList(request):
 
                     if user_list:
                         List.objects.filter(
-                            id=todo_list.id).update(is_shared=True)
+                            id=todo_list.id).update(is_shared=True, version=F('version') + 1)
+
+                # a team share is a single row, whatever the size of the team
+                if body.get('shared_teams'):
+                    team_ids = _teams_of(request.user).filter(
+                        id__in=body['shared_teams']).values_list('id', flat=True)
+                    shares = ListTeamShare.objects.bulk_create(
+                        [ListTeamShare(list=todo_list, team_id=team_id) for team_id in team_ids])
+                    if shares:
+                        List.objects.filter(
+                            id=todo_list.id).update(is_shared=True, version=F('version') + 1)
+
+                sync.log_change(user_id, ChangeLog.LIST, todo_list.id)
 
         except IntegrityError as e:
             print(str(e))
@@ -785,6 +974,10 @@ def social_login(request):
     Returns:
         HttpResponse: Redirects to the index page or returns a 403 status on token verification failure.
     """
+    # imported here, the Google client libraries take longer to import than the rest of the app
+    from google.oauth2 import id_token
+    from google.auth.transport import requests
+
     token = request.POST.get('credential')
 
     try:
@@ -876,6 +1069,141 @@ def logout_request(request):
     return redirect("todo:index")
 
 
+# Save the reminder preferences of the current user
+@require_POST
+def reminder_preferences(request):
+    """
+    Saves when the authenticated user wants to be emailed about items that are due soon.
+
+    Args:
+        request: The HTTP request object with the `enabled` and `days_before` form fields.
+
+    Returns:
+        HttpResponse: Redirects to the to-do page.
+    """
+    if not request.user.is_authenticated:
+        return redirect("/login")
+    preference = ReminderPreference.objects.filter(user=request.user).first() or ReminderPreference(user=request.user)
+    form = ReminderPreferenceForm(request.POST, instance=preference)
+    if form.is_valid():
+        form.save()
+        messages.info(request, "Reminder preferences saved.")
+    else:
+        messages.error(request, "Invalid reminder preferences.")
+    return redirect("/todo")
+
+
+def _calendar_feed_url(request):
+    feed = CalendarFeed.objects.filter(user=request.user).first()
+    if feed is None:
+        return None
+    return request.build_absolute_uri(reverse('todo:calendar_feed', args=[feed.token]))
+
+
+# Create or replace the secret calendar feed url of the current user
+@require_POST
+def calendar_token(request):
+    """
+    Gives the authenticated user a new secret calendar feed url.
+
+    Any previous url of the user stops working.
+
+    Args:
+        request: The HTTP request object.
+
+    Returns:
+        HttpResponse: Redirects to the to-do page.
+    """
+    if not request.user.is_authenticated:
+        return redirect("/login")
+    CalendarFeed.objects.update_or_create(
+        user=request.user, defaults={'token': secrets.token_urlsafe(32), 'created_on': timezone.now()})
+    messages.info(request, "A new calendar feed url was created.")
+    return redirect("/todo")
+
+
+def _calendar_feed_state(request, token):
+    """Look up a feed and its owner's latest change once per request."""
+    if not hasattr(request, '_calendar_feed_state'):
+        feed = CalendarFeed.objects.filter(token=token, user__is_active=True).first()
+        latest = None
+        if feed is not None:
+            # read from the (user, id) change log index without touching any item;
+            # feed requests carry no session, so the shard comes from the feed's owner
+            with sharding.for_user(feed.user_id):
+                latest = ChangeLog.objects.filter(user_id=feed.user_id).order_by('-id') \
+                    .values('id', 'created_on').first()
+        request._calendar_feed_state = (feed, latest)
+    return request._calendar_feed_state
+
+
+def _calendar_etag(request, token):
+    feed, latest = _calendar_feed_state(request, token)
+    if feed is None:
+        return None
+    return '"%d-%d"' % (feed.id, latest['id'] if latest else 0)
+
+
+def _calendar_last_modified(request, token):
+    feed, latest = _calendar_feed_state(request, token)
+    if feed is None:
+        return None
+    return max(feed.created_on, latest['created_on']) if latest else feed.created_on
+
+
+# Serve the iCalendar feed behind a secret token
+@condition(etag_func=_calendar_etag, last_modified_func=_calendar_last_modified)
+def calendar_feed(request, token):
+    """
+    Streams the open items of a user as an iCalendar feed.
+
+    The feed needs no login; the secret token in the url identifies the user. Calendar apps
+    poll it with If-None-Match / If-Modified-Since and get a 304 until the user's change log
+    moves on.
+
+    Args:
+        request: The HTTP request object.
+        token (str): The secret token of the feed.
+
+    Returns:
+        StreamingHttpResponse: The text/calendar feed.
+
+    Raises:
+        Http404: If no active user has this token.
+    """
+    feed, _ = _calendar_feed_state(request, token)
+    if feed is None:
+        raise Http404("No such calendar feed")
+    response = StreamingHttpResponse(ical.feed(feed.user_id), content_type='text/calendar; charset=utf-8')
+    response['Content-Disposition'] = 'inline; filename="to-done.ics"'
+    return response
+
+
+# Delete the account of the current user
+@require_POST
+def delete_account(request):
+    """
+    Schedules the deletion of the authenticated user's account.
+
+    The account is deactivated and logged out immediately; its data is removed in bounded
+    chunks by `manage.py purge_deleted` so the request never waits for large deletes.
+
+    Args:
+        request: The HTTP request object.
+
+    Returns:
+        HttpResponse: Redirects to the login page.
+    """
+    if not request.user.is_authenticated:
+        return redirect("/login")
+    user = request.user
+    User.objects.filter(id=user.id).update(is_active=False)
+    AccountDeletion.objects.get_or_create(user=user)
+    logout(request)
+    messages.info(request, "Your account has been scheduled for deletion.")
+    return redirect("/login")
+
+
 # Reset user password
 def password_reset_request(request):
     """
@@ -888,6 +1216,8 @@ def password_reset_request(request):
     Returns:
         HttpResponse: Renders the password reset form or redirects after sending the email.
     """
+    from django.core.mail import BadHeaderError, EmailMessage
+
     if request.method == "POST":
         password_reset_form = PasswordResetForm(request.POST)
         if password_reset_form.is_valid():
@@ -926,7 +1256,27 @@ def password_reset_request(request):
 
 # Export todo 
 
+class _Echo:
+    """A file-like object whose write() hands the value back, for streaming csv rows."""
+
+    def write(self, value):
+        return value
+
+
+@replica.read_only
 def export_todo_csv(request):
+    if not request.user.is_authenticated:
+        return redirect("/login")
+    if settings.BACKGROUND_JOBS:
+        return _job_accepted(request, jobs.enqueue('export_csv', request.user.id))
+    if request.GET.get('include_archived'):
+        # archived history can be large, so stream it instead of building it in memory
+        writer = csv.writer(_Echo())
+        response = StreamingHttpResponse(
+            (writer.writerow(row) for row in csv_import.export_rows(request.user.id)), content_type='text/csv')
+        response['Content-Disposition'] = 'attachment; filename="todo_lists.csv"'
+        return response
+
     # Create the HttpResponse object with CSV headers.
     response = HttpResponse(content_type='text/csv')
     response['Content-Disposition'] = 'attachment; filename="todo_lists.csv"'
@@ -936,7 +1286,7 @@ def export_todo_csv(request):
     writer.writerow(['List Title', 'Item Name', 'Item Text', 'Is Done', 'Created On', 'Due Date'])
 
     # Fetch data to export
-    todo_lists = List.objects.filter(user_id=request.user)
+    todo_lists = List.objects.filter(user_id=request.user, is_deleted=False)
     for todo_list in todo_lists:
         for item in todo_list.listitem_set.all():
             writer.writerow([
@@ -952,6 +1302,55 @@ def export_todo_csv(request):
     return response
 
 
+# Download a full backup of the current user's account
+def backup_download(request):
+    """
+    Streams a gzip-compressed NDJSON backup of everything the authenticated user owns.
+
+    Unlike the csv export, the backup keeps tags, templates, sharing, colours, completion
+    times and stats, and `backup_restore` reads it back.
+
+    Args:
+        request: The HTTP request object.
+
+    Returns:
+        StreamingHttpResponse: The backup file.
+    """
+    if not request.user.is_authenticated:
+        return redirect("/login")
+    response = StreamingHttpResponse(backup.dump(request.user.id), content_type='application/gzip')
+    response['Content-Disposition'] = 'attachment; filename="to-done-backup.ndjson.gz"'
+    return response
+
+
+# Restore a backup into the current user's account
+@require_POST
+def backup_restore(request):
+    """
+    Adds the lists, templates and settings of an uploaded backup to the authenticated user's account.
+
+    Args:
+        request: The HTTP request object with the backup in the `backup_file` upload.
+
+    Returns:
+        HttpResponse: Redirects to the to-do page with a message describing the outcome, or a
+                      400 naming the first invalid line of a malformed backup.
+    """
+    if not request.user.is_authenticated:
+        return redirect("/login")
+    upload = request.FILES.get('backup_file')
+    if upload is None:
+        messages.error(request, "Choose a backup file to restore.")
+        return redirect("/todo")
+    try:
+        counts = backup.restore(request.user, upload)
+    except (ValueError, OSError, EOFError) as e:
+        return HttpResponseBadRequest("Could not restore the backup: %s" % e, content_type='text/plain')
+    messages.info(request, "Restored %d list(s) with %d item(s)." % (
+        counts['list'], counts['item'] + counts['archived_item']))
+    return redirect("/todo")
+
+
 # Import todo from a csv file
 
 # import csv
@@ -963,44 +1362,41 @@ def export_todo_csv(request):
 # from datetime import datetime
 
 def import_todo_csv(request):
+    """
+    Imports to-do items from an uploaded csv file in the export format.
+
+    The whole file is validated before anything is written. With `dry_run` set, nothing is
+    imported and the validation report is returned instead, listing every bad row. Rows that
+    match an existing item by content hash only update it if its text or status changed, so
+    importing the same file twice does not duplicate anything.
+
+    Args:
+        request: The HTTP request object with the file in the `csv_file` upload.
+
+    Returns:
+        HttpResponse: A redirect to the index page, or with `dry_run` a JsonResponse with the
+                      row count, whether the file is valid and the (row, column, reason) errors.
+                      With background jobs enabled, a valid file is imported by a worker and
+                      the answer of `_job_accepted` for the queued job is returned.
+    """
+    if not request.user.is_authenticated:
+        return redirect("/login")
     if request.method == 'POST' and request.FILES.get('csv_file'):
-        csv_file = request.FILES['csv_file']
-        reader = csv.reader(csv_file.read().decode('utf-8').splitlines())
-        next(reader)  # Skip the header row
-
-        for row in reader:
-            # Assuming CSV format matches [List Title, Item Name, Item Text, Is Done, Created On, Due Date]
-            if len(row) < 6:  # Validate row length
-                messages.error(request, 'Invalid CSV format. Please check your file.')
-                return redirect(reverse('todo:import_todo_csv'))
-
-            list_title, item_name, item_text, is_done, created_on, due_date = row
-
-            # Get or create List by title
-            # todo_list, created = List.objects.get_or_create(title_text=list_title)
-            todo_list, created = List.objects.get_or_create(title_text=list_title, defaults={'created_on': timezone.now(), 'updated_on': timezone.now()})
-
-            # Convert string values to proper types
-            is_done = is_done.lower() in ['true', '1']
-            # created_on = datetime.strptime(created_on, '%Y-%m-%d').date() if created_on else None
-            # due_date = datetime.strptime(due_date, '%Y-%m-%d').date() if due_date else None
-            
-            created_on = parser.isoparse(created_on)
-            due_date = parser.isoparse(due_date) if due_date else None
-            
-            # Create the ListItem
-            ListItem.objects.create(
-                list=todo_list,
-                item_name=item_name,
-                item_text=item_text,
-                is_done=is_done,
-                created_on=created_on,
-                finished_on=timezone.now(),
-                due_date=due_date,
-            )
-            # item_name = models.CharField(max_length=50, null=True, blank=True)
-
-        messages.success(request, 'Todos imported successfully!')
+        content = request.FILES['csv_file'].read()
+        report = csv_import.validate(content.decode('utf-8').splitlines())
+        if request.POST.get('dry_run'):
+            return JsonResponse(report.as_dict())
+        if not report.is_valid:
+            row, column, reason = report.errors[0]
+            messages.error(request, 'Invalid CSV file, nothing was imported. Row %d%s: %s (%d error(s) in total)' % (
+                row, ', ' + column if column else '', reason, len(report.errors)))
+            return redirect(reverse('todo:import_todo_csv'))
+
+        if settings.BACKGROUND_JOBS:
+            return _job_accepted(request, jobs.enqueue('import_csv', request.user.id, data=content))
+        counts = csv_import.import_rows(report.rows, request.user.id)
+        messages.success(request, 'Todos imported successfully! %d new, %d updated, %d unchanged.' % (
+            counts['created'], counts['updated'], counts['unchanged']))
         # return HttpResponseRedirect(reverse('todo:home'))
     
     return redirect("todo:index")
@@ -1010,6 +1406,110 @@ def import_todo_csv(request):
 
 
 
+def _job_accepted(request, job):
+    """
+    Answer a request whose work was queued as a background job.
+
+    Args:
+        request: The HTTP request object.
+        job (Job): The queued job.
+
+    Returns:
+        HttpResponse: For clients asking for JSON, a 202 JsonResponse describing the job;
+                      for form posts and links, a redirect to the page that follows its progress.
+    """
+    if 'application/json' not in request.headers.get('Accept', ''):
+        return redirect('todo:job_page', key=job.key)
+    return JsonResponse({
+        'job': job.key,
+        'status': job.status,
+        'status_url': reverse('todo:job_status', args=[job.key]),
+    }, status=202)
+
+
+def _get_job(request, key, **filters):
+    # the key in the url is a secret, but only the user who queued the job may use it;
+    # anonymous imports have no user and match anonymous requests only
+    return get_object_or_404(Job, key=key, user_id=request.user.id, **filters)
+
+
+# Report the progress of a background job
+def job_status(request, key):
+    """
+    Returns the status and progress of a background job.
+
+    Args:
+        request: The HTTP request object.
+        key (str): The key returned when the job was queued.
+
+    Returns:
+        JsonResponse: The status, progress and error of the job, and once it finished
+                      with a result, the url to download it from.
+
+    Raises:
+        Http404: If the job does not exist or belongs to another user.
+    """
+    job = _get_job(request, key)
+    payload = {
+        'job': job.key,
+        'kind': job.kind,
+        'status': job.status,
+        'progress': job.progress,
+        'total': job.total,
+        'error': job.error,
+        'created_on': job.created_on,
+        'finished_on': job.finished_on,
+    }
+    if job.status == Job.DONE and job.result is not None:
+        payload['result_url'] = reverse('todo:job_result', args=[job.key])
+    return JsonResponse(payload)
+
+
+# Render the page that follows a background job
+def job_page(request, key):
+    """
+    Renders a page that polls the status of a background job until it finishes.
+
+    Args:
+        request: The HTTP request object.
+        key (str): The key returned when the job was queued.
+
+    Returns:
+        HttpResponse: The job page.
+
+    Raises:
+        Http404: If the job does not exist or belongs to another user.
+    """
+    job = _get_job(request, key)
+    return render(request, 'todo/job.html', {
+        'job': job,
+        'status_url': reverse('todo:job_status', args=[job.key]),
+        'config': config,
+    })
+
+
+# Download the result of a finished background job
+def job_result(request, key):
+    """
+    Returns the file produced by a finished background job, e.g. a csv export.
+
+    Args:
+        request: The HTTP request object.
+        key (str): The key returned when the job was queued.
+
+    Returns:
+        HttpResponse: The result as an attachment.
+
+    Raises:
+        Http404: If the job does not exist, belongs to another user, has not finished or
+                 produced no result.
+    """
+    job = _get_job(request, key, status=Job.DONE, result__isnull=False)
+    response = HttpResponse(bytes(job.result), content_type=job.result_type)
+    response['Content-Disposition'] = 'attachment; filename="%s"' % job.result_name
+    return response
+
+
 # Delete a template
 
 
@@ -1037,3 +1537,380 @@ def delete_template(request, template_id):
     else:
         template.delete()
     return redirect('/templates')
+
+
+def _stats_range(request, default_days=30):
+    """Parse the from/to (ISO dates) or days query parameters of the stats views."""
+    today = datetime.date.today()
+    end = parse_date(request.GET.get('to', '')) or today
+    start = parse_date(request.GET.get('from', ''))
+    if start is None:
+        try:
+            days = max(int(request.GET.get('days', default_days)), 1)
+        except ValueError:
+            days = default_days
+        start = end - datetime.timedelta(days=days - 1)
+    return start, end
+
+
+def _stats_summary(rows):
+    created = sum(row.created_count for row in rows)
+    completed = sum(row.completed_count for row in rows)
+    overdue = sum(row.overdue_count for row in rows)
+    seconds = sum(row.completion_seconds for row in rows)
+    return {
+        'created': created,
+        'completed': completed,
+        'overdue': overdue,
+        'average_completion_seconds': seconds / completed if completed else None,
+    }
+
+
+# Render the productivity stats page
+def stats_page(request):
+    """
+    Renders the productivity statistics of the authenticated user.
+
+    The page reads the DailyStats rollups only, so its cost depends on the number of days
+    shown and not on the number of items the user has ever created.
+
+    Args:
+        request: The HTTP request object. Accepts optional `from`/`to` ISO dates or `days`.
+
+    Returns:
+        HttpResponse: The rendered stats page, or a redirect to the login page.
+    """
+    if not request.user.is_authenticated:
+        return redirect("/login")
+    start, end = _stats_range(request)
+    rows = list(DailyStats.objects.filter(
+        user_id=request.user.id, day__range=(start, end)).order_by('-day'))
+    context = {
+        'daily_stats': rows,
+        'summary': _stats_summary(rows),
+        'start': start,
+        'end': end,
+        'config': config
+    }
+    return render(request, 'todo/stats.html', context)
+
+
+# Productivity stats as JSON
+def stats_json(request):
+    """
+    Returns the per-day productivity rollups of the authenticated user as JSON.
+
+    Args:
+        request: The HTTP request object. Accepts optional `from`/`to` ISO dates or `days`.
+
+    Returns:
+        JsonResponse: The range, the per-day rows and a summary over the range.
+    """
+    if not request.user.is_authenticated:
+        return redirect("/login")
+    start, end = _stats_range(request)
+    rows = list(DailyStats.objects.filter(
+        user_id=request.user.id, day__range=(start, end)).order_by('day'))
+    return JsonResponse({
+        'from': start.isoformat(),
+        'to': end.isoformat(),
+        'days': [{
+            'day': row.day.isoformat(),
+            'created': row.created_count,
+            'completed': row.completed_count,
+            'overdue': row.overdue_count,
+            'average_completion_seconds': row.average_completion_seconds,
+        } for row in rows],
+        'summary': _stats_summary(rows),
+    })
+
+
+# Delta sync for offline and mobile clients
+def sync_changes(request):
+    """
+    Returns the list and item changes of the authenticated user after a cursor.
+
+    Clients pass the `cursor` of their previous response as `since` (0 for a full
+    sync) and keep requesting while `has_more` is true. Deleted objects are
+    reported as tombstones; a deleted list implies the deletion of its items.
+
+    Args:
+        request: The HTTP request object. Accepts `since` and an optional page `limit`.
+
+    Returns:
+        JsonResponse: The next cursor, whether more changes are pending, the current
+                      state of changed lists and items, and the ids of deleted ones.
+    """
+    if not request.user.is_authenticated:
+        return JsonResponse({'error': 'authentication required'}, status=401)
+    try:
+        since = int(request.GET.get('since', 0))
+        limit = int(request.GET.get('limit', SYNC_PAGE_SIZE))
+    except ValueError:
+        return JsonResponse({'error': 'since and limit must be integers'}, status=400)
+    limit = min(max(limit, 1), SYNC_PAGE_SIZE)
+    return JsonResponse(sync.changes_since(request.user.id, since, limit))
+
+
+# Query the items of the current user with filters, sorting and pagination
+def query_items(request):
+    """
+    Returns one page of the authenticated user's items matching a filter.
+
+    Filters are `done` (true/false), `due_after` and `due_before` (inclusive dates), `tag`,
+    `color`, `list` and `prefix` (start of the item name). Items are sorted by `sort`
+    (`due`, `created` or `name`, prefixed with '-' for descending order). Clients keep
+    passing the returned `next_cursor` as `cursor` until it is null.
+
+    Args:
+        request: The HTTP request object carrying the filters as query parameters.
+
+    Returns:
+        JsonResponse: The page of items and the cursor of the next page.
+    """
+    if not request.user.is_authenticated:
+        return JsonResponse({'error': 'authentication required'}, status=401)
+    try:
+        limit = int(request.GET.get('limit', ITEM_QUERY_PAGE_SIZE))
+        items, next_cursor = item_query.query_items(
+            request.user.id, request.GET, min(max(limit, 1), ITEM_QUERY_MAX_PAGE_SIZE))
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    return JsonResponse({'items': [sync.serialize_item(item) for item in items], 'next_cursor': next_cursor})
+
+
+def _can_view_list(user, list_id):
+    """
+    Tells whether a user owns a list or had it shared with them, directly or through a team.
+
+    Args:
+        user: The authenticated user.
+        list_id (int): The ID of the list.
+
+    Returns:
+        bool: True if the user may read the list.
+    """
+    todo_list = List.objects.filter(id=list_id, is_deleted=False).values('user_id').first()
+    if todo_list is None:
+        return False
+    if todo_list['user_id'] == user.id:
+        return True
+    shared_list_id = SharedList.objects.filter(user=user).values_list('shared_list_id', flat=True).first()
+    if shared_list_id and str(list_id) in shared_list_id.split():
+        return True
+    # teams live on the default database, which a shard cannot join
+    team_ids = list(TeamMembership.objects.filter(user=user).values_list('team_id', flat=True))
+    return ListTeamShare.objects.filter(list_id=list_id, team_id__in=team_ids).exists()
+
+
+# Get the archived items of a list, called by javascript function
+def getArchivedItems(request, list_id):
+    """
+    Returns a page of the archived (completed) items of a list.
+
+    The archive is only queried when the user asks to see it, so rendering the index
+    page never pays for a list's history.
+
+    Args:
+        request: The HTTP request object. Accepts optional `offset` and `limit`.
+        list_id (int): The ID of the list whose archived items are requested.
+
+    Returns:
+        JsonResponse: The archived items and whether more are available, or a 404 if the
+                      list is not the user's own or shared with them.
+    """
+    if not request.user.is_authenticated:
+        return JsonResponse({'error': 'authentication required'}, status=401)
+    # a shared list and its archive live on the shard of the list's owner
+    with sharding.for_row(List, list_id):
+        if not _can_view_list(request.user, list_id):
+            return JsonResponse({'error': 'no such list'}, status=404)
+        try:
+            offset = max(int(request.GET.get('offset', 0)), 0)
+            limit = min(max(int(request.GET.get('limit', ARCHIVE_PAGE_SIZE)), 1), ARCHIVE_PAGE_SIZE)
+        except ValueError:
+            return JsonResponse({'error': 'offset and limit must be integers'}, status=400)
+        items = list(ListItemArchive.objects.filter(list_id=list_id, list__is_deleted=False)
+                     .order_by('-finished_on')[offset:offset + limit + 1])
+    return JsonResponse({
+        'items': [sync.serialize_item(item) for item in items[:limit]],
+        'has_more': len(items) > limit,
+    })
+
+
+def _teams_of(user):
+    """
+    Returns the teams a user owns or is a member of.
+
+    Args:
+        user: The user whose teams are returned.
+
+    Returns:
+        QuerySet: The user's teams.
+    """
+    return Team.objects.filter(Q(owner=user) | Q(teammembership__user=user)).distinct()
+
+
+# Create a team or list the teams of the current user
+def teams(request):
+    """
+    Lists the authenticated user's teams, or creates a team on POST.
+
+    The creator owns the new team and is its first member.
+
+    Args:
+        request: The HTTP request object. A POST carries the `name` of the new team.
+
+    Returns:
+        JsonResponse: The user's teams, or the created team with status 201.
+    """
+    if not request.user.is_authenticated:
+        return JsonResponse({'error': 'authentication required'}, status=401)
+    if request.method == 'POST':
+        name = request.POST.get('name', '').strip()
+        if not name:
+            return JsonResponse({'error': 'name is required'}, status=400)
+        try:
+            with sharding.atomic():
+                team = Team.objects.create(name=name, owner=request.user, created_on=timezone.now())
+                TeamMembership.objects.create(team=team, user=request.user, joined_on=team.created_on)
+        except IntegrityError:
+            return JsonResponse({'error': 'you already own a team with this name'}, status=400)
+        return JsonResponse({'id': team.id, 'name': team.name, 'is_owner': True}, status=201)
+    return JsonResponse({'teams': [
+        {'id': team.id, 'name': team.name, 'is_owner': team.owner_id == request.user.id}
+        for team in _teams_of(request.user).order_by('name')
+    ]})
+
+
+# Add or remove a member of a team owned by the current user
+@require_POST
+def team_members(request, team_id):
+    """
+    Adds or removes one member of a team.
+
+    A membership is a single row, so either change is one write no matter how many
+    lists are shared with the team. Only the owner of the team can change it.
+
+    Args:
+        request: The HTTP request object. Carries the `username` and an `action` of
+                 'add' (the default) or 'remove'.
+        team_id (int): The ID of the team.
+
+    Returns:
+        JsonResponse: The team, the username and whether they are now a member.
+    """
+    if not request.user.is_authenticated:
+        return JsonResponse({'error': 'authentication required'}, status=401)
+    team = Team.objects.filter(id=team_id, owner=request.user).first()
+    if team is None:
+        raise Http404("No such team")
+    username = request.POST.get('username', '')
+    member = User.objects.filter(username=username).first()
+    if member is None:
+        return JsonResponse({'error': 'no user named %s' % username}, status=400)
+    if request.POST.get('action', 'add') == 'remove':
+        if member.id == team.owner_id:
+            return JsonResponse({'error': 'the owner cannot leave the team'}, status=400)
+        TeamMembership.objects.filter(team=team, user=member).delete()
+        is_member = False
+    else:
+        TeamMembership.objects.get_or_create(team=team, user=member, defaults={'joined_on': timezone.now()})
+        is_member = True
+    return JsonResponse({'team_id': team.id, 'username': member.username, 'is_member': is_member})
+
+
+# Share a list of the current user with one of their teams
+@require_POST
+def share_list_with_team(request, list_id):
+    """
+    Shares a list with a team, or stops sharing it.
+
+    Sharing stores one row for the team; members find the list through it when their
+    index page is rendered, so the size of the team does not matter.
+
+    Args:
+        request: The HTTP request object. Carries the `team_id` and an optional
+                 `action` of 'remove'.
+        list_id (int): The ID of the list, which must belong to the user.
+
+    Returns:
+        JsonResponse: The list, the team and whether the list is now shared with it.
+    """
+    if not request.user.is_authenticated:
+        return JsonResponse({'error': 'authentication required'}, status=401)
+    todo_list = List.objects.filter(id=list_id, user_id=request.user, is_deleted=False).first()
+    try:
+        team = _teams_of(request.user).filter(id=int(request.POST.get('team_id', ''))).first()
+    except ValueError:
+        return JsonResponse({'error': 'team_id must be an integer'}, status=400)
+    if todo_list is None or team is None:
+        raise Http404("No such list or team")
+    if request.POST.get('action') == 'remove':
+        ListTeamShare.objects.filter(list=todo_list, team=team).delete()
+        return JsonResponse({'list_id': todo_list.id, 'team_id': team.id, 'is_shared': False})
+    _, created = ListTeamShare.objects.get_or_create(
+        list=todo_list, team=team, defaults={'shared_on': timezone.now()})
+    if created and not todo_list.is_shared:
+        List.objects.filter(id=todo_list.id).update(is_shared=True, version=F('version') + 1)
+    return JsonResponse({'list_id': todo_list.id, 'team_id': team.id, 'is_shared': True})
+
+
+# Suggest usernames while typing in the share field, called by javascript function
+@replica.read_only
+def username_search(request):
+    """
+    Suggests the usernames starting with a prefix, or checks a set of usernames.
+
+    The share dialog asks for suggestions as the user types and checks the whole
+    field before creating the list, so unknown names never reach createNewTodoList.
+
+    Args:
+        request: The HTTP request object. Carries either the `q` prefix or the
+                 space-separated `names` to check.
+
+    Returns:
+        JsonResponse: The suggested or existing usernames.
+    """
+    if not request.user.is_authenticated:
+        return JsonResponse({'error': 'authentication required'}, status=401)
+    if 'names' in request.GET:
+        return JsonResponse({'usernames': usernames.existing(request.GET['names'].split())})
+    return JsonResponse({'usernames': list(usernames.suggest(request.GET.get('q', '').strip()))})
+
+
+# Profiles of sampled requests, for staff
+@staff_member_required
+def profiles_page(request, name=None):
+    """
+    Lists the stored request profiles and shows the slowest functions of one of them.
+
+    The page also hands out a fresh token; requests sending it in the X-Profile-Token
+    header are profiled whatever the sampling rate.
+
+    Args:
+        request: The HTTP request object.
+        name (str, optional): The file name of the profile to show.
+
+    Returns:
+        HttpResponse: The rendered profiles page.
+
+    Raises:
+        Http404: If there is no profile with that name.
+    """
+    total_time, functions = None, []
+    if name is not None:
+        try:
+            total_time, functions = profiling.top_functions(name)
+        except FileNotFoundError:
+            raise Http404("No such profile")
+    context = {
+        'profiles': profiling.profiles(),
+        'selected': name,
+        'total_time': total_time,
+        'functions': functions,
+        'sample_rate': settings.PROFILE_SAMPLE_RATE,
+        'token': profiling.make_token(),
+        'config': config
+    }
+    return render(request, 'todo/profiles.html', context)